@@ -0,0 +1,120 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterable, Iterator, NamedTuple, Optional, Set
+
+# примерные накладные расходы на запись сверх тела: ключ, метаданные, узлы словарей
+ENTRY_OVERHEAD = 256
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    # заголовки, которые нельзя вычислить без данных (ETag карточки, курсор)
+    meta: Dict[str, str]
+
+
+class ResponseCache:
+    """LRU-кэш сериализованных ответов с бюджетом по байтам.
+
+    Записи помечаются тегами, и запись в хранилище сбрасывает ровно те
+    записи, чьи теги она затронула. Пока запись идёт (writing), кэш не
+    отдаёт и не принимает ответы: хранилище уже может быть изменено, а
+    сброс ещё не случился. Поколение растёт при каждом сбросе - ответ,
+    прочитанный из хранилища до сброса, put уже не положит.
+    Используется только из event loop, поэтому без блокировок.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+        self._writers = 0
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._entry_tags: Dict[Hashable, Set[Hashable]] = {}
+        self._tagged: Dict[Hashable, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CachedBody]:
+        entry = self._entries.get(key) if not self._writers else None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(
+        self,
+        key: Hashable,
+        entry: CachedBody,
+        tags: Iterable[Hashable],
+        generation: int,
+    ) -> None:
+        # generation - значение self.generation до чтения данных из хранилища
+        cost = len(entry.body) + ENTRY_OVERHEAD
+        if self._writers or generation != self.generation or cost > self.max_bytes:
+            return
+        self._discard(key)
+        self._entries[key] = entry
+        self._entry_tags[key] = set(tags)
+        for tag in self._entry_tags[key]:
+            self._tagged.setdefault(tag, set()).add(key)
+        self.size += cost
+
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """Обернуть запись в хранилище и сброс затронутых записей"""
+        self._writers += 1
+        self.generation += 1
+        try:
+            yield
+        finally:
+            self._writers -= 1
+            self.generation += 1
+
+    def invalidate(
+        self, keys: Iterable[Hashable] = (), tags: Iterable[Hashable] = ()
+    ) -> None:
+        self.generation += 1
+        for key in keys:
+            self._discard(key)
+        for tag in tags:
+            for key in list(self._tagged.get(tag, ())):
+                self._discard(key)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+        self._entry_tags.clear()
+        self._tagged.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= len(entry.body) + ENTRY_OVERHEAD
+        for tag in self._entry_tags.pop(key):
+            keys = self._tagged[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tagged[tag]
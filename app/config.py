@@ -0,0 +1,80 @@
+from typing import Dict, Literal
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Настройки приложения из переменных окружения (ADR-001)"""
+
+    app_env: str = "development"
+
+    # memory - карточки в памяти процесса, sqlite - файл DATABASE_URL
+    card_store: Literal["memory", "sqlite"] = "memory"
+    database_url: str = "sqlite:///./cards.db"
+    db_pool_size: int = 5
+    # >0: каждый процесс резервирует ID блоками такого размера
+    id_block_size: int = 0
+
+    # бюджет кэша сериализованных ответов GET /cards, байт; 0 - выключен
+    response_cache_bytes: int = 32 * 1024 * 1024
+
+    # сколько последних версий доски покрывает журнал для GET /cards?since=
+    sync_log_size: int = 10_000
+
+    # лента изменений: сколько событий хранить для продолжения с since
+    # и сколько держать в очереди одного подписчика
+    feed_history: int = 1024
+    feed_queue_size: int = 256
+
+    # NFR-05: запросов в минуту с одного IP к /cards; 0 - без лимита.
+    # burst - сколько запросов можно сделать подряд; всплеск входит в лимит,
+    # за любые 60 секунд проходит не больше rate_limit_per_minute запросов
+    rate_limit_per_minute: int = 300
+    rate_limit_burst: int = 10
+    # memory - лимит на процесс, sqlite - общий для процессов через свой
+    # файл rate_limit_url (не базу карточек: каждый запрос к /cards - запись)
+    rate_limit_backend: Literal["memory", "sqlite"] = "memory"
+    rate_limit_url: str = "sqlite:///./ratelimit.db"
+    # сколько IP помнит лимит в памяти; давно не приходившие вытесняются
+    rate_limit_max_keys: int = 100_000
+
+    # исходящие запросы (ADR-003): свой пул соединений на каждый upstream
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    # сколько секунд держать простаивающее keep-alive соединение
+    http_keepalive_expiry: float = 5.0
+    # HTTP/2 по TLS, нужен пакет h2: pip install "httpx[http2]"
+    http2: bool = False
+    # лимит соединений для отдельных хостов (JSON): {"api.example.com": 200}
+    http_host_max_connections: Dict[str, int] = {}
+    # кэш ответов upstream (RFC 9111), байт в памяти; 0 - выключен.
+    # http_cache_dir - ещё и на диске: общий для процессов и переживает рестарт
+    http_cache_bytes: int = 0
+    http_cache_dir: str = ""
+    http_cache_disk_bytes: int = 256 * 1024 * 1024
+    # одинаковые одновременные GET к upstream - одним запросом
+    http_coalesce: bool = True
+    # предохранитель на хост upstream: доля неудачных попыток за окно
+    # (секунд, не меньше min_calls попыток) размыкает цепь на open_seconds;
+    # failure_rate=0 - выключен
+    http_breaker_failure_rate: float = 0.5
+    http_breaker_min_calls: int = 20
+    http_breaker_window: float = 10.0
+    http_breaker_open_seconds: float = 30.0
+    # бюджет ретраев на upstream: доля от запросов плюс минимум в секунду
+    http_retry_budget_ratio: float = 0.1
+    http_retry_budget_min_per_second: float = 1.0
+
+    # схема новых correlation ID: uuid4, counter (префикс процесса и счётчик)
+    # или ulid (сортируется по времени)
+    correlation_id_scheme: Literal["uuid4", "counter", "ulid"] = "uuid4"
+
+    # процессы uvicorn; больше одного - только с общим хранилищем (sqlite)
+    web_concurrency: int = 1
+    host: str = "127.0.0.1"
+    port: int = 8000
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+
+settings = Settings()
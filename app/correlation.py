@@ -0,0 +1,89 @@
+import base64
+import itertools
+import os
+import random
+import time
+import uuid
+from typing import Callable, Dict
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+HEADER = b"x-correlation-id"
+# алфавит Crockford base32 для ULID: без I, L, O, U
+_CROCKFORD = bytes.maketrans(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567", b"0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+)
+
+
+def uuid4_id() -> str:
+    return str(uuid.uuid4())
+
+
+def counter_ids() -> Callable[[], str]:
+    """ID вида <узел>-<номер>: случайный префикс процесса и счётчик.
+
+    Уникальны в пределах процесса и с высокой вероятностью между процессами,
+    но раскрывают число запросов с запуска.
+    """
+    node = os.urandom(6).hex()
+    counter = itertools.count(1)
+    return lambda: f"{node}-{next(counter):x}"
+
+
+def ulid_id() -> str:
+    """ULID: 48 бит времени в мс и 80 случайных бит, 26 символов base32.
+
+    Сортируется по времени создания. Случайная часть - из random, а не
+    os.urandom: ID служит для трассировки, а не для защиты.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | random.getrandbits(80)
+    # 128 бит в 130-битной сетке base32: 2 старших нулевых бита, затем ID
+    encoded = base64.b32encode((value << 30).to_bytes(20, "big"))
+    return encoded[:26].translate(_CROCKFORD).decode()
+
+
+ID_SCHEMES: Dict[str, Callable[[], Callable[[], str]]] = {
+    "uuid4": lambda: uuid4_id,
+    "counter": counter_ids,
+    "ulid": lambda: ulid_id,
+}
+
+
+class CorrelationIdMiddleware:
+    """Correlation ID для каждого HTTP-запроса (чистый ASGI).
+
+    ID берётся из заголовка X-Correlation-ID или создаётся, только если
+    заголовка нет. Он кладётся в scope["state"] (request.state.correlation_id)
+    и добавляется в заголовки ответа. В отличие от BaseHTTPMiddleware, запрос
+    не оборачивается в отдельные задачи и потоки тела.
+    """
+
+    def __init__(self, app: ASGIApp, scheme: str = "uuid4"):
+        self.app = app
+        if scheme not in ID_SCHEMES:
+            raise ValueError(f"Unknown correlation id scheme: {scheme}")
+        self.new_id = ID_SCHEMES[scheme]()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        raw = None
+        for name, value in scope["headers"]:
+            if name == HEADER:
+                raw = value
+                break
+        if raw is None:
+            correlation_id = self.new_id()
+            raw = correlation_id.encode("latin-1")
+        else:
+            correlation_id = raw.decode("latin-1")
+        scope.setdefault("state", {})["correlation_id"] = correlation_id
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), (HEADER, raw)]
+            await send(message)
+
+        await self.app(scope, receive, send_with_id)
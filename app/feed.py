@@ -0,0 +1,177 @@
+import asyncio
+import secrets
+import threading
+from collections import deque
+from typing import Deque, NamedTuple, Optional, Set
+
+import orjson
+
+
+class FeedEvent(NamedTuple):
+    seq: int
+    # "<эпоха>.<seq>": по нему клиент продолжает ленту (since, Last-Event-ID)
+    id: str
+    type: str
+    # JSON события целиком: сериализуется один раз на всех подписчиков
+    data: bytes
+
+
+def sse_frame(event: FeedEvent) -> bytes:
+    """Событие в формате Server-Sent Events; id позволяет продолжить с Last-Event-ID"""
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (
+        event.id.encode(),
+        event.type.encode(),
+        event.data,
+    )
+
+
+def _control_event(event_type: str, event_id: str, seq: int) -> FeedEvent:
+    body = {"type": event_type, "seq": seq, "id": event_id}
+    return FeedEvent(seq, event_id, event_type, orjson.dumps(body))
+
+
+class Subscription:
+    """Ограниченная очередь одного подписчика.
+
+    Запись в ленту никогда не ждёт подписчика: если очередь полна, новые
+    события отбрасываются, а после уже принятых подписчик получает
+    overflow с последним доставленным seq и отключается - продолжить
+    можно с since=seq.
+    """
+
+    def __init__(self, feed: "ChangeFeed", maxsize: int):
+        self._feed = feed
+        self._maxsize = maxsize
+        self._events: Deque[FeedEvent] = deque()
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.get_ident()
+        self._wakeup = asyncio.Event()
+        self.last_seq = 0
+        self.last_id = ""
+        self.overflowed = False
+
+    def push(self, event: FeedEvent) -> bool:
+        # вызывается под блокировкой ленты из любого потока;
+        # False - подписчик больше не принимает события
+        if self.overflowed:
+            return False
+        if len(self._events) >= self._maxsize:
+            self.overflowed = True
+        else:
+            self._events.append(event)
+        if threading.get_ident() == self._thread:
+            self._wakeup.set()
+            return True
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # цикл подписчика уже закрыт
+            return False
+        return True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[FeedEvent]:
+        """Следующее событие или None, если за timeout секунд событий не было"""
+        while not self._events:
+            if self.overflowed:
+                self.close()
+                return _control_event("overflow", self.last_id, self.last_seq)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        event = self._events.popleft()
+        if event.seq > self.last_seq:
+            self.last_seq, self.last_id = event.seq, event.id
+        return event
+
+    def close(self) -> None:
+        self._feed.unsubscribe(self)
+
+
+class ChangeFeed:
+    """Лента изменений карточек с номерами событий.
+
+    Наполняется слушателем хранилища (CardStore.add_listener) и раздаёт
+    события подписчикам в памяти процесса. Последние history событий
+    хранятся, чтобы переподключившийся клиент продолжил с since; если
+    нужные события уже вытеснены, первым приходит reset - доску надо
+    перечитать через GET /cards.
+
+    seq считается с нуля в каждом процессе, поэтому id события несёт ещё
+    и случайную эпоху ленты: since от перезапущенного процесса или от
+    другого воркера не совпадёт по эпохе и тоже получит reset, а не чужие
+    события с теми же номерами.
+    """
+
+    def __init__(
+        self, history: int = 1024, queue_size: int = 256, epoch: Optional[str] = None
+    ):
+        self.queue_size = queue_size
+        self.epoch = epoch or secrets.token_hex(4)
+        self.last_seq = 0
+        self._lock = threading.Lock()
+        self._history: Deque[FeedEvent] = deque(maxlen=history)
+        self._subscribers: Set[Subscription] = set()
+
+    def publish(self, event: str, card: dict, previous: Optional[dict] = None) -> None:
+        body = {"type": event, "card": card}
+        if previous is not None and (
+            previous["column"] != card["column"]
+            or previous["order_idx"] != card["order_idx"]
+        ):
+            # соседей клиент сдвигает сам: -1 после старой позиции, +1 с новой
+            body["type"] = "moved"
+            body["from"] = {
+                "column": previous["column"],
+                "order_idx": previous["order_idx"],
+            }
+        with self._lock:
+            self.last_seq += 1
+            body["seq"] = self.last_seq
+            body["id"] = self._id(self.last_seq)
+            item = FeedEvent(
+                self.last_seq, body["id"], body["type"], orjson.dumps(body)
+            )
+            self._history.append(item)
+            for subscriber in list(self._subscribers):
+                if not subscriber.push(item):
+                    self._subscribers.discard(subscriber)
+
+    def subscribe(self, since: Optional[str] = None) -> Subscription:
+        """Подписаться на события после id since (None - только новые).
+
+        Вызывается из event loop подписчика.
+        """
+        subscription = Subscription(self, self.queue_size)
+        seq = self._parse(since)
+        with self._lock:
+            if since is not None:
+                first = self._history[0].seq if self._history else self.last_seq + 1
+                if seq is not None and first - 1 <= seq <= self.last_seq:
+                    for item in self._history:
+                        if item.seq > seq:
+                            subscription.push(item)
+                else:
+                    subscription.push(
+                        _control_event("reset", self._id(self.last_seq), self.last_seq)
+                    )
+            self._subscribers.add(subscription)
+        return subscription
+
+    def _id(self, seq: int) -> str:
+        return f"{self.epoch}.{seq}"
+
+    def _parse(self, event_id: Optional[str]) -> Optional[int]:
+        # seq события этой ленты; None - id чужой эпохи или не id вовсе
+        epoch, _, seq = (event_id or "").rpartition(".")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
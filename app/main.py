@@ -1,21 +1,64 @@
-import re
+import asyncio
+import base64
+import logging
 import uuid
-from datetime import datetime
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, AsyncIterator, Iterable, List, Optional, Sequence
 
-from fastapi import FastAPI, HTTPException, Request, status
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, status
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-
-from .models.schemas import CardCreate, CardResponse, CardUpdate, ColumnType
-
-# ADR-001
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import ValidationError
+
+from .cache import CachedBody, ResponseCache
+from .config import settings
+from .correlation import CorrelationIdMiddleware
+from .feed import ChangeFeed, sse_frame
+from .metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, callback, gauge
+from .models.schemas import (
+    CardBatchDelete,
+    CardBatchRequest,
+    CardBatchUpdateItem,
+    CardCreate,
+    CardResponse,
+    CardUpdate,
+    ColumnType,
+)
+from .ratelimit import MemoryRateLimitBackend, RateLimitMiddleware, create_rate_limiter
+from .security.http_client import create_upstream_clients
+from .security.masking import RedactingFilter, mask_sensitive_data
+from .store.async_store import AsyncCardStore
+from .store.base import BoardVersion, CardNotFoundError, Delta
+from .store.factory import create_store
+
+logger = logging.getLogger(__name__)
+# сообщения и строки запросов в логах проходят то же маскирование, что и ошибки
+for _name in (__name__, "uvicorn.access", "uvicorn.error"):
+    logging.getLogger(_name).addFilter(RedactingFilter())
+
+# ADR-001: настройки (CARD_STORE, DATABASE_URL, APP_ENV) - в app/config.py
 # import os
 # JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret-change-in-production")
-# DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
-# APP_ENV = os.getenv("APP_ENV", "development")
 
-app = FastAPI(title="Idea Kanban API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await _HTTP_CLIENTS.close()
+    _STORE.close()
+    if _RATE_LIMITER is not None:
+        _RATE_LIMITER.backend.close()
+
+
+app = FastAPI(
+    title="Idea Kanban API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 
 # ADR-002
@@ -28,12 +71,14 @@ class ProblemDetails(Exception):
         detail: str,
         error_type: str = None,
         correlation_id: str = None,
+        errors: List[dict] = None,
     ):
         self.status = status_code
         self.title = title
         self.detail = detail
         self.type = error_type or "about:blank"
         self.correlation_id = correlation_id
+        self.errors = errors
 
 
 class ApiError(ProblemDetails):
@@ -43,6 +88,7 @@ class ApiError(ProblemDetails):
         message: str,
         status_code: int = 400,
         correlation_id: str = None,
+        errors: List[dict] = None,
     ):
         super().__init__(
             status_code=status_code,
@@ -50,38 +96,33 @@ class ApiError(ProblemDetails):
             detail=message,
             error_type=ERROR_TYPES.get(code, "about:blank"),
             correlation_id=correlation_id,
+            errors=errors,
         )
 
 
-def mask_sensitive_data(text: str) -> str:
-    if not text:
-        return text
-
-    # маскирование email
-    text = re.sub(
-        r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", "[EMAIL_REDACTED]", text
-    )
-
-    # маскирование токенов
-    text = re.sub(
-        r"\beyJ[A-Za-z0-9_-]*\.[A-Za-z0-9_-]*\.[A-Za-z0-9_-]*\b", "[JWT_REDACTED]", text
+def _rate_limited(scope: dict, retry_after: int) -> Response:
+    response = _create_problem_response(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        title="rate_limited",
+        detail=f"Too many requests, retry in {retry_after} s",
+        correlation_id=scope["state"]["correlation_id"],
+        error_type=ERROR_TYPES["rate_limited"],
     )
+    response.headers["Retry-After"] = str(retry_after)
+    return response
 
-    # маскирование длинных числовых последовательностей
-    text = re.sub(r"\b\d{13,19}\b", "[CARD_REDACTED]", text)
-
-    return text
 
+# NFR-05: лимит запросов к /cards по IP; добавлен раньше correlation ID,
+# поэтому стоит внутри него и отказ уже несёт correlation_id
+_RATE_LIMITER = create_rate_limiter(settings)
+if _RATE_LIMITER is not None:
+    app.add_middleware(RateLimitMiddleware, limiter=_RATE_LIMITER, reject=_rate_limited)
 
-# добавление correlation_id ко всем запросам
-@app.middleware("http")
-async def add_correlation_id(request: Request, call_next):
-    correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
-    request.state.correlation_id = correlation_id
+# correlation_id для всех запросов: request.state.correlation_id и заголовок ответа
+app.add_middleware(CorrelationIdMiddleware, scheme=settings.correlation_id_scheme)
 
-    response = await call_next(request)
-    response.headers["X-Correlation-ID"] = correlation_id
-    return response
+# внешний слой: в задержку входят и отказы лимитера, и обработка ошибок
+app.add_middleware(MetricsMiddleware)
 
 
 ERROR_MAP = {
@@ -89,6 +130,8 @@ ERROR_MAP = {
     "not_found": "Requested resource not found",
     "internal_server_error": "Internal server error occurred",
     "http_error": "HTTP error occurred",
+    "rate_limited": "Too many requests",
+    "feed_unavailable": "Change feed is unavailable",
 }
 
 ERROR_TYPES = {
@@ -96,6 +139,8 @@ ERROR_TYPES = {
     "not_found": "https://api.example.com/errors/not-found",
     "http_error": "https://api.example.com/errors/http",
     "internal": "https://api.example.com/errors/internal",
+    "rate_limited": "https://api.example.com/errors/rate-limit",
+    "feed_unavailable": "https://api.example.com/errors/feed-unavailable",
 }
 
 
@@ -111,7 +156,8 @@ def _create_problem_response(
     detail: str,
     correlation_id: str,
     error_type: str = None,
-) -> JSONResponse:
+    errors: List[dict] = None,
+) -> ORJSONResponse:
     safe_title = ERROR_MAP.get(title, "An error occurred")
     safe_detail = get_safe_error_detail(title, detail)
 
@@ -123,11 +169,17 @@ def _create_problem_response(
         "correlation_id": correlation_id,
         "instance": f"/errors/{uuid.uuid4()}",
     }
+    if errors:
+        # ошибки по элементам пакетных запросов
+        problem_data["errors"] = [
+            {**error, "detail": mask_sensitive_data(error["detail"])}
+            for error in errors
+        ]
 
     # if APP_ENV == "production" and status_code >= 500:
     #     problem_data["detail"] = "An internal server error occurred"
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status_code,
         content=problem_data,
         media_type="application/problem+json",
@@ -142,6 +194,7 @@ async def api_error_handler(request: Request, exc: ProblemDetails):
         detail=exc.detail,
         correlation_id=exc.correlation_id or request.state.correlation_id,
         error_type=exc.type,
+        errors=exc.errors,
     )
 
 
@@ -157,22 +210,23 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     )
 
 
-@app.exception_handler(RequestValidationError)
-async def request_validation_error_handler(
-    request: Request, exc: RequestValidationError
-):
+def _format_validation_errors(errors: Sequence[dict]) -> str:
     error_messages = []
-    for err in exc.errors():
+    for err in errors:
         msg = err.get("msg")
         loc = ".".join(str(x) for x in err.get("loc", []))
         error_messages.append(f"{loc}: {msg}" if loc else msg)
+    return "; ".join(error_messages)
 
-    detail = "; ".join(error_messages)
 
+@app.exception_handler(RequestValidationError)
+async def request_validation_error_handler(
+    request: Request, exc: RequestValidationError
+):
     return _create_problem_response(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         title="validation_error",
-        detail=detail,
+        detail=_format_validation_errors(exc.errors()),
         correlation_id=request.state.correlation_id,
         error_type=ERROR_TYPES["validation"],
     )
@@ -180,7 +234,11 @@ async def request_validation_error_handler(
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
-    print(f"Unhandled exception: {exc}, correlation_id: {request.state.correlation_id}")
+    logger.error(
+        "Unhandled exception: %s, correlation_id: %s",
+        str(exc),
+        request.state.correlation_id,
+    )
 
     return _create_problem_response(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -192,61 +250,451 @@ async def general_exception_handler(request: Request, exc: Exception):
     )
 
 
-_DB = {"cards": []}
+_STORE = AsyncCardStore(create_store(settings), max_workers=settings.db_pool_size)
+# кэш живёт в памяти процесса и не видит записей других воркеров,
+# поэтому при нескольких процессах uvicorn он выключен
+_CACHE = ResponseCache(
+    settings.response_cache_bytes if settings.web_concurrency == 1 else 0
+)
+# лента видит записи только своего процесса: при нескольких воркерах каждый
+# подписчик получал бы лишь часть изменений, поэтому там она выключена
+FEED_ENABLED = settings.web_concurrency == 1
+_FEED = ChangeFeed(history=settings.feed_history, queue_size=settings.feed_queue_size)
+if FEED_ENABLED:
+    _STORE.store.add_listener(_FEED.publish)
+
+CARDS_IN_COLUMN = gauge("cards", "Cards in the store by column", ("column",))
+
+# счётчики кэша и лимитера уже есть - они читаются только при выдаче /metrics
+callback(
+    "response_cache_hits_total", "Response cache hits", "counter", lambda: _CACHE.hits
+)
+callback(
+    "response_cache_misses_total",
+    "Response cache misses",
+    "counter",
+    lambda: _CACHE.misses,
+)
+callback(
+    "response_cache_evictions_total",
+    "Response cache entries evicted by the byte budget",
+    "counter",
+    lambda: _CACHE.evictions,
+)
+callback("response_cache_bytes", "Response cache size", "gauge", lambda: _CACHE.size)
+if _RATE_LIMITER is not None and isinstance(
+    _RATE_LIMITER.backend, MemoryRateLimitBackend
+):
+    callback(
+        "rate_limit_keys",
+        "Client keys tracked by the rate limiter",
+        "gauge",
+        lambda: len(_RATE_LIMITER.backend),
+    )
+    callback(
+        "rate_limit_evictions_total",
+        "Rate limiter keys evicted to stay within RATE_LIMIT_MAX_KEYS",
+        "counter",
+        lambda: _RATE_LIMITER.backend.evictions,
+    )
+
+# исходящие запросы идут через общие клиенты: _HTTP_CLIENTS.get(base_url)
+_HTTP_CLIENTS = create_upstream_clients(settings)
+callback(
+    "http_client_pool",
+    "Outgoing connection pool usage by upstream",
+    "gauge",
+    lambda: {
+        (origin, name): value
+        for origin, stats in _HTTP_CLIENTS.stats().items()
+        for name, value in stats.items()
+    },
+    ("upstream", "stat"),
+)
+if _HTTP_CLIENTS.cache is not None:
+    callback(
+        "http_client_cache_bytes",
+        "Upstream response cache size in memory",
+        "gauge",
+        lambda: _HTTP_CLIENTS.cache.memory.size,
+    )
+    callback(
+        "http_client_cache_evictions_total",
+        "Upstream responses evicted from memory by the byte budget",
+        "counter",
+        lambda: _HTTP_CLIENTS.cache.memory.evictions,
+    )
+
+MAX_PAGE_SIZE = 1000
+MAX_SEARCH_RESULTS = 100
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+# комментарий в SSE раз в столько секунд: прокси не рвут соединение,
+# а отключившийся клиент обнаруживается при записи
+FEED_HEARTBEAT = 15.0
+CARD_FIELDS = tuple(CardResponse.model_fields)
 
 
-def _get_max_order_idx(column: ColumnType) -> int:
-    cards_in_column = [card for card in _DB["cards"] if card["column"] == column]
-    return max([card["order_idx"] for card in cards_in_column], default=0)
+def _encode_cursor(column: Optional[ColumnType], key: int) -> str:
+    raw = f"{column.value if column else ''}:{key}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
 
 
-def _get_card_by_id(card_id: int) -> Optional[dict]:
-    return next((card for card in _DB["cards"] if card["id"] == card_id), None)
+def _decode_cursor(cursor: str, column: Optional[ColumnType]) -> Optional[int]:
+    # курсор привязан к колонке: ключи разных порядков несравнимы
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        cursor_column, key = raw.split(":")
+        key = int(key)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if cursor_column != (column.value if column else ""):
+        return None
+    return key
 
 
-def _reorder_cards(column: ColumnType, from_idx: int, to_idx: int):
-    # упорядочивает карточки в колонке при изменениях
-    cards_in_column = [card for card in _DB["cards"] if card["column"] == column]
-    if not cards_in_column:
-        return
+def _serialize_card(card: dict, fields: Sequence[str] = CARD_FIELDS) -> dict:
+    # карточка хранилища уже в форме CardResponse, а datetime orjson пишет
+    # в ISO 8601 сам - повторная валидация через pydantic не нужна
+    if fields is CARD_FIELDS:
+        return card
+    return {name: card[name] for name in fields}
 
-    cards_in_column.sort(key=lambda x: x["order_idx"])
-    min_idx = min(c["order_idx"] for c in cards_in_column)
-    max_idx = max(c["order_idx"] for c in cards_in_column)
-
-    if to_idx < min_idx:
-        to_idx = min_idx
-    if to_idx > max_idx + 1:
-        to_idx = max_idx + 1
-
-    if from_idx < to_idx:
-        for card in cards_in_column:
-            if from_idx < card["order_idx"] <= to_idx:
-                card["order_idx"] -= 1
-            elif card["order_idx"] == from_idx:
-                card["order_idx"] = to_idx
-    else:
-        for card in cards_in_column:
-            if to_idx <= card["order_idx"] < from_idx:
-                card["order_idx"] += 1
-            elif card["order_idx"] == from_idx:
-                card["order_idx"] = to_idx
+
+def _json_bytes(content: Any) -> bytes:
+    return orjson.dumps(content)
+
+
+def _cached_response(cached: CachedBody, hit: bool, headers: dict) -> Response:
+    headers["X-Cache"] = "HIT" if hit else "MISS"
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
+def _invalidate_cards(cards: Iterable[dict], shifted: bool = True) -> None:
+    """Сбросить кэш ответов после записи.
+
+    shifted - у соседей могли сдвинуться позиции (перенос, удаление), тогда
+    сбрасываются все карточки затронутых колонок, иначе только сами карточки.
+    """
+    cards = list(cards)
+    columns = {card["column"] for card in cards}
+    tags = [("list", None)] + [("list", column) for column in columns]
+    if shifted:
+        tags += [("cards", column) for column in columns]
+    _CACHE.invalidate(keys=[("card", card["id"]) for card in cards], tags=tags)
+
+
+def _http_date(value: datetime) -> str:
+    # хранилище отдаёт локальное время без зоны
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _board_etag(version: BoardVersion) -> str:
+    return f'"b{version.epoch}.{version.number}"'
+
+
+def _card_etag(card: dict) -> str:
+    # order_idx сдвигается и при перемещении соседей, updated_at при этом прежний
+    stamp = int(card["updated_at"].timestamp() * 1_000_000)
+    return f'"c{card["id"]}-{stamp}-{card["order_idx"]}"'
+
+
+def _validators(etag: str, modified_at: datetime) -> dict:
+    # no-cache: клиент может хранить ответ, но перепроверяет его каждый раз
+    return {
+        "ETag": etag,
+        "Last-Modified": _http_date(modified_at),
+        "Cache-Control": "no-cache",
+    }
+
+
+def _is_not_modified(request: Request, etag: str, modified_at: datetime) -> bool:
+    # If-None-Match важнее If-Modified-Since (RFC 9110, 13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    modified = modified_at.astimezone(timezone.utc).replace(microsecond=0)
+    return modified <= since
+
+
+async def _export_chunks(
+    store: AsyncCardStore, export_format: str, batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[bytes]:
+    # идём по хранилищу страницами, в памяти не больше одной пачки
+    if export_format == "json":
+        yield b"["
+    separator = b"\n" if export_format == "ndjson" else b","
+    first = True
+    after = None
+    while True:
+        cards, after = await store.page(after=after, limit=batch_size)
+        if cards:
+            chunk = separator.join(_json_bytes(card) for card in cards)
+            if export_format == "ndjson":
+                chunk += b"\n"
+            elif not first:
+                chunk = b"," + chunk
+            first = False
+            yield chunk
+        if after is None:
+            break
+    if export_format == "json":
+        yield b"]"
+
+
+async def _sse_stream(
+    since: Optional[str], heartbeat: float = FEED_HEARTBEAT
+) -> AsyncIterator[bytes]:
+    # подписка создаётся при первом чтении: поток, который не начали, не течёт
+    subscription = _FEED.subscribe(since)
+    try:
+        while True:
+            event = await subscription.get(timeout=heartbeat)
+            if event is None:
+                yield b": ping\n\n"
+                continue
+            yield sse_frame(event)
+            if event.type == "overflow":
+                return
+    finally:
+        subscription.close()
 
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики процесса в формате Prometheus"""
+    for column in ColumnType:
+        CARDS_IN_COLUMN.set(await _STORE.count(column), (column.value,))
+    return Response(REGISTRY.expose(), media_type=CONTENT_TYPE)
+
+
 @app.get("/cards", response_model=List[CardResponse])
-def get_cards():
-    """Получить все карточки"""
-    return _DB["cards"]
+async def get_cards(
+    request: Request,
+    column: Optional[ColumnType] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    since: Optional[int] = Query(None, ge=0),
+    epoch: Optional[int] = Query(None, ge=0),
+):
+    """Получить страницу карточек (все или одной колонки).
 
+    С since - изменения доски после этой версии (X-Board-Version прошлого ответа),
+    не больше limit карточек; иначе snapshot - первая страница доски. epoch
+    (X-Board-Epoch) другой доски, например до перезапуска, - тоже snapshot.
+    """
+    if since is not None and (cursor is not None or column is not None):
+        raise ApiError(
+            code="validation_error",
+            message="since cannot be combined with cursor or column",
+            status_code=422,
+            correlation_id=request.state.correlation_id,
+        )
 
-@app.post("/cards", response_model=CardResponse)
-def create_card(card: CardCreate, request: Request):
-    """Создать новую карточку"""
+    after = None
+    if cursor is not None:
+        after = _decode_cursor(cursor, column)
+        if after is None:
+            raise ApiError(
+                code="validation_error",
+                message="Invalid cursor",
+                status_code=422,
+                correlation_id=request.state.correlation_id,
+            )
+
+    selected = CARD_FIELDS
+    if fields is not None:
+        selected = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in selected if name not in CARD_FIELDS]
+        if unknown or not selected:
+            raise ApiError(
+                code="validation_error",
+                message=f"Unknown fields: {', '.join(unknown) or fields}",
+                status_code=422,
+                correlation_id=request.state.correlation_id,
+            )
+
+    # версия читается до данных: ETag может только отстать от ответа, но не опередить
+    version = await _STORE.version()
+    validators = _validators(_board_etag(version), version.modified_at)
+    if _is_not_modified(request, validators["ETag"], version.modified_at):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+    if since is not None:
+        return await _card_delta(
+            request, version, since, epoch, limit, selected, validators
+        )
+
+    column_key = column.value if column else None
+    key = ("list", column_key, after, limit, tuple(selected))
+    generation = _CACHE.generation
+    cached = _CACHE.get(key)
+    hit = cached is not None
+    if not hit:
+        cards, next_after = await _STORE.page(column=column, after=after, limit=limit)
+        meta = {}
+        if next_after is not None:
+            meta["X-Next-Cursor"] = _encode_cursor(column, next_after)
+        # уже сериализованные данные не проходят повторную валидацию response_model
+        body = _json_bytes([_serialize_card(card, selected) for card in cards])
+        cached = CachedBody(body, meta)
+        _CACHE.put(key, cached, [("list", column_key)], generation)
+
+    headers = {
+        **validators,
+        "X-Board-Version": str(version.number),
+        "X-Board-Epoch": str(version.epoch),
+    }
+    next_cursor = cached.meta.get("X-Next-Cursor")
+    if next_cursor is not None:
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    return _cached_response(cached, hit, headers)
+
+
+async def _card_delta(
+    request: Request,
+    version: BoardVersion,
+    since: int,
+    epoch: Optional[int],
+    limit: int,
+    selected: Sequence[str],
+    headers: dict,
+) -> Response:
+    if epoch is not None and epoch != version.epoch:
+        # номера версий другой доски (до перезапуска) с нашими не сравнимы
+        delta = Delta(version.number, [], [], True)
+    else:
+        delta = await _STORE.changes_since(since, limit)
+    cards = delta.cards
+    headers = {
+        **headers,
+        "X-Board-Version": str(delta.version),
+        "X-Board-Epoch": str(version.epoch),
+    }
+    if delta.snapshot:
+        # дельту не собрать или она больше limit: доска перечитывается по
+        # страницам, а потом синхронизация продолжается с since=version.
+        # Версия прочитана раньше страниц - изменения между ними придут
+        # повторно, и это безопасно
+        cards, next_after = await _STORE.page(limit=limit)
+        if next_after is not None:
+            next_cursor = _encode_cursor(None, next_after)
+            next_url = request.url.remove_query_params("since").include_query_params(
+                cursor=next_cursor
+            )
+            headers["X-Next-Cursor"] = next_cursor
+            headers["Link"] = f'<{next_url}>; rel="next"'
+    return ORJSONResponse(
+        {
+            "version": delta.version,
+            "epoch": version.epoch,
+            "snapshot": delta.snapshot,
+            "cards": [_serialize_card(card, selected) for card in cards],
+            "deleted": delta.deleted,
+        },
+        headers=headers,
+    )
+
+
+@app.get("/cards/export")
+async def export_cards(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|json)$"),
+):
+    """Выгрузить все карточки потоком (NDJSON или JSON-массив)"""
+    return StreamingResponse(
+        _export_chunks(_STORE, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+    )
+
+
+@app.get("/cards/search", response_model=List[CardResponse])
+async def search_cards(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+):
+    """Поиск карточек по словам из title и description (последнее - префикс)"""
+    return ORJSONResponse(await _STORE.search(q, limit))
+
+
+@app.get("/cards/feed")
+async def card_feed(
+    request: Request, since: Optional[str] = Query(None, max_length=64)
+):
+    """Поток изменений карточек (Server-Sent Events)"""
+    if not FEED_ENABLED:
+        raise ApiError(
+            code="feed_unavailable",
+            message="Change feed is disabled with more than one worker",
+            status_code=503,
+            correlation_id=request.state.correlation_id,
+        )
+    if since is None:
+        since = request.headers.get("last-event-id") or None
+    return StreamingResponse(
+        _sse_stream(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/cards/feed/ws")
+async def card_feed_ws(
+    websocket: WebSocket, since: Optional[str] = Query(None, max_length=64)
+):
+    """Поток изменений карточек через WebSocket"""
+    if not FEED_ENABLED:
+        # отказ до accept: клиент получает 403 на рукопожатие
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    subscription = _FEED.subscribe(since)
+
+    async def send_events() -> None:
+        while True:
+            event = await subscription.get()
+            await websocket.send_text(event.data.decode())
+            if event.type == "overflow":
+                return
+
+    async def wait_disconnect() -> None:
+        # сообщения клиента не нужны, ждём только закрытия
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    sender = asyncio.create_task(send_events())
+    receiver = asyncio.create_task(wait_disconnect())
+    try:
+        await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        subscription.close()
+
+    # лента отключила медленного подписчика (overflow) - закрываем соединение;
+    # ошибка отправки означает, что клиент уже ушёл
+    if sender.done() and not sender.cancelled() and sender.exception() is None:
+        await websocket.close()
+
+
+def _new_card_fields(card: CardCreate, request: Request) -> dict:
     if not card.title.strip() or len(card.title) > 100:
         raise ApiError(
             code="validation_error",
@@ -255,26 +703,76 @@ def create_card(card: CardCreate, request: Request):
             correlation_id=request.state.correlation_id,
         )
 
-    new_card = {
-        "id": len(_DB["cards"]) + 1,
+    return {
         "title": card.title,
         "description": card.description.strip() if card.description else None,
         "column": card.column,
-        "order_idx": _get_max_order_idx(card.column) + 1,
-        "created_at": datetime.now(),
-        "updated_at": datetime.now(),
     }
 
-    _DB["cards"].append(new_card)
-    return new_card
+
+def _card_changes(card_update: CardUpdate, request: Request) -> dict:
+    changes = {}
+    if card_update.title is not None:
+        if not card_update.title.strip() or len(card_update.title) > 100:
+            raise ApiError(
+                code="validation_error",
+                message="Title must be 1-100 characters",
+                status_code=422,
+                correlation_id=request.state.correlation_id,
+            )
+        changes["title"] = card_update.title.strip()
+
+    if card_update.description is not None:
+        changes["description"] = (
+            card_update.description.strip() if card_update.description else None
+        )
+
+    if card_update.column is not None:
+        changes["column"] = card_update.column
+
+    if card_update.order_idx is not None:
+        changes["order_idx"] = card_update.order_idx
+
+    return changes
+
+
+@app.post("/cards", response_model=CardResponse)
+async def create_card(card: CardCreate, request: Request):
+    """Создать новую карточку"""
+    fields = _new_card_fields(card, request)
+    with _CACHE.writing():
+        created = await _STORE.create(**fields)
+        # новая карточка встаёт в конец колонки и никого не сдвигает
+        _invalidate_cards([created], shifted=False)
+    # response_model остаётся для схемы OpenAPI, ответ уходит без повторной валидации
+    return ORJSONResponse(created)
 
 
 @app.get("/cards/{card_id}", response_model=CardResponse)
-def get_card(card_id: int, request: Request):
+async def get_card(card_id: int, request: Request):
     """Получить карточку по ID"""
-    for it in _DB["cards"]:
-        if it["id"] == card_id:
-            return it
+    # Last-Modified - время изменения доски: позиция карточки меняется
+    # и без изменения её updated_at
+    version = await _STORE.version()
+    generation = _CACHE.generation
+    cached = _CACHE.get(("card", card_id))
+    hit = cached is not None
+    if not hit:
+        card = await _STORE.get(card_id)
+        if card is not None:
+            cached = CachedBody(
+                _json_bytes(_serialize_card(card)), {"ETag": _card_etag(card)}
+            )
+            tags = [("cards", card["column"])]
+            _CACHE.put(("card", card_id), cached, tags, generation)
+
+    if cached is not None:
+        validators = _validators(cached.meta["ETag"], version.modified_at)
+        if _is_not_modified(request, validators["ETag"], version.modified_at):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=validators
+            )
+        return _cached_response(cached, hit, validators)
 
     raise ApiError(
         code="not_found",
@@ -285,10 +783,20 @@ def get_card(card_id: int, request: Request):
 
 
 @app.patch("/cards/{card_id}", response_model=CardResponse)
-def update_card(card_id: int, card_update: CardUpdate, request: Request):
+async def update_card(card_id: int, card_update: CardUpdate, request: Request):
     """Обновить карточку по ID"""
-    card = _get_card_by_id(card_id)
-    if not card:
+    card = None
+    old = await _STORE.get(card_id)
+    if old is not None:
+        changes = _card_changes(card_update, request)
+        with _CACHE.writing():
+            # карточку могли удалить, пока ждали хранилище
+            card = await _STORE.update(card_id, changes)
+            if card is not None:
+                moved = "column" in changes or "order_idx" in changes
+                _invalidate_cards([old, card], shifted=moved)
+
+    if card is None:
         raise ApiError(
             code="not_found",
             message="Card not found",
@@ -296,50 +804,159 @@ def update_card(card_id: int, card_update: CardUpdate, request: Request):
             correlation_id=request.state.correlation_id,
         )
 
-    if card_update.title is not None:
-        if not card_update.title.strip() or len(card_update.title) > 100:
-            raise ApiError(
-                code="validation_error",
-                message="Title must be 1-100 characters",
-                status_code=422,
-                correlation_id=request.state.correlation_id,
-            )
-        card["title"] = card_update.title.strip()
+    return ORJSONResponse(card)
 
-    if card_update.description is not None:
-        card["description"] = (
-            card_update.description.strip() if card_update.description else None
-        )
 
-    if card_update.column is not None and card_update.column != card["column"]:
+@app.delete("/cards/{card_id}")
+async def delete_card(card_id: int, request: Request):
+    """Удалить карточку по ID"""
+    with _CACHE.writing():
+        deleted = await _STORE.delete(card_id)
+        if deleted is not None:
+            _invalidate_cards([deleted])
+    if deleted is not None:
+        return {"message": "Card deleted successfully"}
+
+    raise ApiError(
+        code="not_found",
+        message="Card not found",
+        status_code=404,
+        correlation_id=request.state.correlation_id,
+    )
 
-        old_column = card["column"]
-        old_order_idx = card["order_idx"]
 
-        card["column"] = card_update.column
-        card["order_idx"] = _get_max_order_idx(card_update.column) + 1
+def _batch_item_error(index: int, status_code: int, code: str, detail: str) -> dict:
+    return {
+        "index": index,
+        "status": status_code,
+        "title": ERROR_MAP.get(code, "An error occurred"),
+        "detail": detail,
+    }
 
-        _reorder_cards(old_column, old_order_idx, _get_max_order_idx(old_column) + 1)
 
-    card["updated_at"] = datetime.now()
+def _raise_batch_errors(errors: List[dict], total: int, request: Request) -> None:
+    # пакет применяется целиком или не применяется вовсе
+    if not errors:
+        return
+    invalid = any(error["status"] == 422 for error in errors)
+    raise ApiError(
+        code="validation_error" if invalid else "not_found",
+        message=f"{len(errors)} of {total} batch items failed; no changes applied",
+        status_code=422 if invalid else 404,
+        correlation_id=request.state.correlation_id,
+        errors=errors,
+    )
+
+
+async def _batch_target(
+    index: int, card_id: int, seen: set, errors: List[dict]
+) -> Optional[dict]:
+    if card_id in seen:
+        errors.append(
+            _batch_item_error(index, 422, "validation_error", "Duplicate card id")
+        )
+        return None
+    seen.add(card_id)
+    card = await _STORE.get(card_id)
+    if card is None:
+        errors.append(_batch_item_error(index, 404, "not_found", "Card not found"))
     return card
 
 
-@app.delete("/cards/{card_id}")
-def delete_card(card_id: int, request: Request):
-    """Удалить карточку по ID"""
-    for i, card in enumerate(_DB["cards"]):
-        if card["id"] == card_id:
-            deleted_card = _DB["cards"].pop(i)
-            column = deleted_card["column"]
-            deleted_order_idx = deleted_card["order_idx"]
-            _reorder_cards(column, deleted_order_idx, _get_max_order_idx(column) + 1)
+@app.post("/cards:batch")
+async def create_cards_batch(batch: CardBatchRequest, request: Request):
+    """Создать карточки пачкой"""
+    items, errors = [], []
+    for index, item in enumerate(batch.items):
+        try:
+            items.append(_new_card_fields(CardCreate.model_validate(item), request))
+        except ValidationError as exc:
+            detail = _format_validation_errors(exc.errors())
+            errors.append(_batch_item_error(index, 422, "validation_error", detail))
+        except ProblemDetails as exc:
+            errors.append(_batch_item_error(index, exc.status, exc.title, exc.detail))
+    _raise_batch_errors(errors, len(batch.items), request)
+
+    with _CACHE.writing():
+        cards = await _STORE.create_many(items)
+        _invalidate_cards(cards, shifted=False)
+    return ORJSONResponse(
+        {
+            "results": [
+                {"index": index, "status": 200, "card": card}
+                for index, card in enumerate(cards)
+            ]
+        }
+    )
 
-            return {"message": "Card deleted successfully"}
 
-    raise ApiError(
-        code="not_found",
-        message="Card not found",
-        status_code=404,
-        correlation_id=request.state.correlation_id,
+@app.patch("/cards:batch")
+async def update_cards_batch(batch: CardBatchRequest, request: Request):
+    """Обновить карточки пачкой"""
+    updates, targets, errors, seen = [], [], [], set()
+    for index, item in enumerate(batch.items):
+        try:
+            card_update = CardBatchUpdateItem.model_validate(item)
+            changes = _card_changes(card_update, request)
+        except ValidationError as exc:
+            detail = _format_validation_errors(exc.errors())
+            errors.append(_batch_item_error(index, 422, "validation_error", detail))
+            continue
+        except ProblemDetails as exc:
+            errors.append(_batch_item_error(index, exc.status, exc.title, exc.detail))
+            continue
+        target = await _batch_target(index, card_update.id, seen, errors)
+        if target is not None:
+            updates.append((card_update.id, changes))
+            targets.append(target)
+    _raise_batch_errors(errors, len(batch.items), request)
+
+    try:
+        with _CACHE.writing():
+            cards = await _STORE.update_many(updates)
+            _invalidate_cards(targets + cards)
+    except CardNotFoundError as exc:
+        index = [card_id for card_id, _ in updates].index(exc.card_id)
+        _raise_batch_errors(
+            [_batch_item_error(index, 404, "not_found", "Card not found")],
+            len(batch.items),
+            request,
+        )
+    return ORJSONResponse(
+        {
+            "results": [
+                {"index": index, "status": 200, "card": card}
+                for index, card in enumerate(cards)
+            ]
+        }
     )
+
+
+@app.delete("/cards:batch")
+async def delete_cards_batch(batch: CardBatchDelete, request: Request):
+    """Удалить карточки пачкой"""
+    errors, seen = [], set()
+    for index, card_id in enumerate(batch.ids):
+        await _batch_target(index, card_id, seen, errors)
+    _raise_batch_errors(errors, len(batch.ids), request)
+
+    try:
+        with _CACHE.writing():
+            deleted = await _STORE.delete_many(batch.ids)
+            _invalidate_cards(deleted)
+    except CardNotFoundError as exc:
+        _raise_batch_errors(
+            [
+                _batch_item_error(
+                    batch.ids.index(exc.card_id), 404, "not_found", "Card not found"
+                )
+            ],
+            len(batch.ids),
+            request,
+        )
+    return {
+        "results": [
+            {"index": index, "status": 200, "id": card_id}
+            for index, card_id in enumerate(batch.ids)
+        ]
+    }
@@ -0,0 +1,338 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# формат выдачи Prometheus (text exposition 0.0.4)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# границы по умолчанию для задержек в секундах: от 0.5 мс до 10 с
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name: str, names: Sequence[str], values: Labels, value: float) -> str:
+    if not names:
+        return f"{name} {_format_value(value)}"
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return f"{name}{{{pairs}}} {_format_value(value)}"
+
+
+class Metric(ABC):
+    """Семейство метрик с фиксированным набором меток"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def expose(self) -> Iterator[str]:
+        """Строки текстового формата Prometheus"""
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in sorted(self.samples().items()):
+            yield _sample(self.name, self.labelnames, labels, value)
+
+    @abstractmethod
+    def samples(self) -> Dict[Labels, float]:
+        """Значения по меткам на момент вызова"""
+
+
+class _Sharded(Metric):
+    """Метрика, которую пишут из нескольких потоков без блокировок.
+
+    Каждый поток пишет только в свой словарь (shard), а чтение складывает
+    копии всех словарей. Блокировка берётся один раз на поток - при
+    регистрации его словаря. Копия словаря в CPython атомарна под GIL,
+    поэтому чтение не мешает записи.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._shards.append(values)
+            return values
+
+    def _snapshots(self) -> List[dict]:
+        with self._lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+
+class Counter(_Sharded):
+    """Монотонно растущий счётчик"""
+
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def samples(self) -> Dict[Labels, float]:
+        total: Dict[Labels, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                total[labels] = total.get(labels, 0) + value
+        return total
+
+
+class Histogram(_Sharded):
+    """Распределение значений по корзинам (buckets).
+
+    Поток хранит на набор меток список: счётчики корзин (последняя - +Inf,
+    не накопительные) и сумму. Накопительные значения и _count считаются
+    при выдаче, так что _count всегда равен корзине +Inf.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            counts = shard[labels] = [0] * (len(self.buckets) + 2)
+        # граница le включительная: value == bucket попадает в эту корзину
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def totals(self) -> Dict[Labels, List[float]]:
+        """Сложенные по потокам корзины и сумма для каждого набора меток"""
+        total: Dict[Labels, List[float]] = {}
+        for shard in self._snapshots():
+            for labels, counts in shard.items():
+                counts = list(counts)
+                merged = total.get(labels)
+                if merged is None:
+                    total[labels] = counts
+                else:
+                    total[labels] = [a + b for a, b in zip(merged, counts)]
+        return total
+
+    def samples(self) -> Dict[Labels, float]:
+        # число наблюдений; корзины и сумму отдаёт totals
+        return {labels: sum(counts[:-1]) for labels, counts in self.totals().items()}
+
+    def expose(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labelnames + ("le",)
+        for labels, counts in sorted(self.totals().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _format_value(bound)
+                yield _sample(f"{self.name}_bucket", names, labels + (le,), cumulative)
+            yield _sample(f"{self.name}_sum", self.labelnames, labels, counts[-1])
+            yield _sample(f"{self.name}_count", self.labelnames, labels, cumulative)
+
+
+class Gauge(Metric):
+    """Текущее значение. Используется только из event loop, поэтому без блокировок"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self._values[labels] = value
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def samples(self) -> Dict[Labels, float]:
+        return dict(self._values)
+
+
+class CallbackMetric(Metric):
+    """Метрика, значения которой читаются из объекта в момент выдачи.
+
+    Подходит для уже существующих счётчиков (статистика кэша, лимитера):
+    на горячем пути не добавляется ничего.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        read: Callable[[], Dict[Labels, float]],
+        labelnames: Sequence[str] = (),
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self._read = read
+
+    def samples(self) -> Dict[Labels, float]:
+        return self._read()
+
+
+class Registry:
+    """Набор метрик процесса, выдаваемый на /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name: str) -> None:
+        self._metrics.pop(name, None)
+
+    def expose(self) -> bytes:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.expose())
+        return ("\n".join(lines) + "\n").encode()
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, tuple(labelnames)))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Iterable[str] = (),
+    buckets: Sequence[float] = LATENCY_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, tuple(labelnames), buckets))
+
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, tuple(labelnames)))
+
+
+def callback(
+    name: str,
+    documentation: str,
+    kind: str,
+    read: Callable[[], Union[float, Dict[Labels, float]]],
+    labelnames: Labels = (),
+) -> CallbackMetric:
+    """Метрика, значение которой - read() в момент выдачи.
+
+    С labelnames read() возвращает словарь {значения меток: значение}.
+    """
+    if labelnames:
+        return REGISTRY.register(
+            CallbackMetric(name, documentation, kind, read, labelnames)
+        )
+    return REGISTRY.register(
+        CallbackMetric(name, documentation, kind, lambda: {(): read()})
+    )
+
+
+HTTP_REQUESTS = counter(
+    "http_requests_total",
+    "HTTP requests by route and status",
+    ("method", "route", "status"),
+)
+HTTP_LATENCY = histogram(
+    "http_request_duration_seconds",
+    "Time until the response is fully sent",
+    ("method", "route"),
+)
+HTTP_IN_FLIGHT = gauge("http_requests_in_flight", "HTTP requests being processed")
+
+# путь без совпавшего маршрута (404, отказ лимитера) не попадает в метку как есть:
+# иначе число рядов метрики растёт с каждым новым URL
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """Задержка, число и текущее количество HTTP-запросов (чистый ASGI).
+
+    Метка route - шаблон пути маршрута FastAPI (/cards/{card_id}), который
+    роутер кладёт в scope["route"]. Задержка считается до последнего куска
+    тела ответа, для потоковых ответов - до конца потока.
+    """
+
+    def __init__(self, app: ASGIApp, skip: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.skip = frozenset(skip)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            path = route.path if route is not None else UNMATCHED_ROUTE
+            method = scope["method"]
+            HTTP_LATENCY.observe(time.perf_counter() - start, (method, path))
+            HTTP_REQUESTS.inc((method, path, str(status)))
@@ -3,11 +3,12 @@ import re
 from datetime import datetime, timezone
 from decimal import Decimal
 from enum import Enum
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 ALLOWED_TEXT_REGEX = re.compile(r"^[^\x00-\x1F\x7F]*$")
+MAX_BATCH_SIZE = 1000
 
 
 def validate_text_chars(value: str, field_name: str):
@@ -59,10 +60,28 @@ class CardUpdate(StripAndValidateMixin, BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=100)
     description: Optional[str] = Field(None, max_length=1000)
     column: Optional[ColumnType] = None
+    order_idx: Optional[int] = Field(None, ge=1)
 
     model_config = ConfigDict(use_enum_values=True, extra="forbid")
 
 
+class CardBatchUpdateItem(CardUpdate):
+    id: int
+
+
+class CardBatchRequest(BaseModel):
+    # элементы валидируются по одному, чтобы вернуть ошибки по каждому
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class CardBatchDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+    model_config = ConfigDict(extra="forbid")
+
+
 class CardResponse(CardBase):
     id: int
     order_idx: int
@@ -0,0 +1,236 @@
+import asyncio
+import math
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Optional, Sequence
+
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .config import Settings
+from .store.sqlite import ConnectionPool, sqlite_path
+
+# запросов подряд по умолчанию: небольшой всплеск поверх равномерного потока
+DEFAULT_BURST = 10
+
+
+class RateLimitBackend(ABC):
+    """Хранилище состояния GCRA: ключ -> теоретическое время прихода (TAT).
+
+    hit(key, interval, tolerance) пропускает запрос и сдвигает TAT на
+    interval, если TAT - tolerance уже наступило, и возвращает 0.0; иначе
+    возвращает, через сколько секунд запрос был бы пропущен.
+    """
+
+    # True, если hit ждёт ввода-вывода и его нельзя вызывать в event loop
+    blocking = False
+
+    @abstractmethod
+    def hit(self, key: str, interval: float, tolerance: float) -> float:
+        """Учесть запрос по ключу"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Забыть все ключи"""
+
+    def close(self) -> None:
+        """Освободить ресурсы"""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """GCRA в памяти процесса: одно число на ключ, O(1) на запрос.
+
+    Таблица ограничена max_keys: ключи упорядочены по последнему запросу,
+    и при переполнении вытесняется самый давний. Простаивающий дольше
+    tolerance ключ и так вернулся бы к полной квоте, поэтому вытеснение
+    почти всегда ничего не меняет. Используется только из event loop,
+    поэтому без блокировок.
+    """
+
+    def __init__(
+        self, max_keys: int = 100_000, clock: Optional[Callable[[], float]] = None
+    ):
+        self.max_keys = max_keys
+        self.evictions = 0
+        self._clock = clock or time.monotonic
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def hit(self, key: str, interval: float, tolerance: float) -> float:
+        now = self._clock()
+        tat = self._tat.get(key)
+        if tat is None:
+            if len(self._tat) >= self.max_keys:
+                self._tat.popitem(last=False)
+                self.evictions += 1
+            tat = now
+        elif tat < now:
+            tat = now
+        if tat - tolerance > now:
+            self._tat.move_to_end(key)
+            return tat - tolerance - now
+        self._tat[key] = tat + interval
+        self._tat.move_to_end(key)
+        return 0.0
+
+    def clear(self) -> None:
+        self._tat.clear()
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """GCRA в общей базе SQLite - один лимит на все процессы uvicorn.
+
+    Проверка и сдвиг TAT - один атомарный upsert; время - настенные часы,
+    общие для процессов. База своя, не база карточек: каждый запрос к
+    /cards - запись, и она не должна ждать блокировку записи карточек.
+    Ключи, чей TAT прошёл, удаляются раз в cleanup_interval секунд -
+    одним процессом, сколько бы их ни было.
+    """
+
+    blocking = True
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        key TEXT PRIMARY KEY,
+        tat REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS rate_limit_cleanup (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        at REAL NOT NULL
+    );
+    INSERT OR IGNORE INTO rate_limit_cleanup (id, at) VALUES (1, 0);
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        pool_size: int = 2,
+        cleanup_interval: float = 60.0,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        self.cleanup_interval = cleanup_interval
+        self._clock = clock or time.time
+        self._pool = ConnectionPool(sqlite_path(database_url), size=pool_size)
+        with self._pool.connection() as conn:
+            conn.executescript(self.SCHEMA)
+        # раньше этого времени процесс не заглядывает в rate_limit_cleanup
+        self._next_cleanup = self._clock() + cleanup_interval
+
+    def hit(self, key: str, interval: float, tolerance: float) -> float:
+        now = self._clock()
+        with self._pool.connection() as conn:
+            # обновление проходит, только если запрос укладывается в лимит
+            row = conn.execute(
+                "INSERT INTO rate_limits (key, tat) VALUES (?1, ?2 + ?3)"
+                " ON CONFLICT (key) DO UPDATE SET tat = max(tat, ?2) + ?3"
+                " WHERE max(tat, ?2) - ?4 <= ?2 RETURNING tat",
+                (key, now, interval, tolerance),
+            ).fetchone()
+            if row is not None:
+                if now >= self._next_cleanup:
+                    self._cleanup(conn, now)
+                return 0.0
+            (tat,) = conn.execute(
+                "SELECT tat FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+        return max(tat - tolerance - now, 0.0)
+
+    def _cleanup(self, conn: sqlite3.Connection, now: float) -> None:
+        self._next_cleanup = now + self.cleanup_interval
+        # очистку за интервал забирает тот процесс, чей UPDATE прошёл первым
+        claimed = conn.execute(
+            "UPDATE rate_limit_cleanup SET at = ?1 WHERE at <= ?1 - ?2 RETURNING at",
+            (now, self.cleanup_interval),
+        ).fetchone()
+        if claimed is not None:
+            conn.execute("DELETE FROM rate_limits WHERE tat < ?", (now,))
+
+    def clear(self) -> None:
+        with self._pool.connection() as conn:
+            conn.execute("DELETE FROM rate_limits")
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+class RateLimiter:
+    """Лимит per_minute запросов в минуту на ключ (GCRA).
+
+    До burst запросов можно сделать подряд, дальше они допускаются с
+    интервалом 60 / (per_minute - burst + 1) секунд. Интервал выбран так,
+    чтобы всплеск плюс устойчивый поток в любом окне 60 секунд вместе
+    давали не больше per_minute запросов: ограничено окно, а не только
+    средняя скорость.
+    """
+
+    def __init__(
+        self,
+        per_minute: int,
+        burst: int = DEFAULT_BURST,
+        backend: Optional[RateLimitBackend] = None,
+    ):
+        self.per_minute = per_minute
+        self.burst = max(1, min(burst, per_minute))
+        self.interval = 60.0 / (per_minute - self.burst + 1)
+        self.tolerance = self.interval * (self.burst - 1)
+        # не `or`: пустой бэкенд в памяти ложен из-за __len__
+        self.backend = MemoryRateLimitBackend() if backend is None else backend
+
+    async def hit(self, key: str) -> float:
+        """0.0, если запрос пропущен, иначе секунды до следующей попытки"""
+        if not self.backend.blocking:
+            return self.backend.hit(key, self.interval, self.tolerance)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self.backend.hit, key, self.interval, self.tolerance
+        )
+
+
+def create_rate_limiter(settings: Settings) -> Optional[RateLimiter]:
+    """Лимитер по настройкам RATE_LIMIT_* или None, если лимит выключен"""
+    if settings.rate_limit_per_minute <= 0:
+        return None
+    if settings.rate_limit_backend == "sqlite":
+        backend = SQLiteRateLimitBackend(settings.rate_limit_url)
+    else:
+        backend = MemoryRateLimitBackend(settings.rate_limit_max_keys)
+    return RateLimiter(
+        settings.rate_limit_per_minute, settings.rate_limit_burst, backend
+    )
+
+
+class RateLimitMiddleware:
+    """Ограничение частоты запросов по IP клиента (чистый ASGI).
+
+    Проверяются только пути с префиксами из paths. Отклонённый запрос не
+    доходит до приложения: ответ строит reject(scope, retry_after).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: RateLimiter,
+        reject: Callable[[Scope, int], Response],
+        paths: Sequence[str] = ("/cards",),
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.reject = reject
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+        client = scope.get("client")
+        wait = await self.limiter.hit(client[0] if client else "")
+        if wait:
+            # Retry-After - целые секунды, округление вверх
+            response = self.reject(scope, max(math.ceil(wait), 1))
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
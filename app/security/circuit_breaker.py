@@ -0,0 +1,184 @@
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional
+
+from ..metrics import counter
+
+# ADR-003: отказ upstream не должен множить нагрузку на него и на нас
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+TRANSITIONS = counter(
+    "http_client_circuit_transitions_total",
+    "Circuit breaker state changes of outgoing HTTP upstreams",
+    ("state",),
+)
+
+
+class CircuitBreaker:
+    """Предохранитель одного upstream: closed -> open -> half_open -> closed.
+
+    closed - вызовы идут, исходы копятся в скользящем окне window секунд
+    (секундными корзинами). Когда в окне не меньше min_calls вызовов и доля
+    неудачных достигла failure_rate, цепь размыкается.
+    open - вызовы отклоняются сразу, пока не пройдёт open_seconds.
+    half_open - пропускается не больше probes пробных вызовов: все удачные
+    замыкают цепь с пустым окном, любой неудачный снова размыкает её.
+
+    Используется только из event loop, поэтому без блокировок.
+    """
+
+    def __init__(
+        self,
+        name: str = "",
+        failure_rate: float = 0.5,
+        min_calls: int = 20,
+        window: float = 10.0,
+        open_seconds: float = 30.0,
+        probes: int = 1,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self._clock = clock or time.monotonic
+
+        self.state = CLOSED
+        # [секунда, вызовы, неудачи] по возрастанию секунд
+        self._buckets: Deque[List[int]] = deque()
+        self._calls = 0
+        self._failures = 0
+        self._opened_at = 0.0
+        # пробные вызовы в полёте и удачные из них
+        self._probing = 0
+        self._probe_successes = 0
+
+    def admit(self) -> Optional[str]:
+        """Состояние, в котором вызов допущен, или None - вызов отклонён"""
+        if self.state == OPEN:
+            if self._clock() - self._opened_at < self.open_seconds:
+                return None
+            self._set(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probing + self._probe_successes >= self.probes:
+                return None
+            self._probing += 1
+        return self.state
+
+    def record(self, admitted: str, ok: Optional[bool]) -> None:
+        """Исход допущенного вызова; ok=None - вызов прерван, исход неизвестен"""
+        if admitted != self.state:
+            # вызов допущен до смены состояния - его исход уже ничего не решает
+            return
+        if self.state == HALF_OPEN:
+            self._probing -= 1
+            if ok is None:
+                return
+            if not ok:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.probes:
+                self._set(CLOSED)
+            return
+        if ok is None:
+            return
+
+        now = self._clock()
+        second = int(now)
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        bucket = self._buckets[-1]
+        bucket[1] += 1
+        self._calls += 1
+        if not ok:
+            bucket[2] += 1
+            self._failures += 1
+        while self._buckets[0][0] <= now - self.window:
+            _, calls, failures = self._buckets.popleft()
+            self._calls -= calls
+            self._failures -= failures
+
+        if (
+            self._calls >= self.min_calls
+            and self._failures >= self.failure_rate * self._calls
+        ):
+            logger.warning(
+                "Circuit opened for %s: %d of %d calls failed in %.0fs",
+                self.name,
+                self._failures,
+                self._calls,
+                self.window,
+            )
+            self._open()
+
+    def _open(self) -> None:
+        self._opened_at = self._clock()
+        self._set(OPEN)
+
+    def _set(self, state: str) -> None:
+        self.state = state
+        self._probing = 0
+        self._probe_successes = 0
+        if state == CLOSED:
+            self._buckets.clear()
+            self._calls = 0
+            self._failures = 0
+        TRANSITIONS.inc((state,))
+        logger.info("Circuit %s for %s", state, self.name)
+
+
+class RetryBudget:
+    """Бюджет ретраев: повторов не больше ratio от запросов плюс min_per_second.
+
+    Каждый запрос кладёт в корзину ratio токена, каждый повтор забирает
+    целый. Корзина ещё и пополняется на min_per_second токенов в секунду,
+    чтобы при редких запросах ретраи оставались возможны, и ограничена
+    max_tokens. Когда upstream лежит, повторы быстро съедают бюджет, и
+    нагрузка на него растёт не больше чем в 1 + ratio раза, а не в
+    max_retries раз.
+
+    Используется только из event loop, поэтому без блокировок.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.1,
+        min_per_second: float = 1.0,
+        max_tokens: float = 10.0,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._clock = clock or time.monotonic
+        self.tokens = max_tokens
+        self._updated = self._clock()
+
+    def deposit(self) -> None:
+        """Учесть новый запрос"""
+        self._refill()
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Взять токен на повтор; False - бюджет исчерпан, повторять нельзя"""
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(
+            self.max_tokens, self.tokens + (now - self._updated) * self.min_per_second
+        )
+        self._updated = now
@@ -0,0 +1,451 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from ..metrics import counter
+
+# ADR-003: кэш ответов upstream по RFC 9111 (подмножество)
+
+# result: hit - свежая копия, revalidated - 304 на условный запрос,
+# miss - ответа не было или он изменился, bypass - запрос мимо кэша
+LOOKUPS = counter(
+    "http_client_cache_total", "Outgoing GET requests by cache result", ("result",)
+)
+
+# статусы, которые можно хранить без явного срока свежести (RFC 9110, 15.1)
+HEURISTIC_STATUSES = frozenset({200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501})
+# эвристический срок: доля от возраста Last-Modified, но не больше суток
+HEURISTIC_FRACTION = 0.1
+MAX_HEURISTIC_LIFETIME = 24 * 3600
+# методы, успешный ответ на которые сбрасывает сохранённый ответ по URL
+UNSAFE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+# заголовки 304, которые не заменяют сохранённые (RFC 9111, 3.2)
+KEEP_ON_REVALIDATION = frozenset(
+    {"content-length", "content-encoding", "transfer-encoding"}
+)
+# примерные накладные расходы на запись сверх тела: заголовки, ключ, узлы словарей
+ENTRY_OVERHEAD = 512
+
+
+def _directives(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Разобрать Cache-Control: имя директивы -> значение или None"""
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+def _seconds(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(int(value), 0) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class CachedResponse(NamedTuple):
+    """Сохранённый ответ и то, что нужно для расчёта его свежести"""
+
+    url: str
+    status_code: int
+    headers: List[Tuple[str, str]]
+    content: bytes
+    # значения заголовков запроса, перечисленных в Vary
+    vary: Dict[str, Optional[str]]
+    # время получения ответа (часы процесса, как у Date upstream)
+    response_time: float
+
+    @property
+    def size(self) -> int:
+        return len(self.content) + ENTRY_OVERHEAD
+
+    def header(self, name: str) -> Optional[str]:
+        return httpx.Headers(self.headers).get(name)
+
+    def freshness_lifetime(self) -> float:
+        """Срок свежести в секундах (RFC 9111, 4.2.1), кэш считается общим"""
+        directives = _directives(self.header("cache-control"))
+        for name in ("s-maxage", "max-age"):
+            lifetime = _seconds(directives.get(name))
+            if lifetime is not None:
+                return lifetime
+        date = _http_date(self.header("date")) or self.response_time
+        expires = self.header("expires")
+        if expires is not None:
+            # неразбираемый Expires - уже устаревший ответ
+            return max((_http_date(expires) or 0) - date, 0)
+        last_modified = _http_date(self.header("last-modified"))
+        if last_modified is not None and self.status_code in HEURISTIC_STATUSES:
+            return min(
+                (date - last_modified) * HEURISTIC_FRACTION, MAX_HEURISTIC_LIFETIME
+            )
+        return 0
+
+    def age(self, now: float) -> float:
+        return (_seconds(self.header("age")) or 0) + max(now - self.response_time, 0)
+
+    def validators(self) -> Dict[str, str]:
+        """Заголовки условного запроса для повторной проверки"""
+        headers = {}
+        etag = self.header("etag")
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        last_modified = self.header("last-modified")
+        if last_modified is not None:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def to_response(self, request: httpx.Request, now: float) -> httpx.Response:
+        headers = httpx.Headers(self.headers)
+        headers["Age"] = str(int(self.age(now)))
+        return httpx.Response(
+            self.status_code, headers=headers, content=self.content, request=request
+        )
+
+
+class CacheStore(ABC):
+    """Хранилище сохранённых ответов: ключ -> CachedResponse"""
+
+    # True, если операции ждут диска и их нельзя вызывать в event loop
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Ответ по ключу или None"""
+
+    @abstractmethod
+    def put(self, key: str, entry: CachedResponse) -> None:
+        """Сохранить ответ, вытеснив давно не читанные при нехватке места"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Забыть ответ"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Забыть все ответы"""
+
+
+class MemoryCacheStore(CacheStore):
+    """LRU в памяти процесса с бюджетом по байтам.
+
+    Используется только из event loop, поэтому без блокировок.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        if entry.size > self.max_bytes:
+            return
+        self.delete(key)
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes:
+            _, oldest = self._entries.popitem(last=False)
+            self.size -= oldest.size
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+
+class DiskCacheStore(CacheStore):
+    """Ответы в файлах каталога: строка JSON с метаданными, затем тело.
+
+    Имя файла - SHA-256 ключа. Запись атомарна (временный файл и rename),
+    поэтому каталог могут делить процессы. Бюджет max_bytes соблюдается
+    по размерам файлов; первыми вытесняются давно не читанные (mtime).
+    Вызывается из пула потоков: индекс файлов защищён блокировкой.
+    """
+
+    blocking = True
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for name in os.listdir(directory):
+            if name.endswith(".entry"):
+                stat = os.stat(os.path.join(directory, name))
+                files.append((stat.st_mtime, name, stat.st_size))
+        self._files: "OrderedDict[str, int]" = OrderedDict(
+            (name, size) for _, name, size in sorted(files)
+        )
+        self.size = sum(self._files.values())
+
+    def _name(self, key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest() + ".entry"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as file:
+                meta = json.loads(file.readline())
+                content = file.read()
+                size = file.tell()
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        if meta["key"] != key:
+            return None
+        with self._lock:
+            # файл мог записать другой процесс
+            self.size += size - self._files.pop(name, 0)
+            self._files[name] = size
+        return CachedResponse(
+            meta["url"],
+            meta["status_code"],
+            [tuple(header) for header in meta["headers"]],
+            content,
+            meta["vary"],
+            meta["response_time"],
+        )
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        meta = {
+            "key": key,
+            "url": entry.url,
+            "status_code": entry.status_code,
+            "headers": entry.headers,
+            "vary": entry.vary,
+            "response_time": entry.response_time,
+        }
+        data = json.dumps(meta).encode() + b"\n" + entry.content
+        if len(data) > self.max_bytes:
+            return
+        name = self._name(key)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp, os.path.join(self.directory, name))
+        with self._lock:
+            self.size += len(data) - self._files.pop(name, 0)
+            self._files[name] = len(data)
+            evicted = []
+            while self.size > self.max_bytes:
+                oldest, size = self._files.popitem(last=False)
+                evicted.append(oldest)
+                self.size -= size
+                self.evictions += 1
+        for oldest in evicted:
+            self._remove(oldest)
+
+    def delete(self, key: str) -> None:
+        name = self._name(key)
+        with self._lock:
+            self.size -= self._files.pop(name, 0)
+        self._remove(name)
+
+    def clear(self) -> None:
+        with self._lock:
+            names = list(self._files)
+            self._files.clear()
+            self.size = 0
+        for name in names:
+            self._remove(name)
+
+    def _remove(self, name: str) -> None:
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+
+# отправка запроса upstream с дополнительными заголовками (условный запрос)
+Send = Callable[[Dict[str, str]], Awaitable[httpx.Response]]
+
+
+class HTTPCache:
+    """Кэш ответов upstream для SecureHTTPClient (RFC 9111, подмножество).
+
+    Кэш общий для всех пользователей приложения, поэтому ведёт себя как
+    shared cache: не хранит ответы с private и no-store, ответы на запросы
+    с Authorization - только с public, s-maxage или must-revalidate;
+    s-maxage важнее max-age. Хранятся только ответы на GET, один вариант
+    на URL: если значения заголовков из Vary не совпали, это промах.
+    Устаревший ответ с ETag или Last-Modified проверяется условным
+    запросом, и 304 продлевает его. Успешный POST/PUT/PATCH/DELETE
+    сбрасывает ответ по тому же URL.
+
+    Горячие ответы - в памяти (LRU с бюджетом по байтам), при directory
+    ещё и на диске: переживают перезапуск и общие для процессов.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        directory: Optional[str] = None,
+        disk_bytes: int = 256 * 1024 * 1024,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        self.memory = MemoryCacheStore(max_bytes)
+        self.disk = DiskCacheStore(directory, disk_bytes) if directory else None
+        self._clock = clock or time.time
+
+    async def fetch(self, request: httpx.Request, send: Send) -> httpx.Response:
+        """Ответ на запрос из кэша или от upstream через send"""
+        key = str(request.url)
+        if request.method in UNSAFE_METHODS:
+            response = await send({})
+            if response.is_success:
+                await self._delete(key)
+            return response
+
+        request_directives = _directives(request.headers.get("cache-control"))
+        if request.method != "GET" or "no-store" in request_directives:
+            LOOKUPS.inc(("bypass",))
+            return await send({})
+
+        now = self._clock()
+        entry = await self._get(key)
+        if entry is not None and not self._matches(entry, request):
+            entry = None
+        if entry is not None and self._is_fresh(entry, request_directives, now):
+            LOOKUPS.inc(("hit",))
+            return entry.to_response(request, now)
+
+        validators = entry.validators() if entry is not None else {}
+        response = await send(validators)
+        now = self._clock()
+        if response.status_code == 304 and entry is not None:
+            LOOKUPS.inc(("revalidated",))
+            entry = self._refreshed(entry, response, now)
+            await self._put(key, entry)
+            return entry.to_response(request, now)
+
+        LOOKUPS.inc(("miss",))
+        if self._is_storable(request, response):
+            await self._put(key, self._entry(request, response, now))
+        elif entry is not None:
+            await self._delete(key)
+        return response
+
+    async def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            await self._on_disk(self.disk.clear)
+
+    def _is_fresh(
+        self, entry: CachedResponse, directives: Dict[str, Optional[str]], now: float
+    ) -> bool:
+        if "no-cache" in directives or "no-cache" in _directives(
+            entry.header("cache-control")
+        ):
+            return False
+        lifetime = entry.freshness_lifetime()
+        max_age = _seconds(directives.get("max-age"))
+        if max_age is not None:
+            lifetime = min(lifetime, max_age)
+        return entry.age(now) < lifetime
+
+    def _matches(self, entry: CachedResponse, request: httpx.Request) -> bool:
+        return all(
+            request.headers.get(name) == value for name, value in entry.vary.items()
+        )
+
+    def _is_storable(self, request: httpx.Request, response: httpx.Response) -> bool:
+        directives = _directives(response.headers.get("cache-control"))
+        if "no-store" in directives or "private" in directives:
+            return False
+        if response.headers.get("vary", "").strip() == "*":
+            return False
+        if "authorization" in request.headers and not (
+            {"public", "s-maxage", "must-revalidate"} & directives.keys()
+        ):
+            return False
+        if response.status_code not in HEURISTIC_STATUSES:
+            return False
+        explicit = {"max-age", "s-maxage", "public"} & directives.keys()
+        validators = {"etag", "last-modified", "expires"} & response.headers.keys()
+        return bool(explicit or validators)
+
+    def _entry(
+        self, request: httpx.Request, response: httpx.Response, now: float
+    ) -> CachedResponse:
+        vary_names = [
+            name.strip().lower()
+            for name in response.headers.get("vary", "").split(",")
+            if name.strip()
+        ]
+        return CachedResponse(
+            str(request.url),
+            response.status_code,
+            list(response.headers.multi_items()),
+            response.content,
+            {name: request.headers.get(name) for name in vary_names},
+            now,
+        )
+
+    def _refreshed(
+        self, entry: CachedResponse, response: httpx.Response, now: float
+    ) -> CachedResponse:
+        updated = {name.lower() for name in response.headers.keys()}
+        updated -= KEEP_ON_REVALIDATION
+        headers = [(n, v) for n, v in entry.headers if n.lower() not in updated]
+        headers += [(n, v) for n, v in response.headers.multi_items() if n in updated]
+        return entry._replace(headers=headers, response_time=now)
+
+    async def _get(self, key: str) -> Optional[CachedResponse]:
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            entry = await self._on_disk(self.disk.get, key)
+            if entry is not None:
+                self.memory.put(key, entry)
+        return entry
+
+    async def _put(self, key: str, entry: CachedResponse) -> None:
+        self.memory.put(key, entry)
+        if self.disk is not None:
+            await self._on_disk(self.disk.put, key, entry)
+
+    async def _delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.disk is not None:
+            await self._on_disk(self.disk.delete, key)
+
+    async def _on_disk(self, fn: Callable, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, fn, *args)
@@ -1,18 +1,117 @@
 import asyncio
+import functools
 import logging
-from typing import Any, Dict, Optional
+import tempfile
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import (
+    IO,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
 import httpx
 
+from ..config import Settings
+from ..metrics import counter
+from .circuit_breaker import CLOSED, CircuitBreaker, RetryBudget
+from .http_cache import HTTPCache
+from .masking import RedactingFilter
+
 # ADR-003
 
 logger = logging.getLogger(__name__)
+# URL в логах могут нести токены и email в параметрах запроса
+logger.addFilter(RedactingFilter())
+
+ATTEMPTS = counter(
+    "http_client_attempts_total", "Outgoing HTTP request attempts", ("method",)
+)
+# reason: rate_limited (429), network (таймаут, соединение), server_error (5xx), error
+RETRIES = counter(
+    "http_client_retries_total", "Outgoing HTTP attempts that were retried", ("reason",)
+)
+RETRIES_DENIED = counter(
+    "http_client_retries_denied_total",
+    "Outgoing HTTP retries skipped because the retry budget was empty",
+)
+SHORT_CIRCUITED = counter(
+    "http_client_short_circuited_total",
+    "Outgoing HTTP requests rejected by an open circuit breaker",
+    ("host",),
+)
+COALESCED = counter(
+    "http_client_coalesced_total",
+    "Outgoing requests that joined an identical request already in flight",
+    ("method",),
+)
+
+# идемпотентные запросы без тела: их одинаковые копии можно не отправлять
+COALESCE_METHODS = frozenset({"GET", "HEAD"})
 
 
 class ResponseTooLargeError(httpx.RequestError):
     pass
 
 
+class CircuitOpenError(httpx.RequestError):
+    """Предохранитель upstream разомкнут: запрос не отправлялся"""
+
+
+class StreamedResponse:
+    """Ответ SecureHTTPClient.stream: статус и заголовки сразу, тело - кусками"""
+
+    def __init__(
+        self,
+        response: httpx.Response,
+        iter_limited: Callable[[httpx.Response, Optional[int]], AsyncIterator[bytes]],
+    ):
+        self.response = response
+        self._iter_limited = iter_limited
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    @property
+    def headers(self) -> httpx.Headers:
+        return self.response.headers
+
+    @property
+    def request(self) -> httpx.Request:
+        return self.response.request
+
+    def aiter_bytes(self, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Куски тела; ResponseTooLargeError, как только тело превысит лимит"""
+        return self._iter_limited(self.response, chunk_size)
+
+
+class SpooledResponse(NamedTuple):
+    """Ответ SecureHTTPClient.spool: тело во временном файле"""
+
+    status_code: int
+    headers: httpx.Headers
+    body: IO[bytes]
+    size: int
+    request: httpx.Request
+
+
+class _Flight:
+    """Запрос к upstream, общий для одинаковых одновременных вызовов request"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[httpx.Response]"):
+        self.task = task
+        self.waiters = 0
+
+
 class SecureHTTPClient:
     """Безопасный HTTP-клиент с таймаутами, ретраями и лимитами"""
 
@@ -25,6 +124,16 @@ class SecureHTTPClient:
         max_retries: int = 3,
         max_response_size: int = 50 * 1024 * 1024,
         follow_redirects: bool = True,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 5,
+        keepalive_expiry: float = 5.0,
+        http2: bool = False,
+        base_url: str = "",
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        cache: Optional[HTTPCache] = None,
+        coalesce: bool = True,
+        circuit_breaker: Optional[Callable[[str], CircuitBreaker]] = CircuitBreaker,
+        retry_budget: Optional[Callable[[], RetryBudget]] = RetryBudget,
     ):
         self.timeout = httpx.Timeout(
             connect=connect_timeout,
@@ -35,17 +144,112 @@ class SecureHTTPClient:
         self.max_retries = max_retries
         self.max_response_size = max_response_size
         self.follow_redirects = follow_redirects
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # http2 требует пакета h2 (pip install "httpx[http2]"); по TLS сервер
+        # сам выбирает протокол, и по одному соединению идут многие запросы
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(limits=self.limits, http2=http2)
+        self._transport = transport
+        # кэш ответов для request; stream и spool идут мимо него
+        self.cache = cache
+        # одинаковые одновременные GET ждут один запрос к upstream; словарь
+        # трогает только event loop, поэтому без блокировок
+        self.coalesce = coalesce
+        self._flights: Dict[Tuple[Any, ...], _Flight] = {}
+        # предохранитель на каждый хост (circuit_breaker(host)) и общий бюджет
+        # ретраев; None выключает
+        self._circuit_breaker = circuit_breaker
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.retry_budget = retry_budget() if retry_budget is not None else None
+
+        # Очередь за соединениями держим сами: пул httpcore при каждом
+        # освобождении соединения перебирает все ждущие запросы, и при сотнях
+        # ожидающих это съедает процессор. В HTTP/2 одно соединение несёт
+        # много запросов, поэтому там очередь не нужна.
+        self._slots = None if http2 else asyncio.Semaphore(max_connections)
+        # попытки, ждущие соединения или ответа upstream
+        self.in_flight = 0
+        self.peak_in_flight = 0
 
         self._client = httpx.AsyncClient(
+            base_url=base_url,
             timeout=self.timeout,
             follow_redirects=self.follow_redirects,
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
+            transport=transport,
         )
 
     async def close(self) -> None:
         await self._client.aclose()
 
-    async def _stream_and_limit(self, resp: httpx.Response) -> httpx.Response:
+    def stats(self) -> Dict[str, int]:
+        """Загрузка пула: попытки в работе и соединения (открытые и простаивающие)"""
+        # у httpx нет публичного доступа к пулу транспорта
+        pool = getattr(self._transport, "_pool", None)
+        connections = pool.connections if pool is not None else []
+        return {
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "connections": len(connections),
+            "idle_connections": sum(1 for conn in connections if conn.is_idle()),
+            "max_connections": self.limits.max_connections,
+            "circuits_not_closed": sum(
+                1 for breaker in self._breakers.values() if breaker.state != CLOSED
+            ),
+        }
+
+    def _breaker(self, url: str) -> Optional[CircuitBreaker]:
+        if self._circuit_breaker is None:
+            return None
+        host = httpx.URL(url).host or self._client.base_url.host
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = self._circuit_breaker(host)
+        return breaker
+
+    def _may_retry(self) -> bool:
+        # без токенов ошибка отдаётся сразу, без паузы и повтора
+        if self.retry_budget is None or self.retry_budget.withdraw():
+            return True
+        RETRIES_DENIED.inc()
+        return False
+
+    async def _acquire_slot(self) -> None:
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return
+        # pool_timeout действует и на ожидание в нашей очереди
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout.pool)
+        except asyncio.TimeoutError:
+            raise httpx.PoolTimeout("Timed out waiting for a free connection")
+
+    @asynccontextmanager
+    async def _attempt(self, **request: Any) -> AsyncIterator[httpx.Response]:
+        # одна попытка: место в пуле занято, пока тело ответа не закрыто
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if self._slots is not None:
+                await self._acquire_slot()
+            try:
+                resp = await self._client.send(
+                    self._client.build_request(**request), stream=True
+                )
+                try:
+                    yield resp
+                finally:
+                    await resp.aclose()
+            finally:
+                if self._slots is not None:
+                    self._slots.release()
+        finally:
+            self.in_flight -= 1
+
+    def _check_content_length(self, resp: httpx.Response) -> None:
         # проверим заголовок content-length на наличие и валидность
         cl = resp.headers.get("content-length")
         if cl is not None:
@@ -58,20 +262,24 @@ class SecureHTTPClient:
                     f"Response too large per Content-Length: {size} bytes"
                 )
 
-        # читаем частями
+    async def _iter_limited(
+        self, resp: httpx.Response, chunk_size: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        # Content-Length может врать или отсутствовать - считаем сами
         total = 0
-        chunks = []
-        async for chunk in resp.aiter_bytes():
+        async for chunk in resp.aiter_bytes(chunk_size):
             total += len(chunk)
             if total > self.max_response_size:
-                # выкидываем ошибку
-                await resp.aread()
                 raise ResponseTooLargeError(
                     f"Response body exceeded limit: {total} bytes"
                 )
-            chunks.append(chunk)
+            yield chunk
 
+    async def _stream_and_limit(self, resp: httpx.Response) -> httpx.Response:
+        # тело целиком в памяти: куски и их склейка - пик вдвое больше тела
+        chunks = [chunk async for chunk in self._iter_limited(resp)]
         content = b"".join(chunks)
+        del chunks
 
         # формируем новый Response
         new_resp = httpx.Response(
@@ -83,29 +291,50 @@ class SecureHTTPClient:
         )
         return new_resp
 
-    async def request(
-        self,
-        method: str,
-        url: str,
-        headers: Optional[Dict[str, str]] = None,
-        json: Optional[Dict[str, Any]] = None,
-        data: Optional[Dict[str, Any]] = None,
-        params: Optional[Dict[str, Any]] = None,
-    ) -> httpx.Response:
+    async def _open(
+        self, method: str, url: str, buffered: bool = False, **request: Any
+    ) -> Tuple[httpx.Response, AsyncExitStack]:
+        """Получить успешный ответ с ретраями.
+
+        buffered - тело читается в память внутри попытки (его ошибки тоже
+        ретраятся), и стек уже закрыт. Иначе тело не прочитано: ответ и
+        место в пуле держит возвращаемый стек, его закрывает вызывающий.
+        """
         last_exception: Optional[Exception] = None
+        method = method.upper()
+        breaker = self._breaker(url)
+        if self.retry_budget is not None:
+            self.retry_budget.deposit()
 
         for attempt in range(1, self.max_retries + 1):
+            admitted = None
+            if breaker is not None:
+                admitted = breaker.admit()
+                if admitted is None:
+                    SHORT_CIRCUITED.inc((breaker.name,))
+                    raise CircuitOpenError(
+                        f"Circuit open for {breaker.name}"
+                    ) from last_exception
+            ATTEMPTS.inc((method,))
+            stack = AsyncExitStack()
+            # ответ без чтения тела уходит вызывающему вместе со стеком
+            handed_over = False
+            # исход попытки для предохранителя: None - попытка прервана
+            ok: Optional[bool] = None
             try:
-                resp = await self._client.request(
-                    method=method.upper(),
-                    url=url,
-                    headers=headers,
-                    json=json,
-                    data=data,
-                    params=params,
+                resp = await stack.enter_async_context(
+                    self._attempt(method=method, url=url, **request)
                 )
 
-                if resp.status_code == 429 and attempt < self.max_retries:
+                if (
+                    resp.status_code == 429
+                    and attempt < self.max_retries
+                    and self._may_retry()
+                ):
+                    # исход известен до паузы: проба не держит предохранитель
+                    if admitted is not None:
+                        breaker.record(admitted, False)
+                        admitted = None
                     retry_after = resp.headers.get("Retry-After")
                     wait = None
                     if retry_after:
@@ -113,7 +342,8 @@ class SecureHTTPClient:
                             wait = int(retry_after)
                         except ValueError:
                             wait = None
-                    await resp.aread()
+                    await stack.aclose()
+                    RETRIES.inc(("rate_limited",))
                     if wait:
                         await asyncio.sleep(wait)
                         continue
@@ -122,15 +352,29 @@ class SecureHTTPClient:
                         continue
 
                 # проверяем размер
-                resp_checked = await self._stream_and_limit(resp)
+                self._check_content_length(resp)
 
-                # проверяем статус
-                resp_checked.raise_for_status()
+                # проверяем статус; тело ошибки небольшое и нужно вызывающему
+                # 304 - ответ на условный запрос кэша, тело не нужно
+                if not resp.is_success and resp.status_code != 304:
+                    (await self._stream_and_limit(resp)).raise_for_status()
+
+                if buffered:
+                    resp = await self._stream_and_limit(resp)
 
                 logger.info(
                     "Request successful (attempt %d): %s %s", attempt, method, url
                 )
-                return resp_checked
+                ok = True
+                handed_over = not buffered
+                return resp, stack
+
+            except httpx.PoolTimeout as e:
+                # Свободного соединения не дождались в своём же пуле: до
+                # upstream запрос не дошёл, предохранитель это не решает, а
+                # повтор только удлинит очередь - ошибка отдаётся сразу.
+                logger.warning("Pool timeout (attempt %d): %s", attempt, url)
+                raise e
 
             except (
                 httpx.TimeoutException,
@@ -138,6 +382,8 @@ class SecureHTTPClient:
                 httpx.NetworkError,
             ) as e:
                 last_exception = e
+                ok = False
+                reason = "network"
                 logger.warning(
                     "Network/timeout (attempt %d/%d): %s — %s",
                     attempt,
@@ -148,7 +394,10 @@ class SecureHTTPClient:
 
             except httpx.HTTPStatusError as e:
                 last_exception = e
+                reason = "server_error"
                 status = e.response.status_code if e.response is not None else None
+                # 4xx - upstream жив и отвечает; 429 - перегружен
+                ok = (status or 0) < 500 and status != 429
                 logger.warning(
                     "HTTP status error %s (attempt %d/%d): %s",
                     status,
@@ -161,11 +410,14 @@ class SecureHTTPClient:
                     raise e
 
             except ResponseTooLargeError as e:
+                ok = True
                 logger.warning("Response too large: %s", str(e))
                 raise e
 
             except Exception as e:
                 last_exception = e
+                ok = False
+                reason = "error"
                 logger.warning(
                     "Request failed (attempt %d/%d): %s — %s",
                     attempt,
@@ -174,17 +426,162 @@ class SecureHTTPClient:
                     str(e),
                 )
 
+            finally:
+                if admitted is not None:
+                    breaker.record(admitted, ok)
+                # соединение и место в пуле освобождаются до паузы перед ретраем
+                if not handed_over:
+                    await stack.aclose()
+
+            if attempt == self.max_retries or not self._may_retry():
+                break
             # backoff задержка
-            if attempt < self.max_retries:
-                base = 0.5 * (2 ** (attempt - 1))
-                jitter = base * 0.1
-                wait_time = base + (
-                    jitter * (0.5 - asyncio.get_running_loop().time() % 1)
-                )
-                await asyncio.sleep(wait_time)
+            RETRIES.inc((reason,))
+            base = 0.5 * (2 ** (attempt - 1))
+            jitter = base * 0.1
+            wait_time = base + (jitter * (0.5 - asyncio.get_running_loop().time() % 1))
+            await asyncio.sleep(wait_time)
 
         raise last_exception or httpx.RequestError("All retry attempts failed")
 
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        json: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> httpx.Response:
+        async def send(extra_headers: Dict[str, str]) -> httpx.Response:
+            resp, _ = await self._open(
+                method,
+                url,
+                buffered=True,
+                headers={**(headers or {}), **extra_headers},
+                json=json,
+                data=data,
+                params=params,
+            )
+            return resp
+
+        method = method.upper()
+        coalesce = (
+            self.coalesce
+            and method in COALESCE_METHODS
+            and json is None
+            and data is None
+        )
+        if self.cache is None and not coalesce:
+            return await send({})
+        # ключ кэша - полный URL с параметрами, как его соберёт httpx
+        request = self._client.build_request(
+            method, url, headers=headers, params=params
+        )
+
+        async def fetch() -> httpx.Response:
+            if self.cache is None:
+                return await send({})
+            return await self.cache.fetch(request, send)
+
+        if not coalesce:
+            return await fetch()
+        # заголовки вызывающего входят в ключ: ответ с чужим Authorization
+        # или Accept не достанется
+        key = (
+            method,
+            str(request.url),
+            tuple(sorted((k.lower(), v) for k, v in (headers or {}).items())),
+        )
+        return await self._coalesced(key, fetch)
+
+    async def _coalesced(
+        self,
+        key: Tuple[Any, ...],
+        fetch: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        """Один запрос к upstream на все одинаковые вызовы, пока он в полёте.
+
+        Все ждущие получают один и тот же буферизованный ответ (или одно и то
+        же исключение). Запрос идёт отдельной задачей: отмена одного из
+        ждущих его не прерывает, а отмена последнего - прерывает.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fetch()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            COALESCED.inc((key[0],))
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # все ждавшие отменены - ответ больше никому не нужен
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: Tuple[Any, ...], flight: _Flight) -> None:
+        # следующий вызов с тем же ключом пойдёт к upstream заново
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        json: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator["StreamedResponse"]:
+        """Ответ без чтения тела в память: куски читаются по мере прихода.
+
+        Ретраи и проверка статуса - как у request, до начала тела. Тело
+        читается через aiter_bytes и не больше max_response_size.
+        """
+        resp, stack = await self._open(
+            method, url, headers=headers, json=json, data=data, params=params
+        )
+        async with stack:
+            yield StreamedResponse(resp, self._iter_limited)
+
+    async def spool(
+        self,
+        method: str,
+        url: str,
+        max_memory: int = 1024 * 1024,
+        chunk_size: int = 64 * 1024,
+        headers: Optional[Dict[str, str]] = None,
+        json: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> "SpooledResponse":
+        """Тело ответа во временном файле: до max_memory байт в памяти, дальше на диске.
+
+        Файл открыт и стоит в начале; закрыть его - забота вызывающего
+        (with response.body: ...), после закрытия файл удаляется.
+        """
+        body = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        try:
+            async with self.stream(
+                method, url, headers=headers, json=json, data=data, params=params
+            ) as resp:
+                async for chunk in resp.aiter_bytes(chunk_size):
+                    # запись идёт в page cache и не ждёт диска
+                    body.write(chunk)
+                size = body.tell()
+                body.seek(0)
+                return SpooledResponse(
+                    resp.status_code, resp.headers, body, size, resp.request
+                )
+        except BaseException:
+            body.close()
+            raise
+
     async def get(self, url: str, **kwargs) -> httpx.Response:
         return await self.request("GET", url, **kwargs)
 
@@ -196,3 +593,101 @@ class SecureHTTPClient:
 
     async def delete(self, url: str, **kwargs) -> httpx.Response:
         return await self.request("DELETE", url, **kwargs)
+
+
+class UpstreamClients:
+    """Общие SecureHTTPClient на всё время жизни приложения, по одному на upstream.
+
+    Клиент с пулом соединений создаётся при первом обращении к upstream и
+    переиспользуется: keep-alive соединения и TLS-сессии не открываются
+    заново на каждый вызов. Лимит соединений можно задать отдельно для
+    хоста (host_max_connections), остальные параметры общие.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0,
+        http2: bool = False,
+        host_max_connections: Optional[Mapping[str, int]] = None,
+        cache: Optional[HTTPCache] = None,
+        **client_options: Any,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.host_max_connections = dict(host_max_connections or {})
+        # один кэш на всех: ключ - полный URL
+        self.cache = cache
+        self.client_options = client_options
+        self._clients: Dict[str, SecureHTTPClient] = {}
+
+    def get(self, base_url: str) -> SecureHTTPClient:
+        """Клиент для upstream: относительные URL запросов - от base_url"""
+        url = httpx.URL(base_url)
+        origin = f"{url.scheme}://{url.netloc.decode()}"
+        client = self._clients.get(origin)
+        if client is None:
+            max_connections = self.host_max_connections.get(
+                url.host, self.max_connections
+            )
+            client = SecureHTTPClient(
+                max_connections=max_connections,
+                max_keepalive_connections=min(
+                    self.max_keepalive_connections, max_connections
+                ),
+                keepalive_expiry=self.keepalive_expiry,
+                http2=self.http2,
+                base_url=origin,
+                cache=self.cache,
+                **self.client_options,
+            )
+            self._clients[origin] = client
+        return client
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {origin: client.stats() for origin, client in self._clients.items()}
+
+    async def close(self) -> None:
+        # после закрытия get снова создаёт клиентов (повторный старт приложения)
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.close()
+
+
+def create_upstream_clients(settings: Settings) -> UpstreamClients:
+    """Клиенты исходящих запросов по настройкам HTTP_*"""
+    cache = None
+    if settings.http_cache_bytes > 0:
+        cache = HTTPCache(
+            settings.http_cache_bytes,
+            directory=settings.http_cache_dir or None,
+            disk_bytes=settings.http_cache_disk_bytes,
+        )
+    circuit_breaker = None
+    if settings.http_breaker_failure_rate > 0:
+        circuit_breaker = functools.partial(
+            CircuitBreaker,
+            failure_rate=settings.http_breaker_failure_rate,
+            min_calls=settings.http_breaker_min_calls,
+            window=settings.http_breaker_window,
+            open_seconds=settings.http_breaker_open_seconds,
+        )
+    retry_budget = functools.partial(
+        RetryBudget,
+        ratio=settings.http_retry_budget_ratio,
+        min_per_second=settings.http_retry_budget_min_per_second,
+    )
+    return UpstreamClients(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+        http2=settings.http2,
+        host_max_connections=settings.http_host_max_connections,
+        cache=cache,
+        coalesce=settings.http_coalesce,
+        circuit_breaker=circuit_breaker,
+        retry_budget=retry_budget,
+    )
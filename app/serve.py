@@ -0,0 +1,26 @@
+"""Запуск API: python -m app.serve
+
+Число процессов задаёт WEB_CONCURRENCY. Процессы делят одну базу SQLite:
+записи идут под BEGIN IMMEDIATE, поэтому id (AUTOINCREMENT) и порядок
+в колонках согласованы между процессами.
+"""
+
+import uvicorn
+
+from .config import settings
+from .store.factory import create_store
+
+
+def main() -> None:
+    # проверяем настройки и создаём схему до запуска процессов
+    create_store(settings).close()
+    uvicorn.run(
+        "app.main:app",
+        host=settings.host,
+        port=settings.port,
+        workers=settings.web_concurrency,
+    )
+
+
+if __name__ == "__main__":
+    main()
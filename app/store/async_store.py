@@ -0,0 +1,83 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..models.schemas import ColumnType
+from .base import BoardVersion, CardStore, Delta
+
+
+class AsyncCardStore:
+    """Асинхронный интерфейс к CardStore для обработчиков FastAPI.
+
+    Неблокирующее хранилище (в памяти) вызывается прямо в event loop, без
+    переключения потоков. Блокирующее (SQLite) - в собственном пуле потоков
+    размером с пул соединений, чтобы не занимать общий пул Starlette и не
+    ставить в очередь больше запросов, чем есть соединений.
+    """
+
+    def __init__(self, store: CardStore, max_workers: int = 5):
+        self.store = store
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if store.blocking:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="card-store"
+            )
+
+    async def _call(self, fn: Callable, *args, **kwargs):
+        if self._executor is None:
+            return fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def get(self, card_id: int) -> Optional[dict]:
+        return await self._call(self.store.get, card_id)
+
+    async def page(
+        self,
+        column: Optional[ColumnType] = None,
+        after: Optional[int] = None,
+        limit: int = 100,
+    ) -> Tuple[List[dict], Optional[int]]:
+        return await self._call(
+            self.store.page, column=column, after=after, limit=limit
+        )
+
+    async def create(
+        self, title: str, description: Optional[str], column: ColumnType
+    ) -> dict:
+        return await self._call(self.store.create, title, description, column)
+
+    async def create_many(self, items: List[Dict[str, Any]]) -> List[dict]:
+        return await self._call(self.store.create_many, items)
+
+    async def update(self, card_id: int, changes: Dict[str, Any]) -> Optional[dict]:
+        return await self._call(self.store.update, card_id, changes)
+
+    async def update_many(
+        self, updates: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[dict]:
+        return await self._call(self.store.update_many, updates)
+
+    async def delete(self, card_id: int) -> Optional[dict]:
+        return await self._call(self.store.delete, card_id)
+
+    async def delete_many(self, card_ids: List[int]) -> List[dict]:
+        return await self._call(self.store.delete_many, card_ids)
+
+    async def count(self, column: Optional[ColumnType] = None) -> int:
+        return await self._call(self.store.count, column)
+
+    async def version(self) -> BoardVersion:
+        return await self._call(self.store.version)
+
+    async def changes_since(self, since: int, limit: Optional[int] = None) -> Delta:
+        return await self._call(self.store.changes_since, since, limit)
+
+    async def search(self, query: str, limit: int = 20) -> List[dict]:
+        return await self._call(self.store.search, query, limit)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self.store.close()
@@ -0,0 +1,166 @@
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from ..models.schemas import ColumnType
+
+
+class CardNotFoundError(KeyError):
+    """Пакетная операция затронула несуществующую карточку; ничего не применено"""
+
+    def __init__(self, card_id: int):
+        super().__init__(card_id)
+        self.card_id = card_id
+
+
+class BoardVersion(NamedTuple):
+    """Версия доски: номер растёт при каждом изменении карточек.
+
+    Номер начинается с нуля и уходит клиентам JSON-числом, поэтому должен
+    помещаться в 53 бита. epoch - время создания доски в секундах: после
+    перезапуска с пустым хранилищем номера начинаются заново, и ETag
+    отличает новую доску от старой по эпохе.
+    """
+
+    number: int
+    modified_at: datetime
+    epoch: int
+
+
+class Delta(NamedTuple):
+    """Изменения доски после версии since.
+
+    cards - изменённые и созданные карточки в текущем состоянии, deleted -
+    ID удалённых. Клиент убирает из колонок изменённые и удалённые карточки
+    и вставляет изменённые по возрастанию order_idx.
+
+    snapshot=True (cards и deleted пусты) - дельтой доску не восстановить:
+    журнал уже сжат за since или изменений больше limit. Доску надо
+    перечитать постранично и продолжить с since=version. Дельту нельзя
+    резать на части: order_idx в ней - текущие позиции, и частично
+    применённая дельта расставила бы карточки не по местам.
+    """
+
+    version: int
+    cards: List[dict]
+    deleted: List[int]
+    snapshot: bool
+
+
+# listener(event, card, previous): event - created, updated или deleted;
+# previous - карточка до изменения (для updated)
+ChangeListener = Callable[[str, dict, Optional[dict]], None]
+
+
+class CardStore(ABC):
+    """Интерфейс хранилища карточек"""
+
+    # True, если операции ждут ввода-вывода и их нельзя вызывать в event loop
+    blocking = False
+
+    def __init__(self):
+        self._listeners: List[ChangeListener] = []
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        """Подписаться на изменения карточек.
+
+        Слушатель вызывается синхронно, в порядке изменений внутри колонки
+        и после того, как изменение стало видно читателям, поэтому должен
+        быть быстрым и не блокирующим.
+        """
+        self._listeners.append(listener)
+
+    @abstractmethod
+    def get(self, card_id: int) -> Optional[dict]:
+        """Карточка по ID или None"""
+
+    @abstractmethod
+    def iter_cards(self, column: Optional[ColumnType] = None) -> Iterator[dict]:
+        """Все карточки (или карточки одной колонки в порядке order_idx)"""
+
+    @abstractmethod
+    def page(
+        self,
+        column: Optional[ColumnType] = None,
+        after: Optional[int] = None,
+        limit: int = 100,
+    ) -> Tuple[List[dict], Optional[int]]:
+        """Страница карточек по ключу (keyset-пагинация).
+
+        Без column карточки идут по возрастанию id, с column - в порядке
+        колонки. after - ключ последней карточки предыдущей страницы;
+        вторым значением возвращается ключ для следующей страницы или None.
+        """
+
+    @abstractmethod
+    def create(
+        self, title: str, description: Optional[str], column: ColumnType
+    ) -> dict:
+        """Создать карточку в конце колонки"""
+
+    @abstractmethod
+    def update(self, card_id: int, changes: Dict[str, Any]) -> Optional[dict]:
+        """Изменить поля карточки.
+
+        Смена column переносит карточку в конец новой колонки, order_idx
+        ставит её на указанную позицию (с ограничением до границ колонки).
+        """
+
+    @abstractmethod
+    def delete(self, card_id: int) -> Optional[dict]:
+        """Удалить карточку, вернуть удалённую или None"""
+
+    @abstractmethod
+    def count(self, column: Optional[ColumnType] = None) -> int:
+        """Количество карточек на доске или в колонке"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Удалить все карточки"""
+
+    @abstractmethod
+    def version(self) -> BoardVersion:
+        """Текущая версия доски (меняется после каждой записи)"""
+
+    @abstractmethod
+    def changes_since(self, since: int, limit: Optional[int] = None) -> Delta:
+        """Изменения после версии since (не больше limit) или snapshot=True"""
+
+    @abstractmethod
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        """Полнотекстовый поиск по title и description.
+
+        Все слова запроса обязательны, последнее совпадает по префиксу.
+        Первыми идут карточки, где все слова нашлись в заголовке, внутри
+        группы - от новых к старым.
+        """
+
+    def create_many(self, items: List[Dict[str, Any]]) -> List[dict]:
+        """Создать карточки пачкой (словари с title/description/column)"""
+        return [self.create(**item) for item in items]
+
+    def update_many(self, updates: List[Tuple[int, Dict[str, Any]]]) -> List[dict]:
+        """Применить изменения по порядку или бросить CardNotFoundError"""
+        self._ensure_exist(card_id for card_id, _ in updates)
+        return [self.update(card_id, changes) for card_id, changes in updates]
+
+    def delete_many(self, card_ids: List[int]) -> List[dict]:
+        """Удалить карточки или бросить CardNotFoundError"""
+        self._ensure_exist(card_ids)
+        return [self.delete(card_id) for card_id in card_ids]
+
+    def _notify(self, event: str, card: dict, previous: Optional[dict] = None) -> None:
+        for listener in self._listeners:
+            listener(event, card, previous)
+
+    def _ensure_exist(self, card_ids: Iterable[int]) -> None:
+        for card_id in card_ids:
+            if self.get(card_id) is None:
+                raise CardNotFoundError(card_id)
+
+    def close(self) -> None:
+        """Освободить ресурсы хранилища"""
+
+    def __len__(self) -> int:
+        return self.count()
@@ -0,0 +1,19 @@
+from ..config import Settings
+from .base import CardStore
+from .memory import InMemoryCardStore
+from .sqlite import SQLiteCardStore
+
+
+def create_store(settings: Settings) -> CardStore:
+    """Хранилище карточек по настройке CARD_STORE"""
+    if settings.card_store == "memory" and settings.web_concurrency > 1:
+        # у каждого процесса была бы своя доска
+        raise ValueError("CARD_STORE=memory cannot be shared by several workers")
+    if settings.card_store == "sqlite":
+        return SQLiteCardStore(
+            settings.database_url,
+            pool_size=settings.db_pool_size,
+            id_block_size=settings.id_block_size,
+            sync_log_size=settings.sync_log_size,
+        )
+    return InMemoryCardStore(sync_log_size=settings.sync_log_size)
@@ -0,0 +1,49 @@
+import threading
+from typing import Callable
+
+
+class IdAllocator:
+    """Монотонный счётчик ID под блокировкой: ID не повторяются и после удалений"""
+
+    def __init__(self, last_id: int = 0):
+        self._lock = threading.Lock()
+        self._last_id = last_id
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._last_id += 1
+            return self._last_id
+
+    def reset(self, last_id: int = 0) -> None:
+        with self._lock:
+            self._last_id = last_id
+
+
+class BlockIdAllocator(IdAllocator):
+    """Выдаёт ID из блоков, зарезервированных в общем для процессов источнике.
+
+    reserve(n) атомарно резервирует n ID и возвращает первый из них; за
+    источником процесс обращается раз в block_size карточек. ID остаются
+    уникальными, но между процессами идут не по порядку создания.
+    """
+
+    def __init__(self, reserve: Callable[[int], int], block_size: int = 1000):
+        super().__init__()
+        self._reserve = reserve
+        self.block_size = block_size
+        self._block_end = 0
+
+    def next_id(self) -> int:
+        with self._lock:
+            if self._last_id >= self._block_end:
+                first = self._reserve(self.block_size)
+                self._last_id = first - 1
+                self._block_end = first + self.block_size - 1
+            self._last_id += 1
+            return self._last_id
+
+    def reset(self, last_id: int = 0) -> None:
+        # следующий вызов зарезервирует новый блок
+        with self._lock:
+            self._last_id = last_id
+            self._block_end = last_id
@@ -0,0 +1,496 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from itertools import chain, islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..models.schemas import ColumnType
+from .base import BoardVersion, CardStore, Delta
+from .ids import IdAllocator
+from .ranking import RANK_STEP, rank_between, respread
+from .search import SearchIndex
+
+
+class _OrderIndex:
+    """Порядковый индекс: отсортированные ключи (ранги или ID) и ID карточек.
+
+    Ключи хранятся блоками до 2 * LOAD элементов, длины блоков - в дереве
+    Фенвика, поэтому вставка, удаление и позиция ранга стоят O(log n)
+    без сдвига всей колонки.
+    """
+
+    LOAD = 512
+
+    __slots__ = ("_ranks", "_ids", "_maxes", "_tree", "_size")
+
+    def __init__(self):
+        self._ranks: List[List[int]] = []
+        self._ids: List[List[int]] = []
+        self._maxes: List[int] = []
+        self._tree: List[int] = [0]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def ids(self) -> Iterator[int]:
+        return chain.from_iterable(self._ids)
+
+    def position(self, rank: int) -> int:
+        block = bisect_left(self._maxes, rank)
+        if block == len(self._maxes):
+            return self._size
+        return self._prefix(block) + bisect_left(self._ranks[block], rank)
+
+    def iter_from(self, pos: int) -> Iterator[Tuple[int, int]]:
+        """Пары (ключ, ID) начиная с позиции pos"""
+        if pos >= self._size:
+            return
+        block, offset = self._find(pos)
+        for ranks, ids in zip(self._ranks[block:], self._ids[block:]):
+            yield from zip(ranks[offset:], ids[offset:])
+            offset = 0
+
+    def rank_at(self, pos: int) -> int:
+        block, offset = self._find(pos)
+        return self._ranks[block][offset]
+
+    def set_rank(self, pos: int, rank: int) -> int:
+        # порядок рангов вызывающий сохраняет сам; возвращает ID карточки
+        block, offset = self._find(pos)
+        self._ranks[block][offset] = rank
+        self._maxes[block] = self._ranks[block][-1]
+        return self._ids[block][offset]
+
+    def insert(self, rank: int, card_id: int) -> None:
+        self._size += 1
+        if not self._maxes:
+            self._ranks.append([rank])
+            self._ids.append([card_id])
+            self._maxes.append(rank)
+            self._rebuild_tree()
+            return
+
+        block = min(bisect_left(self._maxes, rank), len(self._maxes) - 1)
+        ranks, ids = self._ranks[block], self._ids[block]
+        offset = bisect_left(ranks, rank)
+        ranks.insert(offset, rank)
+        ids.insert(offset, card_id)
+        self._maxes[block] = ranks[-1]
+
+        if len(ranks) > 2 * self.LOAD:
+            self._ranks[block : block + 1] = [ranks[: self.LOAD], ranks[self.LOAD :]]
+            self._ids[block : block + 1] = [ids[: self.LOAD], ids[self.LOAD :]]
+            self._maxes[block : block + 1] = [ranks[self.LOAD - 1], ranks[-1]]
+            self._rebuild_tree()
+        else:
+            self._add(block, 1)
+
+    def remove(self, rank: int) -> None:
+        self._size -= 1
+        block = bisect_left(self._maxes, rank)
+        ranks, ids = self._ranks[block], self._ids[block]
+        offset = bisect_left(ranks, rank)
+        del ranks[offset]
+        del ids[offset]
+
+        if ranks:
+            self._maxes[block] = ranks[-1]
+            self._add(block, -1)
+        else:
+            del self._ranks[block], self._ids[block], self._maxes[block]
+            self._rebuild_tree()
+
+    def rank_for(self, pos: int) -> Optional[int]:
+        lo = self.rank_at(pos - 1) if pos > 0 else None
+        hi = self.rank_at(pos) if pos < self._size else None
+        return rank_between(lo, hi)
+
+    def _rebuild_tree(self) -> None:
+        tree = [0] + [len(ranks) for ranks in self._ranks]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _add(self, block: int, delta: int) -> None:
+        i = block + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, block: int) -> int:
+        # число карточек в блоках [0, block)
+        total = 0
+        while block:
+            total += self._tree[block]
+            block -= block & -block
+        return total
+
+    def _find(self, pos: int) -> Tuple[int, int]:
+        # спуск по дереву Фенвика: блок с позицией pos и смещение в нём
+        block = 0
+        step = 1 << (len(self._tree).bit_length() - 1)
+        while step:
+            nxt = block + step
+            if nxt < len(self._tree) and self._tree[nxt] <= pos:
+                block = nxt
+                pos -= self._tree[nxt]
+            step >>= 1
+        return block, pos
+
+
+class InMemoryCardStore(CardStore):
+    """Хранилище в памяти: хэш-индекс id -> карточка и упорядоченный индекс на колонку.
+
+    Порядок в колонке задаётся разреженным рангом, а order_idx вычисляется
+    как позиция ранга в индексе (O(log n)). Перемещение и удаление меняют
+    только саму карточку; когда между соседями заканчивается место,
+    раздвигается лишь небольшое окно рангов вокруг позиции.
+
+    Каждая колонка защищена своей блокировкой: изменения в разных колонках
+    не ждут друг друга, перенос берёт обе колонки в фиксированном порядке.
+    Реестр карточек и индекс по ID - под отдельной короткой блокировкой,
+    которая берётся только после блокировок колонок.
+
+    Журнал версий: каждая изменённая карточка получает свой номер версии
+    доски, удалённая оставляет надгробие. Надгробия старше sync_log_size
+    версий сжимаются; за сжатой границей изменения отдаются снимком.
+    """
+
+    def __init__(self, sync_log_size: int = 10_000):
+        super().__init__()
+        self.sync_log_size = sync_log_size
+        self._cards: Dict[int, dict] = {}
+        self._columns: Dict[str, _OrderIndex] = {
+            c.value: _OrderIndex() for c in ColumnType
+        }
+        # RLock: пакетные операции держат все колонки и вызывают update/delete
+        self._column_locks: Dict[str, threading.RLock] = {
+            c.value: threading.RLock() for c in ColumnType
+        }
+        self._registry_lock = threading.Lock()
+        self._by_id = _OrderIndex()
+        self._id_allocator = IdAllocator()
+        self._version = BoardVersion(0, datetime.now(), int(time.time()))
+        # версия изменения -> ID карточки; у каждой карточки одна запись
+        self._changes = _OrderIndex()
+        self._tombstones: Deque[Tuple[int, int]] = deque()
+        # изменения не старше этой версии восстановить уже нельзя
+        self._horizon = self._version.number
+        self._search = SearchIndex()
+
+    def get(self, card_id: int) -> Optional[dict]:
+        with self._lock_card(card_id) as card:
+            return self._public(card) if card is not None else None
+
+    def iter_cards(self, column: Optional[ColumnType] = None) -> Iterator[dict]:
+        # снимок ID под блокировкой; карточки, удалённые во время обхода, пропускаются
+        if column is None:
+            with self._registry_lock:
+                ids = list(self._by_id.ids)
+            return (card for card in map(self.get, ids) if card is not None)
+        column = ColumnType(column).value
+        with self._locked(column):
+            ids = list(self._columns[column].ids)
+        return (
+            self._public(self._cards[card_id], pos)
+            for pos, card_id in enumerate(ids, 1)
+            if card_id in self._cards
+        )
+
+    def page(
+        self,
+        column: Optional[ColumnType] = None,
+        after: Optional[int] = None,
+        limit: int = 100,
+    ) -> Tuple[List[dict], Optional[int]]:
+        if column is None:
+            with self._registry_lock:
+                entries, next_after = self._page_entries(self._by_id, after, limit)
+            cards = [self.get(card_id) for _, card_id in entries]
+            return [card for card in cards if card is not None], next_after
+
+        column = ColumnType(column).value
+        with self._locked(column):
+            index = self._columns[column]
+            entries, next_after = self._page_entries(index, after, limit)
+            start = index.position(entries[0][0]) if entries else 0
+            cards = [
+                self._public(self._cards[card_id], start + i)
+                for i, (_, card_id) in enumerate(entries, 1)
+            ]
+        return cards, next_after
+
+    def create(
+        self, title: str, description: Optional[str], column: ColumnType
+    ) -> dict:
+        card = self._new_card(title, description, column, datetime.now())
+        with self._locked(card["column"]):
+            self._place(card, None)
+            self._register([card])
+            self._touch([card])
+            self._search.add(card)
+            created = self._public(card)
+            self._notify("created", created)
+            return created
+
+    def create_many(self, items: List[Dict[str, Any]]) -> List[dict]:
+        # ранги и позиции считаются один раз на колонку, дальше - с шагом
+        now = datetime.now()
+        columns = {ColumnType(item["column"]).value for item in items}
+        tails: Dict[str, Tuple[int, int]] = {}
+        cards, created = [], []
+        with self._locked(*columns):
+            for item in items:
+                card = self._new_card(
+                    item["title"], item["description"], item["column"], now
+                )
+                column = card["column"]
+                if column not in tails:
+                    index = self._columns[column]
+                    last_rank = index.rank_at(len(index) - 1) if len(index) else 0
+                    tails[column] = (last_rank, len(index))
+                last_rank, size = tails[column]
+                tails[column] = (last_rank + RANK_STEP, size + 1)
+
+                card["rank"] = last_rank + RANK_STEP
+                self._columns[column].insert(card["rank"], card["id"])
+                cards.append(card)
+                created.append(self._public(card, size + 1))
+            self._register(cards)
+            self._touch(cards)
+            for card in cards:
+                self._search.add(card)
+            for card in created:
+                self._notify("created", card)
+        return created
+
+    def update(self, card_id: int, changes: Dict[str, Any]) -> Optional[dict]:
+        column = changes.get("column")
+        target = ColumnType(column).value if column is not None else None
+        with self._lock_card(card_id, target) as card:
+            if card is None:
+                return None
+            previous = self._public(card) if self._listeners else None
+
+            if "title" in changes:
+                card["title"] = changes["title"]
+            if "description" in changes:
+                card["description"] = changes["description"]
+
+            column = target or card["column"]
+            order_idx = changes.get("order_idx")
+            if column != card["column"] or order_idx is not None:
+                self._columns[card["column"]].remove(card["rank"])
+                card["column"] = column
+                self._place(card, order_idx)
+
+            card["updated_at"] = datetime.now()
+            self._touch([card])
+            self._search.update(card)
+            updated = self._public(card)
+            self._notify("updated", updated, previous)
+            return updated
+
+    def delete(self, card_id: int) -> Optional[dict]:
+        with self._lock_card(card_id) as card:
+            if card is None:
+                return None
+            deleted = self._public(card)
+            with self._registry_lock:
+                del self._cards[card_id]
+                self._by_id.remove(card_id)
+            self._columns[card["column"]].remove(card["rank"])
+            self._touch(deleted=[card])
+            self._search.remove(card_id)
+            self._notify("deleted", deleted)
+            return deleted
+
+    def update_many(self, updates: List[Tuple[int, Dict[str, Any]]]) -> List[dict]:
+        # пакет атомарен для других потоков: держим все колонки сразу
+        with self._locked(*self._columns):
+            return super().update_many(updates)
+
+    def delete_many(self, card_ids: List[int]) -> List[dict]:
+        with self._locked(*self._columns):
+            return super().delete_many(card_ids)
+
+    def count(self, column: Optional[ColumnType] = None) -> int:
+        if column is None:
+            return len(self._cards)
+        return len(self._columns[ColumnType(column).value])
+
+    def clear(self) -> None:
+        with self._locked(*self._columns), self._registry_lock:
+            self._cards.clear()
+            for column in self._columns:
+                self._columns[column] = _OrderIndex()
+            self._by_id = _OrderIndex()
+            self._id_allocator.reset()
+            self._changes = _OrderIndex()
+            self._tombstones.clear()
+            self._search.clear()
+        self._touch()
+        self._horizon = self._version.number
+
+    def version(self) -> BoardVersion:
+        return self._version
+
+    def changes_since(self, since: int, limit: Optional[int] = None) -> Delta:
+        # больше limit изменений - уже снимок, лишнего не собираем
+        cap = None if limit is None else limit + 1
+        with self._registry_lock:
+            number = self._version.number
+            if not self._horizon <= since <= number:
+                return Delta(number, [], [], True)
+            start = self._changes.position(since + 1)
+            ids = [
+                card_id for _, card_id in islice(self._changes.iter_from(start), cap)
+            ]
+            deleted = []
+            for version, card_id in reversed(self._tombstones):
+                if version <= since or len(ids) + len(deleted) == cap:
+                    break
+                deleted.append(card_id)
+
+        if limit is not None and len(ids) + len(deleted) > limit:
+            return Delta(number, [], [], True)
+        # карточка могла измениться ещё раз - тогда она уже в новом состоянии
+        cards = [card for card in map(self.get, ids) if card is not None]
+        return Delta(number, cards, deleted[::-1], False)
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        # карточка могла быть удалена после поиска по индексу - пропускаем
+        cards = map(self.get, self._search.search(query, limit))
+        return [card for card in cards if card is not None]
+
+    @contextmanager
+    def _locked(self, *columns: str) -> Iterator[None]:
+        # единый порядок захвата исключает взаимную блокировку встречных переносов
+        with ExitStack() as stack:
+            for column in sorted(set(columns)):
+                stack.enter_context(self._column_locks[column])
+            yield
+
+    @contextmanager
+    def _lock_card(
+        self, card_id: int, target: Optional[str] = None
+    ) -> Iterator[Optional[dict]]:
+        """Держит колонку карточки (и целевую колонку переноса).
+
+        Пока ждём блокировку, карточку могут перенести или удалить -
+        тогда проверка повторяется уже с её новой колонкой.
+        """
+        while True:
+            card = self._cards.get(card_id)
+            if card is None:
+                yield None
+                return
+            column = card["column"]
+            with self._locked(column, target or column):
+                if self._cards.get(card_id) is card and card["column"] == column:
+                    yield card
+                    return
+
+    @staticmethod
+    def _page_entries(
+        index: _OrderIndex, after: Optional[int], limit: int
+    ) -> Tuple[List[Tuple[int, int]], Optional[int]]:
+        # ключи целые, поэтому "строго после after" - это позиция after + 1
+        start = 0 if after is None else index.position(after + 1)
+        entries = list(islice(index.iter_from(start), limit + 1))
+        next_after = entries[limit - 1][0] if len(entries) > limit else None
+        return entries[:limit], next_after
+
+    def _new_card(
+        self,
+        title: str,
+        description: Optional[str],
+        column: ColumnType,
+        now: datetime,
+    ) -> dict:
+        return {
+            "id": self._id_allocator.next_id(),
+            "title": title,
+            "description": description,
+            "column": ColumnType(column).value,
+            "rank": 0,
+            "version": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    def _touch(
+        self, changed: Iterable[dict] = (), deleted: Iterable[dict] = ()
+    ) -> None:
+        # вызывается после изменения: новый номер не опережает данные;
+        # каждая карточка получает свой номер, чтобы ключи журнала не совпадали
+        with self._registry_lock:
+            number = self._version.number
+            for card in changed:
+                number += 1
+                if card["version"]:
+                    self._changes.remove(card["version"])
+                card["version"] = number
+                self._changes.insert(number, card["id"])
+            for card in deleted:
+                number += 1
+                self._changes.remove(card["version"])
+                self._tombstones.append((number, card["id"]))
+            if number == self._version.number:
+                number += 1
+            self._version = self._version._replace(
+                number=number, modified_at=datetime.now()
+            )
+
+            while (
+                self._tombstones
+                and self._tombstones[0][0] <= number - self.sync_log_size
+            ):
+                self._horizon = self._tombstones.popleft()[0]
+
+    def _register(self, cards: List[dict]) -> None:
+        # карточка становится видна по ID только после вставки в колонку
+        with self._registry_lock:
+            for card in cards:
+                self._cards[card["id"]] = card
+                self._by_id.insert(card["id"], card["id"])
+
+    def _place(self, card: dict, order_idx: Optional[int]) -> None:
+        # вставка на позицию order_idx (1..n+1) или в конец колонки
+        index = self._columns[card["column"]]
+        size = len(index)
+        pos = size if order_idx is None else min(max(order_idx, 1), size + 1) - 1
+
+        rank = index.rank_for(pos)
+        if rank is None:
+            self._respread(index, pos)
+            rank = index.rank_for(pos)
+
+        card["rank"] = rank
+        index.insert(rank, card["id"])
+
+    def _respread(self, index: _OrderIndex, pos: int) -> None:
+        # между соседями закончилось место - раздвигаем ближайшее окно
+        start, ranks = respread(index.rank_at, len(index), pos)
+        for offset, rank in enumerate(ranks, start):
+            self._cards[index.set_rank(offset, rank)]["rank"] = rank
+
+    def _public(self, card: dict, order_idx: Optional[int] = None) -> dict:
+        if order_idx is None:
+            order_idx = self._columns[card["column"]].position(card["rank"]) + 1
+        return {
+            "id": card["id"],
+            "title": card["title"],
+            "description": card["description"],
+            "column": card["column"],
+            "order_idx": order_idx,
+            "created_at": card["created_at"],
+            "updated_at": card["updated_at"],
+        }
@@ -0,0 +1,53 @@
+from typing import Callable, List, Optional, Tuple
+
+from ..metrics import histogram
+
+# Разреженные целые ранги: между соседями остаётся место для ~32 вставок,
+# прежде чем придётся раздвигать соседние ранги. Помещается в INTEGER SQLite
+# для колонок до 2**31 карточек.
+RANK_STEP = 1 << 32
+# минимальный шаг после раздвигания окна
+MIN_SPACING = 1 << 16
+
+# сколько соседних карточек переписывает одно раздвигание - стоимость вставки
+# в «тесное» место, которую иначе не видно по задержке запроса
+RESPREAD_ROWS = histogram(
+    "card_respread_rows",
+    "Cards re-ranked by one respread of a column window",
+    buckets=tuple(4**i for i in range(10)),
+)
+
+
+def rank_between(lo: Optional[int], hi: Optional[int]) -> Optional[int]:
+    """Ранг строго между lo и hi (None - край колонки) или None, если места нет"""
+    lo = 0 if lo is None else lo
+    if hi is None:
+        return lo + RANK_STEP
+    if hi - lo > 1:
+        return (lo + hi) // 2
+    return None
+
+
+def respread(
+    rank_at: Callable[[int], int], size: int, pos: int
+) -> Tuple[int, List[int]]:
+    """Равномерно раздвигает ранги вокруг позиции pos.
+
+    Окно удваивается, пока в нём не наберётся место с шагом не меньше
+    MIN_SPACING. Возвращает начало окна и новые ранги для позиций
+    start..start+len-1; остальные ранги не меняются.
+    """
+    width = 1
+    while True:
+        start = max(pos - width, 0)
+        end = min(pos + width, size)
+        count = end - start
+        lo = rank_at(start - 1) if start > 0 else 0
+        if end == size:
+            spacing = RANK_STEP
+        else:
+            spacing = (rank_at(end) - lo) // (count + 1)
+        if spacing >= MIN_SPACING:
+            RESPREAD_ROWS.observe(count)
+            return start, [lo + spacing * (i + 1) for i in range(count)]
+        width *= 2
@@ -0,0 +1,229 @@
+import re
+import threading
+from bisect import bisect_left, bisect_right, insort
+from heapq import merge
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# слово - буквы и цифры; так же режет текст токенизатор unicode61 в SQLite FTS5
+_WORD = re.compile(r"[^\W_]+")
+# больше любого символа слова: [prefix, prefix + TERM_END) - все термины с префиксом
+TERM_END = "\U0010ffff"
+# слово, раскрытое не более чем в столько списков, проверяется бинарным поиском
+# в них, иначе - по тексту карточки
+MAX_PROBED_LISTS = 4
+# кандидаты идут порциями: первая мала для частых запросов, дальше растёт
+FIRST_CHUNK = 64
+MAX_CHUNK = 8192
+# во сколько раз проверка одного кандидата дороже элемента среза списка
+PROBE_COST = 32
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Слова текста в нижнем регистре, в порядке появления"""
+    if not text:
+        return []
+    return _WORD.findall(text.casefold())
+
+
+def _contains(postings: List[int], card_id: int) -> bool:
+    i = bisect_left(postings, card_id)
+    return i < len(postings) and postings[i] == card_id
+
+
+def _newest_first(postings: List[List[int]]) -> Iterator[int]:
+    # слияние отсортированных списков от больших ID к меньшим, без повторов
+    if len(postings) == 1:
+        yield from reversed(postings[0])
+        return
+    last = None
+    for card_id in merge(*map(reversed, postings), reverse=True):
+        if card_id != last:
+            yield card_id
+            last = card_id
+
+
+class SearchIndex:
+    """Инвертированный индекс по title и description карточек.
+
+    Для каждого термина хранится отсортированный список ID карточек -
+    отдельно для заголовков и описаний. ID растут, поэтому новая карточка
+    дописывается в конец списков, а обход с конца сразу даёт новые
+    карточки первыми.
+
+    Запрос: все слова обязательны, последнее совпадает по префиксу.
+    Сначала идут карточки, у которых все слова нашлись в заголовке, затем
+    остальные; внутри группы - от новых к старым. Обход идёт по самому
+    короткому списку порциями растущего размера и останавливается, набрав
+    limit карточек. Порция пересекается с остальными словами целиком:
+    множеством из срезов их списков в диапазоне ID порции, а если срезы
+    длинные - бинарным поиском по кандидатам или, для префикса с
+    множеством терминов, по тексту карточки.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._title: Dict[str, List[int]] = {}
+        self._description: Dict[str, List[int]] = {}
+        # отсортированный словарь для раскрытия префиксов
+        self._terms: List[str] = []
+        # ID -> (title, description): ссылки на строки карточек, не копии
+        self._docs: Dict[int, Tuple[str, Optional[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, card: dict) -> None:
+        with self._lock:
+            self._docs[card["id"]] = (card["title"], card["description"])
+            self._add(self._title, card["id"], card["title"])
+            self._add(self._description, card["id"], card["description"])
+
+    def update(self, card: dict) -> None:
+        # перенос между колонками текст не меняет - индекс не трогаем
+        with self._lock:
+            title, description = self._docs[card["id"]]
+            self._docs[card["id"]] = (card["title"], card["description"])
+            for postings, old, new in (
+                (self._title, title, card["title"]),
+                (self._description, description, card["description"]),
+            ):
+                if old != new:
+                    self._remove(postings, card["id"], old)
+                    self._add(postings, card["id"], new)
+
+    def remove(self, card_id: int) -> None:
+        with self._lock:
+            title, description = self._docs.pop(card_id)
+            self._remove(self._title, card_id, title)
+            self._remove(self._description, card_id, description)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._title.clear()
+            self._description.clear()
+            self._terms.clear()
+            self._docs.clear()
+
+    def search(self, query: str, limit: int) -> List[int]:
+        """ID найденных карточек в порядке ранжирования"""
+        words = tokenize(query)
+        if not words:
+            return []
+        with self._lock:
+            # каждое слово - множество терминов: префикс раскрывается в несколько
+            groups = [{word} for word in words[:-1]]
+            groups.append(set(self._expand(words[-1])))
+            if not all(groups):
+                return []
+
+            found = self._match(groups, False, limit, set())
+            if len(found) < limit:
+                # все совпадения по заголовку уже найдены - их пропускаем
+                found += self._match(groups, True, limit - len(found), set(found))
+            return found
+
+    def _match(
+        self, groups: List[Set[str]], description: bool, limit: int, skip: Set[int]
+    ) -> List[int]:
+        # карточка подходит, если в её тексте есть термин из каждой группы
+        fields = (self._title, self._description) if description else (self._title,)
+        lists = [
+            [field[term] for field in fields for term in group if term in field]
+            for group in groups
+        ]
+        if not all(lists):
+            return []
+        order = sorted(range(len(groups)), key=lambda i: sum(map(len, lists[i])))
+        driver = _newest_first(lists[order[0]])
+        others = [(groups[i], lists[i]) for i in order[1:]]
+
+        found: List[int] = []
+        size = FIRST_CHUNK
+        while len(found) < limit:
+            chunk = list(islice(driver, size))
+            if not chunk:
+                break
+            size = min(size * 2, MAX_CHUNK)
+            candidates = set(chunk).difference(skip)
+            for group, postings in others:
+                if not candidates:
+                    break
+                candidates = self._filter(
+                    candidates, group, postings, chunk[-1], chunk[0], description
+                )
+            found += sorted(candidates, reverse=True)
+        return found[:limit]
+
+    def _filter(
+        self,
+        candidates: Set[int],
+        group: Set[str],
+        postings: List[List[int]],
+        low: int,
+        high: int,
+        description: bool,
+    ) -> Set[int]:
+        # кандидаты из диапазона [low, high], у которых есть термин группы
+        if len(postings) <= len(candidates):
+            bounds = [
+                (ids, bisect_left(ids, low), bisect_right(ids, high))
+                for ids in postings
+            ]
+            if sum(end - start for _, start, end in bounds) <= PROBE_COST * len(
+                candidates
+            ):
+                matched: Set[int] = set()
+                for ids, start, end in bounds:
+                    matched.update(ids[start:end])
+                return candidates & matched
+        if len(postings) <= MAX_PROBED_LISTS:
+            return {
+                card_id
+                for card_id in candidates
+                if any(_contains(ids, card_id) for ids in postings)
+            }
+        found = set()
+        for card_id in candidates:
+            title, text = self._docs[card_id]
+            terms = set(tokenize(title))
+            if description:
+                terms.update(tokenize(text))
+            if not terms.isdisjoint(group):
+                found.add(card_id)
+        return found
+
+    def _expand(self, prefix: str) -> List[str]:
+        # все термины с префиксом, как prefix* в FTS5: срез отсортированного словаря
+        start = bisect_left(self._terms, prefix)
+        return self._terms[start : bisect_left(self._terms, prefix + TERM_END, start)]
+
+    def _add(
+        self, postings: Dict[str, List[int]], card_id: int, text: Optional[str]
+    ) -> None:
+        for term in set(tokenize(text)):
+            ids = postings.get(term)
+            if ids is None:
+                postings[term] = [card_id]
+                if not self._known(term, postings):
+                    insort(self._terms, term)
+            elif ids[-1] < card_id:
+                ids.append(card_id)
+            else:
+                insort(ids, card_id)
+
+    def _remove(
+        self, postings: Dict[str, List[int]], card_id: int, text: Optional[str]
+    ) -> None:
+        for term in set(tokenize(text)):
+            ids = postings[term]
+            del ids[bisect_left(ids, card_id)]
+            if not ids:
+                del postings[term]
+                if not self._known(term, postings):
+                    del self._terms[bisect_left(self._terms, term)]
+
+    def _known(self, term: str, postings: Dict[str, List[int]]) -> bool:
+        # термин остаётся в словаре, пока встречается хотя бы в одном поле
+        other = self._description if postings is self._title else self._title
+        return term in other
@@ -0,0 +1,735 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..models.schemas import ColumnType
+from .base import BoardVersion, CardNotFoundError, CardStore, Delta
+from .ids import BlockIdAllocator
+from .ranking import rank_between, respread
+from .search import TERM_END, tokenize
+
+# Порядок в колонке задаётся разреженным рангом, как в хранилище в памяти:
+# перемещение меняет одну строку. order_idx считается COUNT по индексу
+# (column_name, rank) - это O(позиция), зато в цикле SQLite, а не в Python.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT,
+    column_name TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_cards_column_rank ON cards (column_name, rank);
+CREATE TABLE IF NOT EXISTS board_columns (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS board_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    number INTEGER NOT NULL,
+    modified_at TEXT NOT NULL,
+    horizon INTEGER NOT NULL DEFAULT 0,
+    epoch INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS card_tombstones (
+    version INTEGER PRIMARY KEY,
+    id INTEGER NOT NULL
+);
+"""
+# колонки, добавленные после первой версии схемы
+MIGRATIONS = [
+    ("cards", "version", "INTEGER NOT NULL DEFAULT 0"),
+    ("board_version", "horizon", "INTEGER NOT NULL DEFAULT 0"),
+    ("board_version", "epoch", "INTEGER NOT NULL DEFAULT 0"),
+]
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_cards_version ON cards (version);
+"""
+# полнотекстовый индекс поверх cards (external content): триггеры держат
+# его в той же транзакции, что и запись; префиксы 2-3 символа проиндексированы.
+# Более длинный префикс FTS5 раскрывает, сливая списки всех его терминов
+# целиком, поэтому он заменяется явным OR терминов из словаря search_terms.
+# Словарь только растёт: термин без карточек в OR ничего не находит.
+SEARCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_terms (term TEXT PRIMARY KEY) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS cards_fts USING fts5(
+    title, description,
+    content='cards', content_rowid='id',
+    prefix='2 3', tokenize='unicode61 remove_diacritics 0'
+);
+CREATE TRIGGER IF NOT EXISTS cards_fts_insert AFTER INSERT ON cards BEGIN
+    INSERT INTO cards_fts (rowid, title, description)
+    VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS cards_fts_delete AFTER DELETE ON cards BEGIN
+    INSERT INTO cards_fts (cards_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS cards_fts_update
+AFTER UPDATE OF title, description ON cards BEGIN
+    INSERT INTO cards_fts (cards_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO cards_fts (rowid, title, description)
+    VALUES (new.id, new.title, new.description);
+END;
+"""
+# длины префиксов из prefix='2 3' у cards_fts
+INDEXED_PREFIXES = (2, 3)
+# префикс с большим числом терминов ищется самим FTS5
+MAX_EXPANDED_TERMS = 64
+
+CARD_COLUMNS = "id, title, description, column_name, rank, created_at, updated_at"
+# колонка, в которой карточка находится во время перемещения
+DETACHED = ""
+
+
+def sqlite_path(database_url: str) -> str:
+    prefix = "sqlite:///"
+    if not database_url.startswith(prefix):
+        raise ValueError("Only sqlite:/// database URLs are supported")
+    return database_url[len(prefix) :]
+
+
+class ConnectionPool:
+    """Пул соединений SQLite в режиме WAL"""
+
+    def __init__(self, path: str, size: int = 5, timeout: float = 10.0):
+        self.timeout = timeout
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=size)
+        self._all: List[sqlite3.Connection] = []
+        # писатели одного процесса ждут друг друга здесь, а не в busy_timeout,
+        # где SQLite засыпает на миллисекунды
+        self._write_lock = threading.Lock()
+        for _ in range(size):
+            conn = sqlite3.connect(
+                path,
+                check_same_thread=False,
+                isolation_level=None,
+                cached_statements=256,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+            self._all.append(conn)
+            self._pool.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get(timeout=self.timeout)
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def transaction(
+        self, on_commit: Optional[Callable[[], None]] = None
+    ) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE сразу берёт блокировку записи, в том числе между процессами
+        with self._write_lock, self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            # ещё под блокировкой записи: уведомления идут в порядке коммитов
+            if on_commit is not None:
+                on_commit()
+
+    def close(self) -> None:
+        for conn in self._all:
+            conn.close()
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    for table, column, ddl in MIGRATIONS:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def _create_search_index(conn: sqlite3.Connection) -> None:
+    exists = {
+        name
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master"
+            " WHERE name IN ('cards_fts', 'search_terms')"
+        )
+    }
+    conn.executescript(SEARCH_SCHEMA)
+    if "cards_fts" not in exists:
+        # база создана до поиска - индексируем уже существующие карточки
+        conn.execute("INSERT INTO cards_fts (cards_fts) VALUES ('rebuild')")
+    if "search_terms" not in exists:
+        # словарь базы без него - один раз из самого индекса
+        conn.executescript(
+            """
+            CREATE VIRTUAL TABLE temp.cards_fts_vocab
+                USING fts5vocab(main, cards_fts, 'row');
+            INSERT OR IGNORE INTO search_terms SELECT term FROM cards_fts_vocab;
+            DROP TABLE temp.cards_fts_vocab;
+            """
+        )
+
+
+def _add_terms(conn: sqlite3.Connection, *texts: Optional[str]) -> None:
+    terms = {term for text in texts for term in tokenize(text)}
+    conn.executemany(
+        "INSERT OR IGNORE INTO search_terms (term) VALUES (?)",
+        [(term,) for term in terms],
+    )
+
+
+def _match_expression(words: List[str], expanded: Optional[List[str]]) -> str:
+    # слова - только буквы и цифры, кавычки в них не встречаются;
+    # expanded - термины последнего слова-префикса, None - искать через *
+    terms = [f'"{word}"' for word in words]
+    if expanded is None:
+        terms[-1] += "*"
+    else:
+        terms[-1] = "(" + " OR ".join(f'"{term}"' for term in expanded) + ")"
+    return "(" + " AND ".join(terms) + ")"
+
+
+def _row_to_card(row: tuple, order_idx: int) -> dict:
+    return {
+        "id": row[0],
+        "title": row[1],
+        "description": row[2],
+        "column": row[3],
+        "order_idx": order_idx,
+        "created_at": datetime.fromisoformat(row[5]),
+        "updated_at": datetime.fromisoformat(row[6]),
+    }
+
+
+class SQLiteCardStore(CardStore):
+    """Хранилище в файле SQLite с пулом соединений.
+
+    Журнал версий - столбец cards.version и таблица надгробий; надгробия
+    старше sync_log_size версий удаляются, граница сжатия - board_version.horizon.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        database_url: str,
+        pool_size: int = 5,
+        id_block_size: int = 0,
+        sync_log_size: int = 10_000,
+    ):
+        super().__init__()
+        self.sync_log_size = sync_log_size
+        self._pool = ConnectionPool(sqlite_path(database_url), size=pool_size)
+        # с id_block_size > 0 процесс берёт ID блоками из общего sqlite_sequence
+        # и не ждёт базу за каждым ID; иначе их выдаёт AUTOINCREMENT
+        self._id_allocator = None
+        if id_block_size > 0:
+            self._id_allocator = BlockIdAllocator(self._reserve_ids, id_block_size)
+        epoch = int(time.time())
+        with self._pool.connection() as conn:
+            conn.executescript(SCHEMA)
+            _migrate(conn)
+            conn.executescript(INDEXES)
+            _create_search_index(conn)
+            conn.executemany(
+                "INSERT OR IGNORE INTO board_columns (name) VALUES (?)",
+                [(c.value,) for c in ColumnType],
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO board_version"
+                " (id, number, modified_at, horizon, epoch) VALUES (1, 0, ?, 0, ?)",
+                (datetime.now().isoformat(), epoch),
+            )
+        with self._pool.transaction() as conn:
+            # доска без эпохи нумеровала версии от времени в наносекундах -
+            # это больше 2**53, и JSON-клиенты округляют номер. Нумерация
+            # начинается заново, старые since вне журнала получат снимок
+            if conn.execute(
+                "UPDATE board_version SET number = 1, horizon = 1, epoch = ?"
+                " WHERE epoch = 0 RETURNING 1",
+                (epoch,),
+            ).fetchone():
+                conn.execute("UPDATE cards SET version = 0")
+                conn.execute("DELETE FROM card_tombstones")
+
+    def get(self, card_id: int) -> Optional[dict]:
+        with self._pool.connection() as conn:
+            return self._get(conn, card_id)
+
+    def iter_cards(self, column: Optional[ColumnType] = None) -> Iterator[dict]:
+        after = None
+        while True:
+            cards, after = self.page(column=column, after=after, limit=1000)
+            yield from cards
+            if after is None:
+                return
+
+    def page(
+        self,
+        column: Optional[ColumnType] = None,
+        after: Optional[int] = None,
+        limit: int = 100,
+    ) -> Tuple[List[dict], Optional[int]]:
+        # ключ страницы - id или ранг внутри колонки
+        with self._pool.connection() as conn:
+            if column is None:
+                conn.execute("BEGIN")
+                try:
+                    rows = conn.execute(
+                        f"SELECT {CARD_COLUMNS} FROM cards"
+                        " WHERE id > ? ORDER BY id LIMIT ?",
+                        (after or 0, limit + 1),
+                    ).fetchall()
+                    cards = self._with_positions(conn, rows[:limit])
+                finally:
+                    conn.execute("COMMIT")
+            else:
+                column = ColumnType(column).value
+                rows = conn.execute(
+                    f"SELECT {CARD_COLUMNS} FROM cards"
+                    " WHERE column_name = ? AND rank > ? ORDER BY rank LIMIT ?",
+                    (column, after or 0, limit + 1),
+                ).fetchall()
+                start = self._position(conn, column, rows[0][4]) if rows else 0
+                cards = [
+                    _row_to_card(row, start + i) for i, row in enumerate(rows[:limit])
+                ]
+
+        if len(rows) <= limit:
+            return cards, None
+        last = rows[limit - 1]
+        return cards, last[0] if column is None else last[4]
+
+    def create(
+        self, title: str, description: Optional[str], column: ColumnType
+    ) -> dict:
+        return self.create_many(
+            [{"title": title, "description": description, "column": column}]
+        )[0]
+
+    def create_many(self, items: List[Dict[str, Any]]) -> List[dict]:
+        now = datetime.now().isoformat()
+        if self._id_allocator is not None:
+            ids = [self._id_allocator.next_id() for _ in items]
+        else:
+            ids = [None] * len(items)
+        with self._write() as (conn, events):
+            # у каждой карточки свой номер версии: last - len(items) + 1 .. last
+            version = self._touch(conn, len(items)) - len(items)
+            sizes = dict(conn.execute("SELECT name, size FROM board_columns"))
+            tails: Dict[str, Optional[int]] = {}
+            created = []
+            for card_id, item in zip(ids, items):
+                column = ColumnType(item["column"]).value
+                if column not in tails:
+                    tails[column] = self._tail_rank(conn, column)
+                tails[column] = rank_between(tails[column], None)
+                sizes[column] += 1
+                version += 1
+                _add_terms(conn, item["title"], item["description"])
+                cursor = conn.execute(
+                    "INSERT INTO cards (id, title, description, column_name, rank,"
+                    " created_at, updated_at, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        card_id,
+                        item["title"],
+                        item["description"],
+                        column,
+                        tails[column],
+                        now,
+                        now,
+                        version,
+                    ),
+                )
+                card = {
+                    "id": cursor.lastrowid,
+                    "title": item["title"],
+                    "description": item["description"],
+                    "column": column,
+                    "order_idx": sizes[column],
+                    "created_at": datetime.fromisoformat(now),
+                    "updated_at": datetime.fromisoformat(now),
+                }
+                created.append(card)
+                events.append(("created", card, None))
+            conn.executemany(
+                "UPDATE board_columns SET size = ? WHERE name = ?",
+                [(size, name) for name, size in sizes.items()],
+            )
+            return created
+
+    def update(self, card_id: int, changes: Dict[str, Any]) -> Optional[dict]:
+        with self._write() as (conn, events):
+            return self._update(conn, card_id, changes, events)
+
+    def update_many(self, updates: List[Tuple[int, Dict[str, Any]]]) -> List[dict]:
+        # исключение откатывает всю транзакцию
+        with self._write() as (conn, events):
+            cards = []
+            for card_id, changes in updates:
+                card = self._update(conn, card_id, changes, events)
+                if card is None:
+                    raise CardNotFoundError(card_id)
+                cards.append(card)
+            return cards
+
+    def delete(self, card_id: int) -> Optional[dict]:
+        with self._write() as (conn, events):
+            return self._delete(conn, card_id, events)
+
+    def delete_many(self, card_ids: List[int]) -> List[dict]:
+        with self._write() as (conn, events):
+            cards = []
+            for card_id in card_ids:
+                card = self._delete(conn, card_id, events)
+                if card is None:
+                    raise CardNotFoundError(card_id)
+                cards.append(card)
+            return cards
+
+    def count(self, column: Optional[ColumnType] = None) -> int:
+        with self._pool.connection() as conn:
+            if column is None:
+                row = conn.execute("SELECT SUM(size) FROM board_columns").fetchone()
+                return row[0] or 0
+            return self._size(conn, ColumnType(column).value)
+
+    def clear(self) -> None:
+        with self._pool.transaction() as conn:
+            conn.execute("DELETE FROM cards")
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'cards'")
+            conn.execute("UPDATE board_columns SET size = 0")
+            conn.execute("DELETE FROM card_tombstones")
+            number = self._touch(conn)
+            conn.execute("UPDATE board_version SET horizon = ?", (number,))
+        if self._id_allocator is not None:
+            self._id_allocator.reset()
+
+    def version(self) -> BoardVersion:
+        with self._pool.connection() as conn:
+            number, modified_at, epoch = conn.execute(
+                "SELECT number, modified_at, epoch FROM board_version"
+            ).fetchone()
+        return BoardVersion(number, datetime.fromisoformat(modified_at), epoch)
+
+    def changes_since(self, since: int, limit: Optional[int] = None) -> Delta:
+        # больше limit изменений - уже снимок: читаем на одну строку больше
+        cap = -1 if limit is None else limit + 1
+        with self._pool.connection() as conn:
+            # одна читающая транзакция - один снимок WAL для всех запросов
+            conn.execute("BEGIN")
+            try:
+                number, horizon = conn.execute(
+                    "SELECT number, horizon FROM board_version"
+                ).fetchone()
+                if not horizon <= since <= number:
+                    return Delta(number, [], [], True)
+                rows = conn.execute(
+                    f"SELECT {CARD_COLUMNS} FROM cards WHERE version > ?"
+                    " ORDER BY version LIMIT ?",
+                    (since, cap),
+                ).fetchall()
+                deleted = conn.execute(
+                    "SELECT id FROM card_tombstones WHERE version > ?"
+                    " ORDER BY version LIMIT ?",
+                    (since, cap),
+                ).fetchall()
+                if limit is not None and len(rows) + len(deleted) > limit:
+                    return Delta(number, [], [], True)
+                cards = self._with_positions(conn, rows)
+            finally:
+                conn.execute("COMMIT")
+        return Delta(number, cards, [card_id for (card_id,) in deleted], False)
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        words = tokenize(query)
+        if not words:
+            return []
+        with self._pool.connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                expanded = None
+                if len(words[-1]) not in INDEXED_PREFIXES:
+                    expanded = [
+                        term
+                        for (term,) in conn.execute(
+                            "SELECT term FROM search_terms"
+                            " WHERE term >= ? AND term < ? LIMIT ?",
+                            (words[-1], words[-1] + TERM_END, MAX_EXPANDED_TERMS + 1),
+                        )
+                    ]
+                    if not expanded:
+                        return []
+                    if len(expanded) > MAX_EXPANDED_TERMS:
+                        expanded = None
+                expression = _match_expression(words, expanded)
+                in_title = "{title} : " + expression
+                # ORDER BY rowid DESC FTS5 отдаёт по индексу, не собирая все совпадения
+                ids = [
+                    card_id
+                    for (card_id,) in conn.execute(
+                        "SELECT rowid FROM cards_fts WHERE cards_fts MATCH ?"
+                        " ORDER BY rowid DESC LIMIT ?",
+                        (in_title, limit),
+                    )
+                ]
+                if len(ids) < limit:
+                    ids += [
+                        card_id
+                        for (card_id,) in conn.execute(
+                            "SELECT rowid FROM cards_fts WHERE cards_fts MATCH ?"
+                            " ORDER BY rowid DESC LIMIT ?",
+                            (f"{expression} NOT {in_title}", limit - len(ids)),
+                        )
+                    ]
+                rows = conn.execute(
+                    f"SELECT {CARD_COLUMNS} FROM cards"
+                    f" WHERE id IN ({', '.join('?' * len(ids))})",
+                    ids,
+                ).fetchall()
+                cards = {card["id"]: card for card in self._with_positions(conn, rows)}
+            finally:
+                conn.execute("COMMIT")
+        return [cards[card_id] for card_id in ids]
+
+    def close(self) -> None:
+        self._pool.close()
+
+    @contextmanager
+    def _write(self) -> Iterator[Tuple[sqlite3.Connection, list]]:
+        # события копятся в транзакции и уходят слушателям только после коммита
+        events: List[Tuple[str, dict, Optional[dict]]] = []
+
+        def publish() -> None:
+            for event in events:
+                self._notify(*event)
+
+        with self._pool.transaction(publish if self._listeners else None) as conn:
+            yield conn, events
+
+    def _touch(self, conn: sqlite3.Connection, count: int = 1) -> int:
+        # номер общий для всех процессов и меняется в той же транзакции;
+        # возвращает последний из count новых номеров
+        return conn.execute(
+            "UPDATE board_version SET number = number + ?, modified_at = ?"
+            " RETURNING number",
+            (count, datetime.now().isoformat()),
+        ).fetchone()[0]
+
+    def _reserve_ids(self, count: int) -> int:
+        # общий с AUTOINCREMENT счётчик: ID не пересекаются ни между процессами,
+        # ни с карточками, созданными без блоков
+        with self._pool.transaction() as conn:
+            conn.execute(
+                "INSERT INTO sqlite_sequence (name, seq)"
+                " SELECT 'cards', (SELECT COALESCE(MAX(id), 0) FROM cards)"
+                " WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'cards')"
+            )
+            (last,) = conn.execute(
+                "UPDATE sqlite_sequence SET seq = seq + ? WHERE name = 'cards'"
+                " RETURNING seq",
+                (count,),
+            ).fetchone()
+        return last - count + 1
+
+    def _get(self, conn: sqlite3.Connection, card_id: int) -> Optional[dict]:
+        row = conn.execute(
+            f"SELECT {CARD_COLUMNS} FROM cards WHERE id = ?", (card_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return _row_to_card(row, self._position(conn, row[3], row[4]))
+
+    def _update(
+        self,
+        conn: sqlite3.Connection,
+        card_id: int,
+        changes: Dict[str, Any],
+        events: list,
+    ) -> Optional[dict]:
+        row = conn.execute(
+            "SELECT title, description, column_name, rank FROM cards WHERE id = ?",
+            (card_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        previous = self._get(conn, card_id) if self._listeners else None
+
+        title, description, old_column, rank = row
+        title = changes.get("title", title)
+        description = changes.get("description", description)
+        column = changes.get("column")
+        column = ColumnType(column).value if column is not None else old_column
+
+        target = changes.get("order_idx")
+        if column != old_column or target is not None:
+            conn.execute(
+                "UPDATE cards SET column_name = ? WHERE id = ?", (DETACHED, card_id)
+            )
+            self._resize(conn, old_column, -1)
+            size = self._size(conn, column)
+            pos = size if target is None else min(max(target, 1), size + 1) - 1
+            rank = self._rank_for(conn, column, pos, size)
+            self._resize(conn, column, 1)
+
+        if "title" in changes or "description" in changes:
+            _add_terms(conn, title, description)
+        conn.execute(
+            "UPDATE cards SET title = ?, description = ?, column_name = ?,"
+            " rank = ?, updated_at = ?, version = ? WHERE id = ?",
+            (
+                title,
+                description,
+                column,
+                rank,
+                datetime.now().isoformat(),
+                self._touch(conn),
+                card_id,
+            ),
+        )
+        card = self._get(conn, card_id)
+        events.append(("updated", card, previous))
+        return card
+
+    def _delete(
+        self, conn: sqlite3.Connection, card_id: int, events: list
+    ) -> Optional[dict]:
+        card = self._get(conn, card_id)
+        if card is None:
+            return None
+        conn.execute("DELETE FROM cards WHERE id = ?", (card_id,))
+        self._resize(conn, card["column"], -1)
+        version = self._touch(conn)
+        conn.execute(
+            "INSERT INTO card_tombstones (version, id) VALUES (?, ?)",
+            (version, card_id),
+        )
+        # сжатие: надгробия старше окна удаляются, граница журнала сдвигается
+        (compacted,) = conn.execute(
+            "SELECT MAX(version) FROM card_tombstones WHERE version <= ?",
+            (version - self.sync_log_size,),
+        ).fetchone()
+        if compacted is not None:
+            conn.execute("DELETE FROM card_tombstones WHERE version <= ?", (compacted,))
+            conn.execute("UPDATE board_version SET horizon = ?", (compacted,))
+        events.append(("deleted", card, None))
+        return card
+
+    def _position(self, conn: sqlite3.Connection, column: str, rank: int) -> int:
+        row = conn.execute(
+            "SELECT COUNT(*) FROM cards WHERE column_name = ? AND rank < ?",
+            (column, rank),
+        ).fetchone()
+        return row[0] + 1
+
+    def _with_positions(
+        self, conn: sqlite3.Connection, rows: List[tuple]
+    ) -> List[dict]:
+        """Карточки строк с order_idx; вызывается внутри читающей транзакции.
+
+        Позиции в колонке считаются проходом по индексу от ранга к рангу,
+        кроме самого длинного промежутка между ними (оценка по рангам - они
+        разрежены примерно равномерно): карточки до него отсчитываются от
+        начала колонки, после него - от конца по её размеру. Поиск отдаёт
+        новые карточки, а они в конце колонок, - их не считаем через всю
+        колонку.
+        """
+        positions: Dict[Tuple[str, int], int] = {}
+        for column in {row[3] for row in rows}:
+            ranks = sorted(row[4] for row in rows if row[3] == column)
+            # min() и max() по индексу - только в отдельных подзапросах
+            low, high = conn.execute(
+                "SELECT (SELECT MIN(rank) FROM cards WHERE column_name = ?),"
+                " (SELECT MAX(rank) FROM cards WHERE column_name = ?)",
+                (column, column),
+            ).fetchone()
+            edges = [low, *ranks, high]
+            gaps = [b - a for a, b in zip(edges, edges[1:])]
+            split = gaps.index(max(gaps))
+
+            head, tail = ranks[:split], ranks[split:]
+            if head:
+                pos = self._position(conn, column, head[0])
+                positions[(column, head[0])] = pos
+                for prev, rank in zip(head, head[1:]):
+                    pos += self._count_between(conn, column, prev, rank)
+                    positions[(column, rank)] = pos
+            if tail:
+                pos = (
+                    self._size(conn, column)
+                    - conn.execute(
+                        "SELECT COUNT(*) FROM cards WHERE column_name = ? AND rank > ?",
+                        (column, tail[-1]),
+                    ).fetchone()[0]
+                )
+                positions[(column, tail[-1])] = pos
+                for prev, rank in zip(tail[-2::-1], tail[::-1]):
+                    pos -= self._count_between(conn, column, prev, rank)
+                    positions[(column, prev)] = pos
+        return [_row_to_card(row, positions[(row[3], row[4])]) for row in rows]
+
+    def _count_between(
+        self, conn: sqlite3.Connection, column: str, low: int, high: int
+    ) -> int:
+        return conn.execute(
+            "SELECT COUNT(*) FROM cards"
+            " WHERE column_name = ? AND rank >= ? AND rank < ?",
+            (column, low, high),
+        ).fetchone()[0]
+
+    def _rank_at(self, conn: sqlite3.Connection, column: str, pos: int) -> int:
+        return conn.execute(
+            "SELECT rank FROM cards WHERE column_name = ? ORDER BY rank LIMIT 1 OFFSET ?",
+            (column, pos),
+        ).fetchone()[0]
+
+    def _tail_rank(self, conn: sqlite3.Connection, column: str) -> Optional[int]:
+        return conn.execute(
+            "SELECT MAX(rank) FROM cards WHERE column_name = ?", (column,)
+        ).fetchone()[0]
+
+    def _rank_for(
+        self, conn: sqlite3.Connection, column: str, pos: int, size: int
+    ) -> int:
+        # ранг для вставки на позицию pos (с нуля) колонки из size карточек
+        if pos == size:
+            return rank_between(self._tail_rank(conn, column), None)
+
+        lo = self._rank_at(conn, column, pos - 1) if pos > 0 else None
+        rank = rank_between(lo, self._rank_at(conn, column, pos))
+        if rank is not None:
+            return rank
+
+        # между соседями закончилось место - раздвигаем ближайшее окно
+        start, ranks = respread(lambda i: self._rank_at(conn, column, i), size, pos)
+        ids = conn.execute(
+            "SELECT id FROM cards WHERE column_name = ? ORDER BY rank LIMIT ? OFFSET ?",
+            (column, len(ranks), start),
+        ).fetchall()
+        conn.executemany(
+            "UPDATE cards SET rank = ? WHERE id = ?",
+            [(new_rank, card_id) for new_rank, (card_id,) in zip(ranks, ids)],
+        )
+        lo = self._rank_at(conn, column, pos - 1) if pos > 0 else None
+        return rank_between(lo, self._rank_at(conn, column, pos))
+
+    def _size(self, conn: sqlite3.Connection, column: str) -> int:
+        return conn.execute(
+            "SELECT size FROM board_columns WHERE name = ?", (column,)
+        ).fetchone()[0]
+
+    def _resize(self, conn: sqlite3.Connection, column: str, delta: int) -> None:
+        conn.execute(
+            "UPDATE board_columns SET size = size + ? WHERE name = ?", (delta, column)
+        )
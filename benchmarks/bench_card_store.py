@@ -0,0 +1,65 @@
+"""Задержка операций хранилища карточек в зависимости от размера доски.
+
+Запуск: python -m benchmarks.bench_card_store [max_size]
+"""
+
+import random
+import sys
+import time
+
+from app.models.schemas import ColumnType
+from app.store.memory import InMemoryCardStore
+
+COLUMNS = [c.value for c in ColumnType]
+OPS = 2000
+
+
+def _per_op_us(fn, n=OPS) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def bench(size: int) -> dict:
+    store = InMemoryCardStore()
+    for i in range(size):
+        store.create(f"Card {i}", None, COLUMNS[i % len(COLUMNS)])
+
+    rnd = random.Random(42)
+    ids = [rnd.randint(1, size) for _ in range(OPS)]
+    it = iter(ids)
+
+    result = {"get": _per_op_us(lambda: store.get(next(it)))}
+
+    created = []
+    result["create"] = _per_op_us(
+        lambda: created.append(store.create("bench", None, "todo"))
+    )
+
+    moving = iter(reversed(created))
+    result["move"] = _per_op_us(
+        lambda: store.update(next(moving)["id"], {"column": "done", "order_idx": 1})
+    )
+
+    deleting = iter(created)
+    result["delete"] = _per_op_us(lambda: store.delete(next(deleting)["id"]))
+    return result
+
+
+def main(max_size: int = 1_000_000) -> None:
+    print(
+        f"{'cards':>10} {'get, us':>10} {'create, us':>11} {'move, us':>10} {'delete, us':>11}"
+    )
+    size = 100
+    while size <= max_size:
+        r = bench(size)
+        print(
+            f"{size:>10} {r['get']:>10.2f} {r['create']:>11.2f}"
+            f" {r['move']:>10.2f} {r['delete']:>11.2f}"
+        )
+        size *= 10
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
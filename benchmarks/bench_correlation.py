@@ -0,0 +1,106 @@
+"""Накладные расходы middleware correlation ID.
+
+Запросы идут прямо в ASGI-приложение, без сети и сервера, поэтому
+разница в запросах в секунду - это стоимость самого middleware.
+"до" - прежний @app.middleware("http") (BaseHTTPMiddleware) с uuid4,
+"после" - CorrelationIdMiddleware с разными схемами ID.
+
+Запуск: python -m benchmarks.bench_correlation [requests]
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+
+from app.correlation import ID_SCHEMES, CorrelationIdMiddleware
+
+ROUNDS = 5
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+
+def _legacy_app() -> FastAPI:
+    app = _app()
+
+    @app.middleware("http")
+    async def add_correlation_id(request: Request, call_next):
+        correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
+        request.state.correlation_id = correlation_id
+        response = await call_next(request)
+        response.headers["X-Correlation-ID"] = correlation_id
+        return response
+
+    return app
+
+
+def _scheme_app(scheme: str) -> FastAPI:
+    app = _app()
+    app.add_middleware(CorrelationIdMiddleware, scheme=scheme)
+    return app
+
+
+async def _rps(app, requests: int, headers: list) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/health",
+        "raw_path": b"/health",
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+    # лучший из нескольких замеров: меньше влияние шума планировщика
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(requests):
+            await app(dict(scope), receive, send)
+        best = min(best, time.perf_counter() - start)
+    return requests / best
+
+
+async def bench(requests: int) -> None:
+    cases = [("no middleware", _app()), ("BaseHTTPMiddleware", _legacy_app())]
+    cases += [(f"ASGI, {scheme}", _scheme_app(scheme)) for scheme in ID_SCHEMES]
+
+    print(f"{'middleware':>20} {'header':>7} {'req/s':>9} {'overhead, us':>13}")
+    for with_header in (False, True):
+        headers = [(b"x-correlation-id", b"client-id")] if with_header else []
+        base = None
+        for name, app in cases:
+            rps = await _rps(app, requests, headers)
+            base = base or rps
+            overhead = (1 / rps - 1 / base) * 1e6
+            print(
+                f"{name:>20} {'yes' if with_header else 'no':>7}"
+                f" {rps:>9.0f} {overhead:>13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
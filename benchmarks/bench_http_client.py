@@ -0,0 +1,101 @@
+"""Пропускная способность исходящих запросов при 1000 одновременных вызовов.
+
+Upstream - локальный HTTP/1.1-сервер на asyncio с keep-alive, который
+отвечает через UPSTREAM_DELAY секунд. Сравниваются:
+- новый клиент на каждый вызов (новое соединение каждый раз);
+- прежний общий httpx-клиент (10 соединений, очередь в пуле httpcore);
+- SecureHTTPClient с теми же лимитами и своей очередью;
+- общий клиент UpstreamClients с пулом 100 соединений;
+- он же с объединением одинаковых запросов (single-flight): все вызовы
+  здесь одинаковые, поэтому upstream видит по одному запросу на волну.
+
+Два первых случая с SecureHTTPClient работают без объединения, чтобы
+сравнивались пулы, а не число запросов к upstream.
+
+HTTP/2 здесь не измеряется: он работает только по TLS и требует пакета h2.
+
+Запуск: python -m benchmarks.bench_http_client [calls]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+
+import httpx
+
+from app.security.http_client import SecureHTTPClient, UpstreamClients
+
+UPSTREAM_DELAY = 0.05
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n"
+    b"Content-Type: application/json\r\n\r\n{}"
+)
+
+
+async def _handle(reader, writer):
+    try:
+        while await reader.readuntil(b"\r\n\r\n"):
+            await asyncio.sleep(UPSTREAM_DELAY)
+            writer.write(RESPONSE)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    writer.close()
+
+
+async def _per_call(url: str) -> int:
+    async with httpx.AsyncClient() as client:
+        return await _raw_status(client, url)
+
+
+async def _run(name: str, calls: int, call) -> None:
+    start = time.perf_counter()
+    results = await asyncio.gather(*(call() for _ in range(calls)))
+    elapsed = time.perf_counter() - start
+    ok = sum(1 for status in results if status == 200)
+    print(f"{name:>28}: {calls / elapsed:>7.0f} calls/s, {ok}/{calls} ok")
+
+
+async def bench(calls: int) -> None:
+    # таймауты пула видны по числу успешных вызовов
+    logging.getLogger("app.security.http_client").setLevel(logging.ERROR)
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0, backlog=4096)
+    base = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+    await _run("client per call", calls, lambda: _per_call(f"{base}/ideas"))
+
+    limits = httpx.Limits(max_keepalive_connections=5, max_connections=10)
+    async with httpx.AsyncClient(base_url=base, limits=limits) as legacy:
+        for name in ("httpx pool, 10", "httpx pool, 10, warm"):
+            await _run(name, calls, lambda: _raw_status(legacy))
+
+    cases = [("SecureHTTPClient, 10", SecureHTTPClient(base_url=base, coalesce=False))]
+    clients = UpstreamClients(max_connections=100, coalesce=False)
+    cases.append(("UpstreamClients, 100", clients.get(base)))
+    clients = UpstreamClients(max_connections=100)
+    cases.append(("single-flight, 100", clients.get(base)))
+    for name, client in cases:
+        await _run(name, calls, lambda: _status(client))
+        await _run(f"{name}, warm", calls, lambda: _status(client))
+        print(f"{'':>28}  {client.stats()}")
+        await client.close()
+
+    server.close()
+    await server.wait_closed()
+
+
+async def _raw_status(client: httpx.AsyncClient, url: str = "/ideas") -> int:
+    # без ретраев SecureHTTPClient таймаут - просто неуспешный вызов
+    try:
+        return (await client.get(url)).status_code
+    except httpx.TimeoutException:
+        return 0
+
+
+async def _status(client: SecureHTTPClient) -> int:
+    return (await client.get("/ideas")).status_code
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
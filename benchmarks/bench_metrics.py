@@ -0,0 +1,101 @@
+"""Стоимость метрик на горячем пути.
+
+1. Counter.inc и Histogram.observe: один поток и четыре потока сразу
+   (запись без блокировок, у каждого потока свой словарь).
+2. Полный путь через ASGI-приложение без сети: GET /cards/{card_id} с
+   MetricsMiddleware и без него.
+
+Запуск: python -m benchmarks.bench_metrics [requests]
+"""
+
+import asyncio
+import sys
+import threading
+import time
+
+from fastapi import FastAPI
+
+from app.metrics import Counter, Histogram, MetricsMiddleware
+
+ROUNDS = 5
+
+
+def _call_us(fn, calls: int, threads: int = 1) -> float:
+    def work():
+        for _ in range(calls):
+            fn()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (calls * threads) * 1e6
+
+
+def _app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/cards/{card_id}")
+    async def card(card_id: int):
+        return {"id": card_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def _request_us(app, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/cards/1",
+        "raw_path": b"/cards/1",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "client": ("10.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(requests):
+            await app(dict(scope), receive, send)
+        best = min(best, time.perf_counter() - start)
+    return best / requests * 1e6
+
+
+async def bench(requests: int) -> None:
+    counter = Counter("bench_total", "Bench", ("route",))
+    histogram = Histogram("bench_seconds", "Bench", ("route",))
+    labels = ("/cards/{card_id}",)
+    for threads in (1, 4):
+        inc = _call_us(lambda: counter.inc(labels), 200_000, threads)
+        observe = _call_us(lambda: histogram.observe(0.003, labels), 200_000, threads)
+        print(f"{threads} thread(s): inc {inc:.2f} us, observe {observe:.2f} us")
+
+    plain = await _request_us(_app(False), requests)
+    instrumented = await _request_us(_app(True), requests)
+    print(f"request without metrics:    {plain:.1f} us")
+    print(
+        f"request with metrics:       {instrumented:.1f} us"
+        f" (+{instrumented - plain:.1f} us)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,97 @@
+"""Стоимость лимита запросов (NFR-05) на запрос.
+
+1. hit() бэкенда в памяти: один IP и 1M разных IP при заполненной таблице
+   (каждый запрос вытесняет самый давний ключ).
+2. Полный путь через ASGI-приложение без сети: GET /cards/x с
+   RateLimitMiddleware и без него; лимит не срабатывает.
+
+Цель - меньше 20 мкс на запрос.
+
+Запуск: python -m benchmarks.bench_rate_limit [requests]
+"""
+
+import asyncio
+import sys
+import time
+
+from fastapi import FastAPI
+
+from app.ratelimit import MemoryRateLimitBackend, RateLimiter, RateLimitMiddleware
+
+ROUNDS = 5
+
+
+def _hit_us(backend, keys: list) -> float:
+    limiter = RateLimiter(per_minute=10**9, backend=backend)
+    hit, interval, tolerance = backend.hit, limiter.interval, limiter.tolerance
+    start = time.perf_counter()
+    for key in keys:
+        hit(key, interval, tolerance)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def _app(limited: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/cards/x")
+    async def card():
+        return {"status": "ok"}
+
+    if limited:
+        app.add_middleware(
+            RateLimitMiddleware,
+            limiter=RateLimiter(per_minute=10**9),
+            reject=lambda scope, retry_after: None,
+        )
+    return app
+
+
+async def _request_us(app, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/cards/x",
+        "raw_path": b"/cards/x",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "client": ("10.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(requests):
+            await app(dict(scope), receive, send)
+        best = min(best, time.perf_counter() - start)
+    return best / requests * 1e6
+
+
+async def bench(requests: int) -> None:
+    one_ip = ["10.0.0.1"] * requests
+    many_ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(10**6)]
+    single = _hit_us(MemoryRateLimitBackend(), one_ip)
+    evicting = _hit_us(MemoryRateLimitBackend(max_keys=100_000), many_ips)
+    print(f"hit(), one IP:              {single:.2f} us")
+    print(f"hit(), 1M IPs, 100k table:  {evicting:.2f} us")
+
+    plain = await _request_us(_app(False), requests)
+    limited = await _request_us(_app(True), requests)
+    print(f"request without limiter:    {plain:.1f} us")
+    print(f"request with limiter:       {limited:.1f} us (+{limited - plain:.1f} us)")
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
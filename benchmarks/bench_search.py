@@ -0,0 +1,113 @@
+"""Задержка полнотекстового поиска по большой доске.
+
+Заголовки и описания - случайные слова из словаря с распределением Ципфа:
+частые слова встречаются в сотнях тысяч карточек, редкие - в единицах.
+Запросы: два слова из одной карточки, префикс, самое частое слово и пара
+случайных слов (обычно без общих карточек - худший случай для обхода).
+
+Запуск: python -m benchmarks.bench_search [cards] [memory|sqlite]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from itertools import accumulate
+from pathlib import Path
+
+from app.models.schemas import ColumnType
+from app.store.memory import InMemoryCardStore
+from app.store.sqlite import SQLiteCardStore
+
+COLUMNS = [c.value for c in ColumnType]
+SYLLABLES = ["ka", "ro", "mi", "te", "su", "lo", "va", "ni", "de", "po", "zu", "ba"]
+VOCABULARY = 20_000
+BATCH = 10_000
+QUERIES = 200
+LIMIT = 20
+
+
+def _vocabulary(rnd: random.Random) -> list:
+    words = set()
+    while len(words) < VOCABULARY:
+        words.add("".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))))
+    return sorted(words, key=lambda _: rnd.random())
+
+
+def _fill(store, cards: int, rnd: random.Random, words: list) -> list:
+    # накопленные веса считаются один раз, иначе choices пересчитывает их на вызов
+    weights = list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    titles = []
+    for start in range(0, cards, BATCH):
+        items = []
+        for i in range(start, min(start + BATCH, cards)):
+            title = " ".join(
+                rnd.choices(words, cum_weights=weights, k=rnd.randint(2, 5))
+            )
+            description = " ".join(
+                rnd.choices(words, cum_weights=weights, k=rnd.randint(0, 12))
+            )
+            items.append(
+                {
+                    "title": title,
+                    "description": description or None,
+                    "column": COLUMNS[i % len(COLUMNS)],
+                }
+            )
+            titles.append(title)
+        store.create_many(items)
+    return titles
+
+
+def _queries(rnd: random.Random, words: list, titles: list) -> dict:
+    pairs = []
+    for _ in range(QUERIES):
+        title = rnd.choice(titles).split()
+        pairs.append(" ".join(rnd.sample(title, 2)))
+    return {
+        "two words": pairs,
+        "prefix": [rnd.choice(words)[:3] for _ in range(QUERIES)],
+        "word + prefix": [q[: len(q) - 2] for q in pairs],
+        "common word": [words[0]] * QUERIES,
+        "random pair": [" ".join(rnd.sample(words, 2)) for _ in range(QUERIES)],
+    }
+
+
+def bench(name: str, store, cards: int) -> None:
+    rnd = random.Random(16)
+    words = _vocabulary(rnd)
+    start = time.perf_counter()
+    titles = _fill(store, cards, rnd, words)
+    print(f"{name}: {cards} cards indexed in {time.perf_counter() - start:.1f} s")
+
+    print(f"{'query':>14} {'p50, ms':>9} {'p99, ms':>9} {'max, ms':>9} {'hits':>6}")
+    for kind, queries in _queries(rnd, words, titles).items():
+        latencies, hits = [], 0
+        for query in queries:
+            start = time.perf_counter()
+            hits += len(store.search(query, LIMIT))
+            latencies.append((time.perf_counter() - start) * 1e3)
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(
+            f"{kind:>14} {p50:>9.2f} {p99:>9.2f} {latencies[-1]:>9.2f}"
+            f" {hits / len(queries):>6.1f}"
+        )
+
+
+def main(cards: int = 1_000_000, backend: str = "memory") -> None:
+    if backend == "memory":
+        bench(backend, InMemoryCardStore(), cards)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteCardStore(f"sqlite:///{Path(tmp) / 'bench.db'}", pool_size=1)
+        bench(backend, store, cards)
+        store.close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        sys.argv[2] if len(sys.argv) > 2 else "memory",
+    )
@@ -0,0 +1,90 @@
+"""Процессорное время сериализации ответов: response_model против orjson.
+
+"до" - путь FastAPI для обработчика с response_model: валидация через
+CardResponse, jsonable-представление и json.dumps в JSONResponse.
+"после" - готовые словари хранилища сразу в orjson.
+
+Запуск: python -m benchmarks.bench_serialization [page_size]
+"""
+
+import asyncio
+import sys
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models.schemas import CardResponse
+from app.store.memory import InMemoryCardStore
+
+ROUNDS = 2000
+
+
+def _problem(index: int) -> dict:
+    return {
+        "type": "https://example.com/problems/not-found",
+        "title": "Resource not found",
+        "status": 404,
+        "detail": "Card not found",
+        "correlation_id": f"corr-{index}",
+        "instance": f"/errors/{index}",
+    }
+
+
+async def _cpu_us(render, rounds: int = ROUNDS) -> float:
+    # process_time: только время процессора, без ожиданий
+    start = time.process_time()
+    for i in range(rounds):
+        await render(i)
+    return (time.process_time() - start) / rounds * 1e6
+
+
+async def bench(page_size: int) -> None:
+    store = InMemoryCardStore()
+    store.create_many(
+        [
+            {"title": f"Card {i}", "description": "text", "column": "todo"}
+            for i in range(page_size)
+        ]
+    )
+    cards, _ = store.page(limit=page_size)
+    card = cards[0]
+    page_field = create_response_field("page", List[CardResponse])
+    card_field = create_response_field("card", CardResponse)
+
+    async def page_before(_):
+        content = await serialize_response(field=page_field, response_content=cards)
+        return JSONResponse(content).body
+
+    async def page_after(_):
+        return ORJSONResponse(cards).body
+
+    async def card_before(_):
+        content = await serialize_response(field=card_field, response_content=card)
+        return JSONResponse(content).body
+
+    async def card_after(_):
+        return ORJSONResponse(card).body
+
+    async def problem_before(i):
+        return JSONResponse(_problem(i), media_type="application/problem+json").body
+
+    async def problem_after(i):
+        return ORJSONResponse(_problem(i), media_type="application/problem+json").body
+
+    print(f"{'response':>22} {'before, us':>11} {'after, us':>10} {'speedup':>8}")
+    cases = [
+        (f"GET /cards ({page_size})", page_before, page_after),
+        ("GET /cards/{id}", card_before, card_after),
+        ("problem+json", problem_before, problem_after),
+    ]
+    for name, before, after in cases:
+        slow = await _cpu_us(before)
+        fast = await _cpu_us(after)
+        print(f"{name:>22} {slow:>11.1f} {fast:>10.1f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100))
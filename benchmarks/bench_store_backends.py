@@ -0,0 +1,75 @@
+"""Сравнение хранилищ карточек под конкурентной нагрузкой.
+
+Смешанная нагрузка: 70% чтений, 20% созданий, 10% перемещений.
+Оба хранилища потокобезопасны: в памяти - блокировки на колонку,
+в SQLite - транзакции и пул соединений.
+
+Запуск: python -m benchmarks.bench_store_backends [threads] [ops_per_thread]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.models.schemas import ColumnType
+from app.store.memory import InMemoryCardStore
+from app.store.sqlite import SQLiteCardStore
+
+COLUMNS = [c.value for c in ColumnType]
+PRELOAD = 10_000
+
+
+def _worker(store, ops: int, seed: int) -> list:
+    rnd = random.Random(seed)
+    latencies = []
+    for _ in range(ops):
+        op = rnd.random()
+        start = time.perf_counter()
+        if op < 0.7:
+            store.get(rnd.randint(1, PRELOAD))
+        elif op < 0.9:
+            store.create("bench", None, rnd.choice(COLUMNS))
+        else:
+            store.update(
+                rnd.randint(1, PRELOAD),
+                {"column": rnd.choice(COLUMNS), "order_idx": rnd.randint(1, 100)},
+            )
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench(name: str, store, threads: int, ops: int) -> None:
+    store.create_many(
+        [
+            {"title": f"Card {i}", "description": None, "column": COLUMNS[i % 4]}
+            for i in range(PRELOAD)
+        ]
+    )
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = pool.map(lambda i: _worker(store, ops, i), range(threads))
+        latencies = sorted(lat for result in results for lat in result)
+    elapsed = time.perf_counter() - start
+
+    p50 = latencies[len(latencies) // 2] * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    print(f"{name:>8} {len(latencies) / elapsed:>12.0f} {p50:>10.1f} {p99:>10.1f}")
+
+
+def main(threads: int = 8, ops: int = 2000) -> None:
+    print(f"{'store':>8} {'ops/s':>12} {'p50, us':>10} {'p99, us':>10}")
+    bench("memory", InMemoryCardStore(), threads, ops)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteCardStore(
+            f"sqlite:///{Path(tmp) / 'bench.db'}", pool_size=threads
+        )
+        bench("sqlite", store, threads, ops)
+        store.close()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*args)
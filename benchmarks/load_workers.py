@@ -0,0 +1,114 @@
+"""Нагрузочный тест: пропускная способность API от числа процессов uvicorn.
+
+Для каждого числа процессов поднимает `python -m app.serve` на общей базе
+SQLite и гоняет смешанную нагрузку (90% чтений, 10% созданий) из
+нескольких сотен конкурентных соединений.
+
+Запуск: python -m benchmarks.load_workers [max_workers] [seconds]
+"""
+
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+CONCURRENCY = 256
+PRELOAD = 1000
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_ready(base_url: str) -> None:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(100):
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def _load(base_url: str, seconds: float) -> float:
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        await client.post(
+            "/cards:batch",
+            json={
+                "items": [
+                    {"title": f"Card {i}", "column": "todo"} for i in range(PRELOAD)
+                ]
+            },
+        )
+        done = 0
+        deadline = time.perf_counter() + seconds
+
+        async def user(seed: int) -> None:
+            nonlocal done
+            rnd = random.Random(seed)
+            while time.perf_counter() < deadline:
+                if rnd.random() < 0.9:
+                    await client.get(f"/cards/{rnd.randint(1, PRELOAD)}")
+                else:
+                    await client.post(
+                        "/cards", json={"title": "load", "column": "done"}
+                    )
+                done += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(i) for i in range(CONCURRENCY)))
+        return done / (time.perf_counter() - start)
+
+
+def run(workers: int, seconds: float) -> float:
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            CARD_STORE="sqlite",
+            DATABASE_URL=f"sqlite:///{Path(tmp) / 'load.db'}",
+            WEB_CONCURRENCY=str(workers),
+            PORT=str(port),
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "app.serve"],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            asyncio.run(_wait_ready(base_url))
+            return asyncio.run(_load(base_url, seconds))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main(max_workers: int = 8, seconds: float = 10.0) -> None:
+    print(f"cpus: {os.cpu_count()}")
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8}")
+    baseline = None
+    workers = 1
+    while workers <= max_workers:
+        rps = run(workers, seconds)
+        baseline = baseline or rps
+        print(f"{workers:>8} {rps:>10.0f} {rps / baseline:>8.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:3]
+    main(int(args[0]) if args else 8, float(args[1]) if len(args) > 1 else 10.0)
@@ -12,11 +12,18 @@ if str(ROOT) not in sys.path:
 
 
 @pytest.fixture(autouse=True)
-def reset_database():
+def reset_database(monkeypatch):
     # сбрасываем бд перед каждым тестом
-    from app.main import _DB
-
-    _DB["cards"] = []
+    from app.main import _CACHE, _RATE_LIMITER, _STORE
+
+    _STORE.store.clear()
+    _CACHE.clear()
+    # лимит NFR-05 общий для всех запросов TestClient (один IP)
+    if _RATE_LIMITER is not None:
+        _RATE_LIMITER.backend.clear()
+        # тесты шлют десятки запросов подряд: всплеск - на минуту вперёд,
+        # сам лимит проверяется в test_ratelimit.py
+        monkeypatch.setattr(_RATE_LIMITER, "tolerance", 60.0)
     yield
 
 
@@ -25,3 +32,14 @@ def client():
     from app.main import app
 
     return TestClient(app)
+
+
+@pytest.fixture
+def create_card(client):
+    """Создать карточку через POST /cards и вернуть её JSON"""
+
+    def create(title, column="todo", description=None):
+        body = {"title": title, "column": column, "description": description}
+        return client.post("/cards", json=body).json()
+
+    return create
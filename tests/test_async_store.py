@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+from app.store.async_store import AsyncCardStore
+from app.store.memory import InMemoryCardStore
+from app.store.sqlite import SQLiteCardStore
+
+
+def test_memory_store_runs_in_event_loop():
+    """Тест вызова хранилища в памяти без переключения потоков"""
+    store = InMemoryCardStore()
+    threads = []
+    original = store.create
+
+    def create(*args):
+        threads.append(threading.current_thread())
+        return original(*args)
+
+    store.create = create
+    cards = AsyncCardStore(store)
+
+    async def run():
+        await cards.create("Card", None, "todo")
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+    assert threads == [loop_thread]
+    cards.close()
+
+
+def test_sqlite_store_concurrent_requests(tmp_path):
+    """Тест конкурентных запросов к SQLite через собственный пул потоков"""
+    cards = AsyncCardStore(
+        SQLiteCardStore(f"sqlite:///{tmp_path / 'cards.db'}", pool_size=4),
+        max_workers=4,
+    )
+
+    async def run():
+        created = await asyncio.gather(
+            *(cards.create(f"Card {i}", None, "todo") for i in range(200))
+        )
+        fetched = await asyncio.gather(*(cards.get(card["id"]) for card in created))
+        return created, fetched
+
+    created, fetched = asyncio.run(run())
+    assert len({card["id"] for card in created}) == 200
+    assert sorted(card["order_idx"] for card in fetched) == list(range(1, 201))
+    assert asyncio.run(cards.count("todo")) == 200
+    cards.close()
@@ -0,0 +1,124 @@
+def _batch(client, method, json):
+    return client.request(method, "/cards:batch", json=json)
+
+
+def test_batch_create_assigns_order_per_column(client):
+    """Тест пакетного создания с order_idx по колонкам"""
+    client.post("/cards", json={"title": "Existing", "column": "todo"})
+
+    r = _batch(
+        client,
+        "POST",
+        {
+            "items": [
+                {"title": "A", "column": "todo"},
+                {"title": "B", "column": "done"},
+                {"title": "C", "column": "todo", "description": "  text  "},
+            ]
+        },
+    )
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [item["index"] for item in results] == [0, 1, 2]
+    assert [item["card"]["order_idx"] for item in results] == [2, 1, 3]
+    assert results[2]["card"]["description"] == "text"
+
+    r = client.get("/cards", params={"column": "todo"})
+    assert [card["title"] for card in r.json()] == ["Existing", "A", "C"]
+
+
+def test_batch_create_is_atomic(client):
+    """Тест отказа всего пакета при ошибке в одном элементе"""
+    r = _batch(
+        client,
+        "POST",
+        {
+            "items": [
+                {"title": "Valid", "column": "todo"},
+                {"title": "", "column": "todo"},
+                {"title": "Bad column", "column": "nowhere"},
+            ]
+        },
+    )
+    assert r.status_code == 422
+    assert r.headers["content-type"] == "application/problem+json"
+    body = r.json()
+    assert "correlation_id" in body
+    assert [error["index"] for error in body["errors"]] == [1, 2]
+    assert all(error["status"] == 422 for error in body["errors"])
+    assert client.get("/cards").json() == []
+
+
+def test_batch_update(client):
+    """Тест пакетного обновления и перемещения"""
+    ids = [
+        client.post("/cards", json={"title": f"Card {i}", "column": "todo"}).json()[
+            "id"
+        ]
+        for i in range(3)
+    ]
+
+    r = _batch(
+        client,
+        "PATCH",
+        {
+            "items": [
+                {"id": ids[0], "title": "Renamed"},
+                {"id": ids[2], "order_idx": 1},
+            ]
+        },
+    )
+    assert r.status_code == 200
+    cards = [item["card"] for item in r.json()["results"]]
+    assert cards[0]["title"] == "Renamed"
+    assert cards[1]["order_idx"] == 1
+
+
+def test_batch_update_not_found_applies_nothing(client):
+    """Тест 404 по элементу пакета без частичного применения"""
+    card_id = client.post("/cards", json={"title": "Card", "column": "todo"}).json()[
+        "id"
+    ]
+
+    r = _batch(
+        client,
+        "PATCH",
+        {"items": [{"id": card_id, "title": "Changed"}, {"id": 999, "title": "X"}]},
+    )
+    assert r.status_code == 404
+    assert r.json()["errors"] == [
+        {
+            "index": 1,
+            "status": 404,
+            "title": "Requested resource not found",
+            "detail": "Card not found",
+        }
+    ]
+    assert client.get(f"/cards/{card_id}").json()["title"] == "Card"
+
+
+def test_batch_delete(client):
+    """Тест пакетного удаления и дубликатов ID"""
+    ids = [
+        client.post("/cards", json={"title": f"Card {i}", "column": "todo"}).json()[
+            "id"
+        ]
+        for i in range(3)
+    ]
+
+    r = _batch(client, "DELETE", {"ids": [ids[0], ids[0]]})
+    assert r.status_code == 422
+    assert r.json()["errors"][0]["index"] == 1
+
+    r = _batch(client, "DELETE", {"ids": [ids[0], ids[2]]})
+    assert r.status_code == 200
+    assert [item["id"] for item in r.json()["results"]] == [ids[0], ids[2]]
+    remaining = client.get("/cards").json()
+    assert [(card["id"], card["order_idx"]) for card in remaining] == [(ids[1], 1)]
+
+
+def test_batch_size_limit(client):
+    """Тест ограничения размера пакета"""
+    items = [{"title": "Card", "column": "todo"}] * 1001
+    assert _batch(client, "POST", {"items": items}).status_code == 422
+    assert _batch(client, "POST", {"items": []}).status_code == 422
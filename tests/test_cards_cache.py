@@ -0,0 +1,71 @@
+from app.cache import ENTRY_OVERHEAD, CachedBody, ResponseCache
+
+
+def test_get_cards_served_from_cache_until_write(client, create_card):
+    """Тест кэша списка: повторный запрос - из кэша, создание сбрасывает"""
+    create_card("First")
+    first = client.get("/cards", params={"limit": 1})
+    assert first.headers["X-Cache"] == "MISS"
+
+    second = client.get("/cards", params={"limit": 1})
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.content == first.content
+
+    create_card("Second")
+    r = client.get("/cards")
+    assert r.headers["X-Cache"] == "MISS"
+    assert [card["title"] for card in r.json()] == ["First", "Second"]
+    assert client.get("/cards", params={"limit": 1}).headers["X-Next-Cursor"]
+
+
+def test_card_cache_invalidated_precisely(client, create_card):
+    """Тест точечного сброса: правка текста не трогает соседей, перенос - трогает"""
+    first = create_card("First")
+    second = create_card("Second")
+    other = create_card("Other", "done")
+    for card in (first, second, other):
+        client.get(f"/cards/{card['id']}")
+
+    client.patch(f"/cards/{first['id']}", json={"title": "Renamed"})
+    r = client.get(f"/cards/{first['id']}")
+    assert (r.headers["X-Cache"], r.json()["title"]) == ("MISS", "Renamed")
+    assert client.get(f"/cards/{second['id']}").headers["X-Cache"] == "HIT"
+
+    client.patch(f"/cards/{second['id']}", json={"order_idx": 1})
+    r = client.get(f"/cards/{first['id']}")
+    assert (r.headers["X-Cache"], r.json()["order_idx"]) == ("MISS", 2)
+    assert client.get(f"/cards/{other['id']}").headers["X-Cache"] == "HIT"
+
+    client.delete(f"/cards/{second['id']}")
+    assert client.get(f"/cards/{first['id']}").json()["order_idx"] == 1
+    assert client.get(f"/cards/{second['id']}").status_code == 404
+
+
+def test_response_cache_lru_budget():
+    """Тест вытеснения по бюджету байт и счётчиков попаданий"""
+    cache = ResponseCache(max_bytes=2 * (ENTRY_OVERHEAD + 10))
+    for key in "abc":
+        if key == "c":
+            assert cache.get("a") is not None
+        cache.put(key, CachedBody(b"x" * 10, {}), [], cache.generation)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_response_cache_rejects_stale_put():
+    """Тест: ответ, прочитанный до записи, в кэш не попадает"""
+    cache = ResponseCache(max_bytes=1 << 20)
+    generation = cache.generation
+    with cache.writing():
+        cache.invalidate(tags=["todo"])
+    cache.put("key", CachedBody(b"old", {}), ["todo"], generation)
+    assert cache.get("key") is None
+
+    cache.put("key", CachedBody(b"new", {}), ["todo"], cache.generation)
+    with cache.writing():
+        assert cache.get("key") is None
+    cache.invalidate(tags=["todo"])
+    assert len(cache) == 0 and cache.size == 0
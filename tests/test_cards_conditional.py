@@ -0,0 +1,54 @@
+def test_get_cards_not_modified_until_board_changes(client, create_card):
+    """Тест 304 для списка карточек по If-None-Match"""
+    create_card("First")
+    r = client.get("/cards")
+    etag = r.headers["ETag"]
+    assert r.headers["Cache-Control"] == "no-cache"
+
+    r = client.get("/cards", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["ETag"] == etag
+
+    create_card("Second")
+    r = client.get("/cards", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert len(r.json()) == 2
+    assert r.headers["ETag"] != etag
+
+
+def test_get_card_etag_tracks_position(client, create_card):
+    """Тест ETag карточки: меняется при сдвиге позиции соседом"""
+    first = create_card("First")
+    second = create_card("Second")
+    r = client.get(f"/cards/{first['id']}")
+    etag = r.headers["ETag"]
+
+    r = client.get(f"/cards/{first['id']}", headers={"If-None-Match": f"W/{etag}"})
+    assert r.status_code == 304
+
+    client.patch(f"/cards/{second['id']}", json={"order_idx": 1})
+    r = client.get(f"/cards/{first['id']}", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["order_idx"] == 2
+
+
+def test_get_cards_if_modified_since(client, create_card):
+    """Тест 304 по If-Modified-Since и приоритета If-None-Match"""
+    create_card("First")
+    last_modified = client.get("/cards").headers["Last-Modified"]
+
+    r = client.get("/cards", headers={"If-Modified-Since": last_modified})
+    assert r.status_code == 304
+
+    old = "Sat, 01 Jan 2000 00:00:00 GMT"
+    assert client.get("/cards", headers={"If-Modified-Since": old}).status_code == 200
+    assert (
+        client.get("/cards", headers={"If-Modified-Since": "garbage"}).status_code
+        == 200
+    )
+    r = client.get(
+        "/cards",
+        headers={"If-None-Match": '"stale"', "If-Modified-Since": last_modified},
+    )
+    assert r.status_code == 200
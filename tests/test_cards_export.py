@@ -0,0 +1,107 @@
+import asyncio
+import json
+import tracemalloc
+from datetime import datetime
+
+from app.main import _export_chunks
+from app.store.async_store import AsyncCardStore
+from app.store.memory import InMemoryCardStore
+
+
+class _SyntheticStore(InMemoryCardStore):
+    """Генерирует карточки на лету, чтобы мерить память только выгрузки"""
+
+    def __init__(self, size):
+        super().__init__()
+        self._size = size
+        self._now = datetime(2025, 1, 1, 12, 0, 0)
+
+    def page(self, column=None, after=None, limit=100):
+        start = (after or 0) + 1
+        end = min(start + limit, self._size + 1)
+        cards = [
+            {
+                "id": i,
+                "title": f"Synthetic card {i}",
+                "description": "x" * 100,
+                "column": "backlog",
+                "order_idx": i,
+                "created_at": self._now,
+                "updated_at": self._now,
+            }
+            for i in range(start, end)
+        ]
+        return cards, (end - 1 if end <= self._size else None)
+
+
+def _export(store, export_format, **kwargs):
+    async def collect():
+        return [
+            chunk
+            async for chunk in _export_chunks(
+                AsyncCardStore(store), export_format, **kwargs
+            )
+        ]
+
+    return b"".join(asyncio.run(collect()))
+
+
+def test_export_ndjson(client):
+    """Тест выгрузки NDJSON"""
+    for i in range(3):
+        client.post("/cards", json={"title": f"Card {i}", "column": "todo"})
+
+    r = client.get("/cards/export")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = r.text.splitlines()
+    assert [json.loads(line)["title"] for line in lines] == [
+        "Card 0",
+        "Card 1",
+        "Card 2",
+    ]
+
+
+def test_export_json_array(client):
+    """Тест выгрузки JSON-массивом"""
+    for i in range(3):
+        client.post("/cards", json={"title": f"Card {i}", "column": "todo"})
+
+    r = client.get("/cards/export", params={"format": "json"})
+    assert r.status_code == 200
+    assert [card["id"] for card in r.json()] == [1, 2, 3]
+
+    store = InMemoryCardStore()
+    assert _export(store, "json") == b"[]"
+    for i in range(5):
+        store.create(f"Card {i}", None, "done")
+    body = _export(store, "json", batch_size=2)
+    assert len(json.loads(body)) == 5
+
+
+def test_export_invalid_format(client):
+    """Тест неизвестного формата выгрузки"""
+    assert client.get("/cards/export", params={"format": "xml"}).status_code == 422
+
+
+def test_export_peak_memory_is_constant():
+    """Тест пиковой памяти при выгрузке 200k синтетических карточек"""
+    store = _SyntheticStore(200_000)
+
+    async def consume():
+        total = 0
+        async for chunk in _export_chunks(AsyncCardStore(store), "ndjson"):
+            total += len(chunk)
+        return total
+
+    # пик считается только для выгрузки, а не для всего процесса
+    tracemalloc.start()
+    try:
+        total = asyncio.run(consume())
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    # сама выгрузка весит ~40 МБ, а пик памяти - одна пачка
+    assert total > 30 * 1024 * 1024
+    assert peak < 5 * 1024 * 1024
@@ -0,0 +1,167 @@
+import asyncio
+import json
+
+import pytest
+
+from app.feed import ChangeFeed
+from app.main import _sse_stream
+from app.store.memory import InMemoryCardStore
+
+
+def _card(card_id, column="todo", order_idx=1):
+    return {"id": card_id, "column": column, "order_idx": order_idx}
+
+
+def _drain(subscription):
+    async def collect():
+        events = []
+        while True:
+            event = await subscription.get(timeout=0)
+            if event is None:
+                return events
+            events.append(json.loads(event.data))
+            if event.type == "overflow":
+                return events
+
+    return collect()
+
+
+def test_feed_resumes_from_sequence():
+    """Тест продолжения ленты с since и reset при вытесненной истории"""
+
+    async def scenario():
+        feed = ChangeFeed(history=3, epoch="a1")
+        for card_id in range(1, 6):
+            feed.publish("created", _card(card_id))
+
+        resumed = await _drain(feed.subscribe(since="a1.3"))
+        assert [(e["id"], e["card"]["id"]) for e in resumed] == [
+            ("a1.4", 4),
+            ("a1.5", 5),
+        ]
+        reset = [{"type": "reset", "seq": 5, "id": "a1.5"}]
+        assert await _drain(feed.subscribe(since="a1.1")) == reset
+        assert await _drain(feed.subscribe(since="a1.99")) == reset
+        assert await _drain(feed.subscribe(since="a1.5")) == []
+
+    asyncio.run(scenario())
+
+
+def test_feed_rejects_ids_of_other_processes():
+    """Тест: id перезапущенного процесса или другого воркера - только reset"""
+
+    async def scenario():
+        old = ChangeFeed()
+        for card_id in range(1, 4):
+            old.publish("created", _card(card_id))
+        # новый процесс: seq снова с нуля и успел догнать старый номер
+        new = ChangeFeed()
+        for card_id in range(1, 6):
+            new.publish("created", _card(card_id))
+
+        for since in ("%s.2" % old.epoch, "2", "garbage", ""):
+            events = await _drain(new.subscribe(since=since))
+            assert [e["type"] for e in events] == ["reset"], since
+        assert old.epoch != new.epoch
+
+    asyncio.run(scenario())
+
+
+def test_feed_slow_subscriber_overflows():
+    """Тест: переполненный подписчик получает overflow и не держит запись"""
+
+    async def scenario():
+        feed = ChangeFeed(queue_size=2)
+        subscription = feed.subscribe()
+        for card_id in range(1, 6):
+            feed.publish("created", _card(card_id))
+
+        events = await _drain(subscription)
+        assert [e.get("card", {}).get("id") for e in events] == [1, 2, None]
+        assert events[-1] == {"type": "overflow", "seq": 2, "id": f"{feed.epoch}.2"}
+        assert len(feed) == 0
+
+    asyncio.run(scenario())
+
+
+def test_feed_from_store_mutations():
+    """Тест событий хранилища: перемещение приходит со старой позицией"""
+
+    async def scenario():
+        store = InMemoryCardStore()
+        feed = ChangeFeed()
+        store.add_listener(feed.publish)
+        subscription = feed.subscribe()
+
+        first = store.create("First", None, "todo")
+        second = store.create("Second", None, "todo")
+        store.update(second["id"], {"column": "done"})
+        store.update(first["id"], {"title": "Renamed"})
+        store.delete(first["id"])
+
+        events = await _drain(subscription)
+        assert [e["type"] for e in events] == [
+            "created",
+            "created",
+            "moved",
+            "updated",
+            "deleted",
+        ]
+        assert events[2]["from"] == {"column": "todo", "order_idx": 2}
+        assert events[2]["card"]["column"] == "done"
+
+    asyncio.run(scenario())
+
+
+def test_sse_stream_frames(monkeypatch):
+    """Тест формата SSE: id, event, data и heartbeat"""
+    from app import main
+
+    monkeypatch.setattr(main, "_FEED", ChangeFeed())
+
+    async def scenario():
+        stream = _sse_stream(since=None, heartbeat=0.01)
+        assert await stream.__anext__() == b": ping\n\n"
+
+        main._FEED.publish("created", _card(7))
+        frame = await stream.__anext__()
+        await stream.aclose()
+        return frame
+
+    frame = asyncio.run(scenario())
+    lines = frame.decode().split("\n")
+    assert lines[:2] == [f"id: {main._FEED.epoch}.1", "event: created"]
+    assert json.loads(lines[2].removeprefix("data: "))["card"]["id"] == 7
+    assert len(main._FEED) == 0
+
+
+def test_feed_websocket(client):
+    """Тест ленты изменений через WebSocket"""
+    with client.websocket_connect("/cards/feed/ws") as ws:
+        card = client.post("/cards", json={"title": "Live", "column": "todo"}).json()
+        event = ws.receive_json()
+        assert (event["type"], event["card"]) == ("created", card)
+
+        client.patch(f"/cards/{card['id']}", json={"column": "done"})
+        event = ws.receive_json()
+        assert event["type"] == "moved"
+        assert event["from"] == {"column": "todo", "order_idx": 1}
+
+    epoch, _, seq = event["id"].rpartition(".")
+    with client.websocket_connect(f"/cards/feed/ws?since={epoch}.{int(seq) - 1}") as ws:
+        assert ws.receive_json()["id"] == event["id"]
+
+
+def test_feed_disabled_with_several_workers(client, monkeypatch):
+    """Тест: при нескольких воркерах лента отказывает, а не теряет события"""
+    from starlette.websockets import WebSocketDisconnect
+
+    from app import main
+
+    monkeypatch.setattr(main, "FEED_ENABLED", False)
+    r = client.get("/cards/feed")
+    assert r.status_code == 503
+    assert r.json()["type"].endswith("/feed-unavailable")
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/cards/feed/ws"):
+            pass
@@ -0,0 +1,79 @@
+def test_get_cards_pages_with_cursor(client, create_card):
+    """Тест обхода всех карточек по курсору"""
+    ids = [create_card(f"Card {i}", "backlog")["id"] for i in range(5)]
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/cards", params=params)
+        assert r.status_code == 200
+        seen.extend(card["id"] for card in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            assert "Link" not in r.headers
+            break
+        assert 'rel="next"' in r.headers["Link"]
+
+    assert seen == ids
+
+
+def test_get_cards_cursor_survives_deletes(client, create_card):
+    """Тест keyset-курсора при удалении карточек между страницами"""
+    ids = [create_card(f"Card {i}", "todo")["id"] for i in range(4)]
+
+    r = client.get("/cards", params={"limit": 2})
+    cursor = r.headers["X-Next-Cursor"]
+    client.delete(f"/cards/{ids[1]}")
+
+    r = client.get("/cards", params={"limit": 2, "cursor": cursor})
+    assert [card["id"] for card in r.json()] == ids[2:]
+
+
+def test_get_cards_column_filter(client, create_card):
+    """Тест фильтрации по колонке в порядке order_idx"""
+    first = create_card("First", "todo")
+    create_card("Other", "done")
+    second = create_card("Second", "todo")
+    client.patch(f"/cards/{second['id']}", json={"order_idx": 1})
+
+    r = client.get("/cards", params={"column": "todo", "limit": 1})
+    assert [card["id"] for card in r.json()] == [second["id"]]
+    assert r.json()[0]["order_idx"] == 1
+
+    r = client.get(
+        "/cards",
+        params={"column": "todo", "limit": 1, "cursor": r.headers["X-Next-Cursor"]},
+    )
+    assert [card["id"] for card in r.json()] == [first["id"]]
+    assert r.json()[0]["order_idx"] == 2
+    assert "X-Next-Cursor" not in r.headers
+
+
+def test_get_cards_fields_projection(client, create_card):
+    """Тест выборки только запрошенных полей"""
+    create_card("Card", "backlog")
+
+    r = client.get("/cards", params={"fields": "id,title"})
+    assert r.status_code == 200
+    assert r.json() == [{"id": 1, "title": "Card"}]
+
+
+def test_get_cards_invalid_params(client, create_card):
+    """Тест ошибок валидации параметров списка"""
+    create_card("Card", "backlog")
+    cursor = client.get("/cards", params={"limit": 1}).headers.get("X-Next-Cursor")
+    assert cursor is None
+
+    r = client.get("/cards", params={"fields": "id,secret"})
+    assert r.status_code == 422
+    assert r.headers["content-type"] == "application/problem+json"
+
+    assert client.get("/cards", params={"cursor": "%%%"}).status_code == 422
+    assert client.get("/cards", params={"limit": 100000}).status_code == 422
+
+    create_card("Card 2", "backlog")
+    cursor = client.get("/cards", params={"limit": 1}).headers["X-Next-Cursor"]
+    r = client.get("/cards", params={"column": "backlog", "cursor": cursor})
+    assert r.status_code == 422
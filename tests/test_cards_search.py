@@ -0,0 +1,29 @@
+def test_search_cards(client, create_card):
+    """Тест поиска карточек по заголовку и описанию"""
+    report = create_card("Quarterly report", description="numbers for Q3")
+    review = create_card("Review", "in_progress", description="check the report draft")
+    create_card("Retro", "done")
+
+    r = client.get("/cards/search", params={"q": "repo"})
+    assert r.status_code == 200
+    assert r.json() == [report, review]
+
+    r = client.get("/cards/search", params={"q": "report", "limit": 1})
+    assert r.json() == [report]
+
+    client.patch(f"/cards/{report['id']}", json={"title": "Quarterly summary"})
+    client.delete(f"/cards/{review['id']}")
+    r = client.get("/cards/search", params={"q": "report"})
+    assert r.json() == []
+    assert client.get("/cards/search", params={"q": "summ"}).json()[0]["id"] == (
+        report["id"]
+    )
+
+
+def test_search_cards_validation(client):
+    """Тест валидации параметров поиска"""
+    assert client.get("/cards/search").status_code == 422
+    assert client.get("/cards/search", params={"q": ""}).status_code == 422
+    r = client.get("/cards/search", params={"q": "x", "limit": 101})
+    assert r.status_code == 422
+    assert client.get("/cards/search", params={"q": "!!!"}).json() == []
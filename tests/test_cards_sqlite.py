@@ -0,0 +1,52 @@
+import pytest
+
+from app.config import Settings
+from app.store.async_store import AsyncCardStore
+from app.store.factory import create_store
+from app.store.memory import InMemoryCardStore
+from app.store.sqlite import SQLiteCardStore
+
+
+@pytest.fixture
+def sqlite_client(client, tmp_path, monkeypatch):
+    store = SQLiteCardStore(f"sqlite:///{tmp_path / 'cards.db'}", pool_size=2)
+    monkeypatch.setattr("app.main._STORE", AsyncCardStore(store, max_workers=2))
+    yield client
+    store.close()
+
+
+def test_create_store_from_settings(tmp_path):
+    """Тест выбора хранилища через настройки"""
+    assert isinstance(create_store(Settings(card_store="memory")), InMemoryCardStore)
+
+    url = f"sqlite:///{tmp_path / 'cards.db'}"
+    store = create_store(
+        Settings(card_store="sqlite", database_url=url, db_pool_size=1)
+    )
+    assert isinstance(store, SQLiteCardStore)
+    store.close()
+
+
+def test_cards_api_on_sqlite(sqlite_client):
+    """Тест API карточек поверх SQLite"""
+    ids = [
+        sqlite_client.post(
+            "/cards", json={"title": f"Card {i}", "column": "todo"}
+        ).json()["id"]
+        for i in range(3)
+    ]
+
+    r = sqlite_client.patch(f"/cards/{ids[2]}", json={"order_idx": 1})
+    assert r.json()["order_idx"] == 1
+
+    r = sqlite_client.get("/cards", params={"column": "todo", "limit": 2})
+    assert [card["id"] for card in r.json()] == [ids[2], ids[0]]
+    r = sqlite_client.get(
+        "/cards",
+        params={"column": "todo", "limit": 2, "cursor": r.headers["X-Next-Cursor"]},
+    )
+    assert [card["id"] for card in r.json()] == [ids[1]]
+
+    r = sqlite_client.request("DELETE", "/cards:batch", json={"ids": [ids[0], 999]})
+    assert r.status_code == 404
+    assert sqlite_client.get(f"/cards/{ids[0]}").status_code == 200
@@ -0,0 +1,83 @@
+import json
+
+
+def test_get_cards_since_returns_delta(client, create_card):
+    """Тест инкрементальной синхронизации через GET /cards?since="""
+    first = create_card("First")
+    second = create_card("Second")
+    version = int(client.get("/cards").headers["X-Board-Version"])
+
+    client.patch(f"/cards/{second['id']}", json={"order_idx": 1})
+    client.delete(f"/cards/{first['id']}")
+    third = create_card("Third", "done")
+
+    r = client.get("/cards", params={"since": version})
+    assert r.status_code == 200
+    delta = r.json()
+    assert delta["snapshot"] is False
+    assert [card["id"] for card in delta["cards"]] == [second["id"], third["id"]]
+    assert delta["deleted"] == [first["id"]]
+    assert r.headers["X-Board-Version"] == str(delta["version"])
+
+    r = client.get("/cards", params={"since": delta["version"]})
+    assert r.json()["cards"] == [] and r.json()["deleted"] == []
+
+
+def test_get_cards_since_unknown_version_is_snapshot(client, create_card):
+    """Тест снимка доски для версии вне журнала"""
+    card = create_card("Only")
+    r = client.get("/cards", params={"since": 0, "fields": "id,order_idx"})
+    assert r.json()["snapshot"] is True
+    assert r.json()["cards"] == [{"id": card["id"], "order_idx": 1}]
+
+    r = client.get("/cards", params={"since": 0, "column": "todo"})
+    assert r.status_code == 422
+
+
+def test_get_cards_since_large_delta_is_paged_snapshot(client, create_card):
+    """Тест: дельта больше limit не отдаётся целиком - снимок по страницам"""
+    version = int(client.get("/cards").headers["X-Board-Version"])
+    cards = [create_card(f"Card {i}") for i in range(5)]
+
+    r = client.get("/cards", params={"since": version, "limit": 5})
+    assert r.json()["snapshot"] is False and len(r.json()["cards"]) == 5
+
+    r = client.get("/cards", params={"since": version, "limit": 2})
+    delta = r.json()
+    assert delta["snapshot"] is True and delta["deleted"] == []
+    assert [card["id"] for card in delta["cards"]] == [c["id"] for c in cards[:2]]
+    assert "since=" not in r.headers["Link"]
+
+    listed = delta["cards"]
+    cursor = r.headers["X-Next-Cursor"]
+    while cursor:
+        page = client.get("/cards", params={"cursor": cursor, "limit": 2})
+        listed += page.json()
+        cursor = page.headers.get("X-Next-Cursor")
+    assert [card["id"] for card in listed] == [card["id"] for card in cards]
+
+    r = client.get("/cards", params={"since": delta["version"], "limit": 2})
+    assert r.json() == {
+        "version": delta["version"],
+        "epoch": delta["epoch"],
+        "snapshot": False,
+        "cards": [],
+        "deleted": [],
+    }
+
+
+def test_get_cards_since_round_tripped_version_is_delta(client, create_card):
+    """Тест: версия, прошедшая через число JSON (double), даёт пустую дельту"""
+    create_card("Card")
+    r = client.get("/cards")
+    version = json.loads(json.dumps(float(r.headers["X-Board-Version"])))
+    epoch = int(r.headers["X-Board-Epoch"])
+
+    r = client.get("/cards", params={"since": int(version), "epoch": epoch})
+    assert r.json()["snapshot"] is False
+    assert r.json()["cards"] == [] and r.json()["deleted"] == []
+    assert r.json()["version"] == version and r.json()["epoch"] == epoch
+
+    # версия другой доски (до перезапуска) - снимок, а не чужая дельта
+    r = client.get("/cards", params={"since": int(version), "epoch": epoch - 1})
+    assert r.json()["snapshot"] is True and len(r.json()["cards"]) == 1
@@ -0,0 +1,34 @@
+import re
+
+import pytest
+
+from app.correlation import CorrelationIdMiddleware, counter_ids, ulid_id
+
+
+def test_correlation_id_generated_when_missing(client):
+    """Тест генерации correlation_id, если клиент его не передал"""
+    first = client.get("/health").headers["X-Correlation-ID"]
+    second = client.get("/health").headers["X-Correlation-ID"]
+    assert first and first != second
+
+    r = client.get("/cards/99999", headers={"X-Correlation-ID": "abc"})
+    assert r.headers["X-Correlation-ID"] == "abc"
+    assert r.json()["correlation_id"] == "abc"
+
+
+def test_correlation_id_schemes():
+    """Тест форматов correlation_id: счётчик и ULID"""
+    new_id = counter_ids()
+    ids = [new_id() for _ in range(3)]
+    node = ids[0].split("-")[0]
+    assert ids == [f"{node}-1", f"{node}-2", f"{node}-3"]
+    assert counter_ids()().split("-")[0] != node
+
+    ulids = [ulid_id() for _ in range(100)]
+    assert all(re.fullmatch(r"[0-7][0-9A-HJKMNP-TV-Z]{25}", value) for value in ulids)
+    assert len(set(ulids)) == 100
+    # первые 10 символов - время в мс: ID сортируются по времени
+    assert [value[:10] for value in ulids] == sorted(value[:10] for value in ulids)
+
+    with pytest.raises(ValueError):
+        CorrelationIdMiddleware(None, scheme="sequential")
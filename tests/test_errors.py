@@ -1,3 +1,6 @@
+from app.models.schemas import CardResponse
+
+
 def test_health_check(client):
     """Тест проверки здоровья приложения"""
     r = client.get("/health")
@@ -225,3 +228,41 @@ def test_column_validation(client):
     }
     r = client.post("/cards", json=card_data)
     assert r.status_code == 422
+
+
+def test_move_card_to_position(client):
+    """Тест перемещения карточки на позицию через PATCH"""
+    ids = [
+        client.post("/cards", json={"title": f"Card {i}", "column": "todo"}).json()[
+            "id"
+        ]
+        for i in range(3)
+    ]
+
+    r = client.patch(f"/cards/{ids[2]}", json={"order_idx": 1})
+    assert r.status_code == 200
+    assert r.json()["order_idx"] == 1
+
+    assert client.get(f"/cards/{ids[0]}").json()["order_idx"] == 2
+    assert client.get(f"/cards/{ids[1]}").json()["order_idx"] == 3
+
+
+def test_move_card_invalid_position(client):
+    """Тест валидации целевой позиции"""
+    card_id = client.post("/cards", json={"title": "Card", "column": "todo"}).json()[
+        "id"
+    ]
+
+    r = client.patch(f"/cards/{card_id}", json={"order_idx": 0})
+    assert r.status_code == 422
+
+
+def test_card_responses_match_schema(client):
+    """Тест: ответы без повторной валидации соответствуют CardResponse"""
+    created = client.post("/cards", json={"title": "Карточка", "column": "todo"})
+    updated = client.patch(f"/cards/{created.json()['id']}", json={"title": "Новая"})
+    listed = client.get("/cards").json()
+
+    for data in (created.json(), updated.json(), listed[0]):
+        assert CardResponse.model_validate(data).model_dump(mode="json") == data
+    assert listed[0] == client.get(f"/cards/{listed[0]['id']}").json()
@@ -0,0 +1,69 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.store.ids import BlockIdAllocator, IdAllocator
+from app.store.memory import InMemoryCardStore
+from app.store.sqlite import SQLiteCardStore
+
+
+def test_id_allocator_unique_across_threads():
+    """Тест уникальности ID при конкурентной выдаче из потоков"""
+    allocator = IdAllocator()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        ids = list(pool.map(lambda _: allocator.next_id(), range(5000)))
+
+    assert sorted(ids) == list(range(1, 5001))
+
+
+def test_block_allocator_reserves_disjoint_blocks():
+    """Тест выдачи ID блоками из общего источника"""
+    lock = threading.Lock()
+    counter = {"last": 0}
+
+    def reserve(count):
+        with lock:
+            first = counter["last"] + 1
+            counter["last"] += count
+            return first
+
+    allocators = [BlockIdAllocator(reserve, block_size=10) for _ in range(3)]
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        ids = list(pool.map(lambda i: allocators[i % 3].next_id(), range(300)))
+
+    assert len(set(ids)) == 300
+    assert counter["last"] <= 300 + 3 * 10
+
+
+def test_memory_ids_not_reused_after_delete():
+    """Тест: ID удалённой карточки не выдаётся повторно"""
+    store = InMemoryCardStore()
+    first = store.create("A", None, "backlog")
+    store.create("B", None, "backlog")
+    store.delete(first["id"])
+
+    assert store.create("C", None, "backlog")["id"] == 3
+
+
+def test_sqlite_block_ids_unique_between_stores(tmp_path):
+    """Тест: два хранилища на одном файле не выдают одинаковых ID"""
+    url = f"sqlite:///{tmp_path / 'cards.db'}"
+    stores = [SQLiteCardStore(url, id_block_size=5) for _ in range(2)]
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            cards = list(
+                pool.map(
+                    lambda i: stores[i % 2].create(f"Card {i}", None, "todo"),
+                    range(40),
+                )
+            )
+        # карточка без блока получает ID за всеми зарезервированными
+        plain = SQLiteCardStore(url)
+        extra = plain.create("Plain", None, "todo")
+        plain.close()
+    finally:
+        for store in stores:
+            store.close()
+
+    ids = [card["id"] for card in cards]
+    assert len(set(ids)) == 40
+    assert extra["id"] > max(ids)
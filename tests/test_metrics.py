@@ -0,0 +1,111 @@
+import asyncio
+import threading
+
+import httpx
+
+from app.metrics import Counter, Histogram
+from app.security import http_client
+from app.security.http_client import SecureHTTPClient
+from app.store.memory import InMemoryCardStore
+from app.store.ranking import RESPREAD_ROWS
+
+
+def _total(histogram) -> int:
+    return sum(sum(counts[:-1]) for counts in histogram.totals().values())
+
+
+def test_counter_and_histogram_aggregate_threads():
+    """Тест сложения значений, записанных из разных потоков"""
+    requests = Counter("requests_total", "Requests", ("route",))
+    latency = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+
+    def work():
+        for value in (0.05, 0.1, 0.5, 2.0):
+            requests.inc(("/cards",))
+            latency.observe(value, ("/cards",))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert requests.samples() == {("/cards",): 16}
+    assert list(latency.expose()) == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/cards",le="0.1"} 8',
+        'latency_seconds_bucket{route="/cards",le="1"} 12',
+        'latency_seconds_bucket{route="/cards",le="+Inf"} 16',
+        'latency_seconds_sum{route="/cards"} 10.6',
+        'latency_seconds_count{route="/cards"} 16',
+    ]
+
+
+def test_metrics_endpoint(client):
+    """Тест /metrics: шаблон маршрута в метках, размер колонок, статистика кэша"""
+    card = client.post("/cards", json={"title": "Metric", "column": "todo"}).json()
+    client.get(f"/cards/{card['id']}")
+    client.get("/cards/999")
+    client.get("/no-such-path")
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = r.text.splitlines()
+    assert 'cards{column="todo"} 1' in lines
+    assert 'cards{column="done"} 0' in lines
+    assert "http_requests_in_flight 0" in lines
+    assert any(
+        line.startswith(
+            'http_requests_total{method="GET",route="/cards/{card_id}",status="404"}'
+        )
+        for line in lines
+    )
+    assert any(
+        line.startswith(
+            'http_request_duration_seconds_count{method="GET",route="unmatched"}'
+        )
+        for line in lines
+    )
+    # сырые пути в метки не попадают
+    assert "/cards/999" not in r.text and "/no-such-path" not in r.text
+    assert any(line.startswith("response_cache_misses_total ") for line in lines)
+
+
+def test_respread_rows_observed():
+    """Тест учёта карточек, переписанных раздвиганием рангов"""
+    store = InMemoryCardStore()
+    before = _total(RESPREAD_ROWS)
+    cards = [store.create(f"Card {i}", None, "todo") for i in range(42)]
+    # переносы в одно место делят промежуток пополам, пока он не кончится
+    for card in cards[2:]:
+        store.update(card["id"], {"order_idx": 2})
+    assert _total(RESPREAD_ROWS) > before
+
+
+def test_http_client_counts_attempts_and_retries(monkeypatch):
+    """Тест счётчиков попыток и повторов исходящих запросов"""
+    statuses = iter([503, 200])
+
+    async def no_sleep(delay):
+        pass
+
+    def handler(request):
+        return httpx.Response(next(statuses), json={})
+
+    async def run():
+        client = SecureHTTPClient()
+        await client.close()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await client.get("https://api.example.com/ideas")
+        finally:
+            await client.close()
+
+    attempts = http_client.ATTEMPTS.samples().get(("GET",), 0)
+    retries = http_client.RETRIES.samples().get(("server_error",), 0)
+    monkeypatch.setattr(http_client.asyncio, "sleep", no_sleep)
+    assert asyncio.run(run()).status_code == 200
+    assert http_client.ATTEMPTS.samples()[("GET",)] == attempts + 2
+    assert http_client.RETRIES.samples()[("server_error",)] == retries + 1
@@ -0,0 +1,45 @@
+import multiprocessing
+
+import pytest
+
+from app.config import Settings
+from app.store.factory import create_store
+from app.store.sqlite import SQLiteCardStore
+
+WORKERS = 4
+CARDS_PER_WORKER = 25
+
+
+def _create_cards(url: str, worker: int) -> list:
+    store = SQLiteCardStore(url, pool_size=1)
+    ids = [
+        store.create(f"Worker {worker} card {i}", None, "todo")["id"]
+        for i in range(CARDS_PER_WORKER)
+    ]
+    store.close()
+    return ids
+
+
+def test_sqlite_store_shared_between_processes(tmp_path):
+    """Тест уникальных id и согласованного порядка при записи из нескольких процессов"""
+    url = f"sqlite:///{tmp_path / 'cards.db'}"
+    SQLiteCardStore(url, pool_size=1).close()
+
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(WORKERS) as pool:
+        results = pool.starmap(_create_cards, [(url, w) for w in range(WORKERS)])
+
+    ids = [card_id for worker_ids in results for card_id in worker_ids]
+    assert len(set(ids)) == WORKERS * CARDS_PER_WORKER
+
+    store = SQLiteCardStore(url, pool_size=1)
+    cards = list(store.iter_cards("todo"))
+    assert [card["order_idx"] for card in cards] == list(range(1, len(ids) + 1))
+    assert store.count("todo") == len(ids)
+    store.close()
+
+
+def test_memory_store_refuses_several_workers():
+    """Тест запрета хранилища в памяти при нескольких процессах"""
+    with pytest.raises(ValueError):
+        create_store(Settings(card_store="memory", web_concurrency=4))
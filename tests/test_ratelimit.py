@@ -0,0 +1,160 @@
+import asyncio
+from bisect import bisect_left
+
+from app.config import Settings
+from app.ratelimit import (
+    MemoryRateLimitBackend,
+    RateLimiter,
+    SQLiteRateLimitBackend,
+    create_rate_limiter,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _hit(limiter, key="1.2.3.4"):
+    return asyncio.run(limiter.hit(key))
+
+
+def test_rate_limiter_gcra(tmp_path):
+    """Тест GCRA: burst подряд, затем один запрос за интервал"""
+    backends = [
+        MemoryRateLimitBackend(clock=FakeClock()),
+        SQLiteRateLimitBackend(
+            f"sqlite:///{tmp_path / 'limits.db'}", clock=FakeClock()
+        ),
+    ]
+    for backend in backends:
+        clock = backend._clock
+        # интервал 60 / (62 - 3 + 1) = 1 с
+        limiter = RateLimiter(per_minute=62, burst=3, backend=backend)
+        assert [_hit(limiter) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert _hit(limiter) == 1.0
+        assert _hit(limiter, "5.6.7.8") == 0.0
+
+        clock.now += 0.5
+        assert _hit(limiter) == 0.5
+        clock.now += 0.5
+        assert _hit(limiter) == 0.0 and _hit(limiter) == 1.0
+
+        clock.now += 60
+        assert [_hit(limiter) for _ in range(3)] == [0.0, 0.0, 0.0]
+        backend.clear()
+        assert _hit(limiter) == 0.0
+        backend.close()
+
+
+def test_rate_limiter_defaults_cap_every_minute():
+    """Тест NFR-05: с настройками по умолчанию ни в одном окне 60 с нет больше лимита"""
+    clock = FakeClock()
+    limiter = create_rate_limiter(Settings())
+    limiter.backend = MemoryRateLimitBackend(clock=clock)
+    per_minute = Settings().rate_limit_per_minute
+
+    # клиент стучится каждые 10 мс три минуты подряд
+    admitted = []
+    for tick in range(18_000):
+        clock.now = 1000.0 + tick / 100
+        if limiter.backend.hit("1.2.3.4", limiter.interval, limiter.tolerance) == 0.0:
+            admitted.append(clock.now)
+
+    busiest = max(
+        bisect_left(admitted, start + 60) - i for i, start in enumerate(admitted)
+    )
+    assert busiest <= per_minute
+    # и лимит не занижен: в окне набирается почти вся квота
+    assert busiest >= per_minute - 1
+
+
+def test_rate_limiter_sqlite_shared_between_processes(tmp_path):
+    """Тест общего лимита для нескольких экземпляров SQLite-бэкенда"""
+    url = f"sqlite:///{tmp_path / 'limits.db'}"
+    workers = [SQLiteRateLimitBackend(url, clock=FakeClock()) for _ in range(2)]
+    limiters = [RateLimiter(per_minute=60, burst=2, backend=b) for b in workers]
+    assert _hit(limiters[0]) == 0.0 and _hit(limiters[1]) == 0.0
+    assert _hit(limiters[0]) > 0 and _hit(limiters[1]) > 0
+    for backend in workers:
+        backend.close()
+
+
+def test_rate_limiter_sqlite_cleanup_by_time(tmp_path):
+    """Тест очистки по времени: раз в интервал и одним процессом из нескольких"""
+    url = f"sqlite:///{tmp_path / 'limits.db'}"
+    clock = FakeClock()
+    workers = [
+        SQLiteRateLimitBackend(url, cleanup_interval=60, clock=clock) for _ in range(2)
+    ]
+
+    def keys():
+        with workers[0]._pool.connection() as conn:
+            return {key for (key,) in conn.execute("SELECT key FROM rate_limits")}
+
+    workers[0].hit("a", 1.0, 0.0)
+    clock.now += 30
+    workers[1].hit("b", 1.0, 0.0)
+    # сколько бы запросов ни пришло, до конца интервала ничего не удаляется
+    assert keys() == {"a", "b"}
+
+    clock.now += 31
+    workers[1].hit("c", 1.0, 0.0)
+    assert keys() == {"c"}
+    # второй процесс в том же интервале очистку уже не повторяет
+    workers[0].hit("d", 1.0, 0.0)
+    clock.now += 2
+    workers[0].hit("e", 1.0, 0.0)
+    assert keys() == {"c", "d", "e"}
+    for backend in workers:
+        backend.close()
+
+
+def test_rate_limiter_sqlite_uses_own_database(tmp_path):
+    """Тест: общий лимит пишет в RATE_LIMIT_URL, а не в базу карточек"""
+    settings = Settings(
+        rate_limit_backend="sqlite",
+        database_url=f"sqlite:///{tmp_path / 'cards.db'}",
+        rate_limit_url=f"sqlite:///{tmp_path / 'limits.db'}",
+    )
+    limiter = create_rate_limiter(settings)
+    assert _hit(limiter) == 0.0
+    assert (tmp_path / "limits.db").exists()
+    assert not (tmp_path / "cards.db").exists()
+    limiter.backend.close()
+
+
+def test_rate_limiter_memory_is_bounded():
+    """Тест вытеснения давно не приходивших ключей"""
+    clock = FakeClock()
+    backend = MemoryRateLimitBackend(max_keys=2, clock=clock)
+    limiter = RateLimiter(per_minute=60, burst=1, backend=backend)
+    for key in ["a", "b", "a", "c"]:
+        _hit(limiter, key)
+    assert len(backend) == 2 and backend.evictions == 1
+    # вытеснен b - самый давний; a по-прежнему ограничен
+    assert _hit(limiter, "a") > 0 and _hit(limiter, "b") == 0.0
+
+
+def test_cards_rate_limited_with_problem_response(client, monkeypatch):
+    """Тест ответа 429 в формате RFC 7807 с Retry-After"""
+    from app.main import _RATE_LIMITER
+
+    monkeypatch.setattr(_RATE_LIMITER, "interval", 60.0)
+    monkeypatch.setattr(_RATE_LIMITER, "tolerance", 60.0)
+    assert client.get("/cards").status_code == 200
+    assert client.get("/cards").status_code == 200
+
+    r = client.get("/cards", headers={"X-Correlation-ID": "limited-1"})
+    assert r.status_code == 429
+    assert r.headers["content-type"] == "application/problem+json"
+    assert 1 <= int(r.headers["Retry-After"]) <= 60
+    body = r.json()
+    assert body["status"] == 429 and body["title"] == "Too many requests"
+    assert body["correlation_id"] == "limited-1"
+    assert r.headers["X-Correlation-ID"] == "limited-1"
+    # лимит касается только /cards
+    assert client.get("/health").status_code == 200
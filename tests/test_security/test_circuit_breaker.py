@@ -0,0 +1,187 @@
+import asyncio
+import functools
+
+import httpx
+import pytest
+
+from app.security import circuit_breaker, http_client
+from app.security.circuit_breaker import CircuitBreaker, RetryBudget
+from app.security.http_client import SecureHTTPClient
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    async def sleep(delay):
+        pass
+
+    monkeypatch.setattr(http_client.asyncio, "sleep", sleep)
+
+
+def _client(statuses: list, calls: list, **options) -> SecureHTTPClient:
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(statuses[0] if len(statuses) == 1 else statuses.pop(0))
+
+    return SecureHTTPClient(
+        transport=httpx.MockTransport(handler),
+        base_url="https://api.example.com",
+        **options,
+    )
+
+
+async def _outcomes(client: SecureHTTPClient, count: int) -> list:
+    results = []
+    for _ in range(count):
+        try:
+            results.append((await client.get("/ideas")).status_code)
+        except httpx.HTTPError as e:
+            results.append(type(e).__name__)
+    return results
+
+
+class TestCircuitBreaker:
+    """Тесты предохранителя upstream и бюджета ретраев"""
+
+    def test_state_machine(self):
+        """Тест переходов closed -> open -> half_open -> open/closed"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(
+            "api",
+            failure_rate=0.5,
+            min_calls=4,
+            window=10,
+            open_seconds=30,
+            clock=clock,
+        )
+        # старые неудачи выпадают из окна
+        for _ in range(3):
+            breaker.record(breaker.admit(), False)
+        clock.now += 11
+        for ok in (True, True, False):
+            breaker.record(breaker.admit(), ok)
+        assert breaker.state == circuit_breaker.CLOSED
+
+        breaker.record(breaker.admit(), False)
+        assert breaker.state == circuit_breaker.OPEN and breaker.admit() is None
+
+        clock.now += 30
+        probe = breaker.admit()
+        assert probe == circuit_breaker.HALF_OPEN and breaker.admit() is None
+        breaker.record(probe, False)
+        assert breaker.state == circuit_breaker.OPEN
+
+        clock.now += 30
+        probe = breaker.admit()
+        # прерванная проба не решает ничего и освобождает место
+        breaker.record(probe, None)
+        probe = breaker.admit()
+        # исход вызова, допущенного ещё при замкнутой цепи, пробу не решает
+        breaker.record(circuit_breaker.CLOSED, False)
+        breaker.record(probe, True)
+        assert (
+            breaker.state == circuit_breaker.CLOSED
+            and breaker.admit() == circuit_breaker.CLOSED
+        )
+
+    def test_client_fails_fast_while_open(self, no_sleep):
+        """Тест: разомкнутая цепь отклоняет запросы без обращения к upstream"""
+        clock = FakeClock()
+        calls = []
+        statuses = [503]
+        client = _client(
+            statuses,
+            calls,
+            max_retries=2,
+            retry_budget=None,
+            circuit_breaker=functools.partial(
+                CircuitBreaker, min_calls=4, open_seconds=30, clock=clock
+            ),
+        )
+
+        async def run():
+            failing = await _outcomes(client, 4)
+            stats = client.stats()
+            clock.now += 30
+            statuses[0] = 200
+            recovered = await _outcomes(client, 2)
+            await client.close()
+            return failing, stats, recovered
+
+        failing, stats, recovered = asyncio.run(run())
+        assert (
+            failing == ["HTTPStatusError", "HTTPStatusError"] + ["CircuitOpenError"] * 2
+        )
+        assert len(calls) == 4 + 2 and stats["circuits_not_closed"] == 1
+        assert recovered == [200, 200]
+        assert http_client.SHORT_CIRCUITED.samples()[("api.example.com",)] >= 2
+
+    def test_retry_budget_caps_retries(self, no_sleep):
+        """Тест: повторы идут, пока есть токены, дальше ошибка отдаётся сразу"""
+        clock = FakeClock()
+        calls = []
+        client = _client(
+            [503],
+            calls,
+            max_retries=3,
+            circuit_breaker=None,
+            retry_budget=functools.partial(
+                RetryBudget, ratio=0.1, min_per_second=0.5, max_tokens=2, clock=clock
+            ),
+        )
+        denied = http_client.RETRIES_DENIED.samples().get((), 0)
+
+        async def run():
+            outcomes = await _outcomes(client, 3)
+            first = len(calls)
+            # бюджет пополняется со временем: снова можно повторить
+            clock.now += 2
+            await _outcomes(client, 1)
+            await client.close()
+            return outcomes, first
+
+        outcomes, first = asyncio.run(run())
+        assert outcomes == ["HTTPStatusError"] * 3
+        # 3 попытки на первый запрос, дальше токенов меньше одного
+        assert first == 3 + 1 + 1
+        assert len(calls) == first + 2
+        assert http_client.RETRIES_DENIED.samples()[()] == denied + 3
+
+    def test_local_pool_timeout_is_not_an_upstream_failure(self):
+        """Тест: ожидание своего пула не размыкает цепь и не тратит бюджет"""
+
+        async def handler(request):
+            await asyncio.sleep(0.2)
+            return httpx.Response(200)
+
+        client = SecureHTTPClient(
+            transport=httpx.MockTransport(handler),
+            base_url="https://api.example.com",
+            max_connections=1,
+            pool_timeout=0.05,
+            circuit_breaker=functools.partial(CircuitBreaker, min_calls=4),
+        )
+        tokens = client.retry_budget.tokens
+
+        async def run():
+            outcomes = await asyncio.gather(
+                *(client.get("/ideas", params={"page": n}) for n in range(20)),
+                return_exceptions=True,
+            )
+            after = await client.get("/ideas")
+            await client.close()
+            return outcomes, after
+
+        outcomes, after = asyncio.run(run())
+        timeouts = [e for e in outcomes if isinstance(e, httpx.PoolTimeout)]
+        assert len(timeouts) == 19
+        assert client.stats()["circuits_not_closed"] == 0
+        assert client.retry_budget.tokens >= tokens
+        assert after.status_code == 200
@@ -0,0 +1,161 @@
+import asyncio
+
+import httpx
+
+from app.security.http_cache import LOOKUPS, CachedResponse, HTTPCache, MemoryCacheStore
+from app.security.http_client import SecureHTTPClient
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Upstream:
+    """Мок upstream: отвечает по очереди заданными ответами и запоминает запросы"""
+
+    def __init__(self, *responses: httpx.Response):
+        self.responses = list(responses)
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return self.responses.pop(0)
+
+
+def _client(upstream: Upstream, cache: HTTPCache) -> SecureHTTPClient:
+    return SecureHTTPClient(
+        transport=httpx.MockTransport(upstream),
+        base_url="https://api.example.com",
+        cache=cache,
+    )
+
+
+def _results():
+    return {result: value for (result,), value in LOOKUPS.samples().items()}
+
+
+class TestHTTPCache:
+    """Тесты кэша ответов upstream (RFC 9111)"""
+
+    def test_fresh_hit_then_revalidation(self):
+        """Тест: свежий ответ из кэша, устаревший - условным запросом и 304"""
+        clock = FakeClock()
+        upstream = Upstream(
+            httpx.Response(
+                200,
+                json={"v": 1},
+                headers={"Cache-Control": "max-age=60", "ETag": '"v1"'},
+            ),
+            httpx.Response(
+                304, headers={"Cache-Control": "max-age=60", "ETag": '"v1"'}
+            ),
+            httpx.Response(
+                200,
+                json={"v": 2},
+                headers={"Cache-Control": "max-age=60", "ETag": '"v2"'},
+            ),
+        )
+        client = _client(upstream, HTTPCache(clock=clock))
+        before = _results()
+
+        async def run():
+            bodies = [(await client.get("/ideas", params={"page": 1})).json()]
+            bodies.append((await client.get("/ideas?page=1")).json())
+            clock.now += 61
+            revalidated = await client.get("/ideas", params={"page": 1})
+            bodies.append(revalidated.json())
+            bodies.append((await client.get("/ideas?page=1")).json())
+            clock.now += 61
+            bodies.append((await client.get("/ideas?page=1")).json())
+            await client.close()
+            return bodies, revalidated
+
+        bodies, revalidated = asyncio.run(run())
+        assert bodies == [{"v": 1}, {"v": 1}, {"v": 1}, {"v": 1}, {"v": 2}]
+        assert revalidated.status_code == 200
+        assert len(upstream.requests) == 3
+        assert "if-none-match" not in upstream.requests[0].headers
+        assert upstream.requests[1].headers["if-none-match"] == '"v1"'
+        after = _results()
+        assert after["hit"] - before.get("hit", 0) == 2
+        assert after["revalidated"] - before.get("revalidated", 0) == 1
+        assert after["miss"] - before.get("miss", 0) == 2
+
+    def test_shared_cache_rules(self):
+        """Тест: private, no-store, Authorization и Vary не отдают чужой ответ"""
+        cases = [
+            ({"Cache-Control": "private, max-age=60"}, {}, {}),
+            ({"Cache-Control": "no-store"}, {}, {}),
+            ({"Cache-Control": "max-age=60"}, {"Authorization": "Bearer a"}, {}),
+            (
+                {"Cache-Control": "max-age=60", "Vary": "Accept-Language"},
+                {"Accept-Language": "ru"},
+                {"Accept-Language": "en"},
+            ),
+        ]
+        for response_headers, first_headers, second_headers in cases:
+            upstream = Upstream(
+                httpx.Response(200, json={"n": 1}, headers=response_headers),
+                httpx.Response(200, json={"n": 2}, headers=response_headers),
+            )
+            client = _client(upstream, HTTPCache(clock=FakeClock()))
+
+            async def run():
+                await client.get("/me", headers=first_headers)
+                second = await client.get(
+                    "/me", headers=second_headers or first_headers
+                )
+                await client.close()
+                return second.json()
+
+            assert asyncio.run(run()) == {"n": 2}, response_headers
+
+    def test_unsafe_method_invalidates(self):
+        """Тест: успешный PUT сбрасывает ответ по тому же URL"""
+        upstream = Upstream(
+            httpx.Response(200, json={"v": 1}, headers={"Cache-Control": "max-age=60"}),
+            httpx.Response(200, json={}),
+            httpx.Response(200, json={"v": 2}, headers={"Cache-Control": "max-age=60"}),
+        )
+        client = _client(upstream, HTTPCache(clock=FakeClock()))
+
+        async def run():
+            await client.get("/ideas/1")
+            await client.put("/ideas/1", json={"v": 2})
+            fresh = await client.get("/ideas/1")
+            await client.close()
+            return fresh.json()
+
+        assert asyncio.run(run()) == {"v": 2}
+
+    def test_memory_budget_and_disk_store(self, tmp_path):
+        """Тест: LRU по байтам в памяти, диск переживает новый экземпляр кэша"""
+        clock = FakeClock()
+        memory = MemoryCacheStore(max_bytes=4000)
+        for name in "abc":
+            memory.put(name, CachedResponse(name, 200, [], b"x" * 800, {}, 0.0))
+        memory.get("a")
+        memory.put("d", CachedResponse("d", 200, [], b"x" * 800, {}, 0.0))
+        assert memory.get("b") is None and memory.get("a") is not None
+        assert memory.evictions == 1 and memory.size <= 4000
+
+        headers = {"Cache-Control": "max-age=60", "Content-Type": "application/json"}
+        upstream = Upstream(httpx.Response(200, json={"v": 1}, headers=headers))
+
+        async def run():
+            first = _client(upstream, HTTPCache(clock=clock, directory=str(tmp_path)))
+            await first.get("/ideas")
+            await first.close()
+            # новый процесс: память пуста, ответ берётся с диска
+            second = _client(upstream, HTTPCache(clock=clock, directory=str(tmp_path)))
+            cached = await second.get("/ideas")
+            await second.close()
+            return cached
+
+        cached = asyncio.run(run())
+        assert cached.json() == {"v": 1} and len(upstream.requests) == 1
+        assert cached.headers["content-type"] == "application/json"
@@ -0,0 +1,273 @@
+import asyncio
+import tracemalloc
+
+import httpx
+import pytest
+
+from app.security.http_client import (
+    COALESCED,
+    ResponseTooLargeError,
+    SecureHTTPClient,
+    UpstreamClients,
+)
+
+
+async def _serve(handle_count: list):
+    """Локальный upstream: keep-alive HTTP/1.1, каждое соединение считается"""
+
+    async def handle(reader, writer):
+        handle_count.append(1)
+        while await reader.readuntil(b"\r\n\r\n"):
+            await asyncio.sleep(0.01)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n"
+                b"Content-Type: application/json\r\n\r\n{}"
+            )
+            await writer.drain()
+
+    async def handle_safely(reader, writer):
+        try:
+            await handle(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    server = await asyncio.start_server(handle_safely, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+class TestUpstreamClients:
+    """Тесты общих клиентов исходящих запросов (ADR-003)"""
+
+    def test_one_client_per_upstream(self):
+        """Тест: клиент создаётся один раз на upstream, лимит можно задать по хосту"""
+        seen = []
+        transport = httpx.MockTransport(
+            lambda r: seen.append(r.url) or httpx.Response(200)
+        )
+        clients = UpstreamClients(
+            max_connections=50,
+            host_max_connections={"slow.example.com": 4},
+            transport=transport,
+        )
+
+        async def run():
+            api = clients.get("https://api.example.com/v1")
+            assert clients.get("https://api.example.com") is api
+            slow = clients.get("https://slow.example.com")
+            assert slow is not api
+            await api.get("/ideas")
+            stats = clients.stats()
+            await clients.close()
+            # после закрытия приложение может стартовать снова
+            assert clients.get("https://api.example.com") is not api
+            await clients.close()
+            return stats
+
+        stats = asyncio.run(run())
+        assert seen == [httpx.URL("https://api.example.com/ideas")]
+        assert stats["https://api.example.com"]["max_connections"] == 50
+        assert stats["https://slow.example.com"]["max_connections"] == 4
+
+    def test_pool_reuses_connections(self):
+        """Тест: параллельные вызовы делят пул и не открывают лишних соединений"""
+        opened = []
+
+        async def run():
+            server, port = await _serve(opened)
+            clients = UpstreamClients(max_connections=4)
+            client = clients.get(f"http://127.0.0.1:{port}")
+            try:
+                responses = await asyncio.gather(
+                    *(client.get(f"/ideas/{i}") for i in range(40))
+                )
+                stats = client.stats()
+            finally:
+                await clients.close()
+                server.close()
+                await server.wait_closed()
+            return responses, stats
+
+        responses, stats = asyncio.run(run())
+        assert all(r.status_code == 200 for r in responses)
+        assert len(opened) <= 4
+        assert stats["peak_in_flight"] == 40 and stats["in_flight"] == 0
+        assert stats["connections"] == len(opened)
+        assert stats["idle_connections"] == stats["connections"]
+
+
+BODY_SIZE = 16 * 1024 * 1024
+CHUNK = b"x" * 64 * 1024
+
+
+def _big_body_client(size: int = BODY_SIZE, **options) -> SecureHTTPClient:
+    async def body():
+        # один и тот же кусок: память занимает только то, что копит клиент
+        for _ in range(size // len(CHUNK)):
+            yield CHUNK
+
+    def handler(request):
+        return httpx.Response(200, content=body())
+
+    return SecureHTTPClient(transport=httpx.MockTransport(handler), **options)
+
+
+def _peak_memory(coro_factory):
+    async def run():
+        tracemalloc.start()
+        try:
+            result = await coro_factory()
+            return result, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return asyncio.run(run())
+
+
+class TestSecureHTTPClientStreaming:
+    """Тесты потокового чтения и выгрузки тела во временный файл"""
+
+    def test_stream_keeps_memory_flat(self):
+        """Тест: stream отдаёт тело кусками, не собирая его в памяти"""
+        client = _big_body_client()
+
+        async def consume():
+            total = 0
+            async with client.stream("GET", "https://files.example.com/a") as resp:
+                assert resp.status_code == 200
+                async for chunk in resp.aiter_bytes():
+                    total += len(chunk)
+            await client.close()
+            return total
+
+        total, peak = _peak_memory(consume)
+        assert total == BODY_SIZE
+        assert peak < 2 * 1024 * 1024
+
+        # для сравнения: request держит тело целиком
+        client = _big_body_client()
+
+        async def buffered():
+            resp = await client.get("https://files.example.com/a")
+            await client.close()
+            return len(resp.content)
+
+        total, peak = _peak_memory(buffered)
+        assert total == BODY_SIZE and peak > BODY_SIZE
+
+    def test_spool_to_disk(self):
+        """Тест: spool пишет большое тело во временный файл"""
+        client = _big_body_client()
+
+        async def spool():
+            resp = await client.spool(
+                "GET", "https://files.example.com/a", max_memory=1024 * 1024
+            )
+            await client.close()
+            return resp
+
+        resp, peak = _peak_memory(spool)
+        with resp.body:
+            assert (resp.status_code, resp.size) == (200, BODY_SIZE)
+            assert resp.body.read(len(CHUNK)) == CHUNK
+        assert peak < 3 * 1024 * 1024
+
+    def test_stream_enforces_max_response_size(self):
+        """Тест: лимит размера действует и без Content-Length"""
+        client = _big_body_client(max_response_size=1024 * 1024)
+
+        async def run():
+            received = 0
+            try:
+                async with client.stream("GET", "https://files.example.com/a") as r:
+                    async for chunk in r.aiter_bytes():
+                        received += len(chunk)
+            except ResponseTooLargeError:
+                return received
+            finally:
+                await client.close()
+
+        assert asyncio.run(run()) == 1024 * 1024
+        with pytest.raises(ResponseTooLargeError):
+            client = _big_body_client(max_response_size=1024 * 1024)
+            asyncio.run(client.spool("GET", "https://files.example.com/a"))
+
+
+def _slow_upstream(calls: list, status: int = 200, delay: float = 0.05):
+    async def handler(request):
+        calls.append(request)
+        n = len(calls)
+        await asyncio.sleep(delay)
+        return httpx.Response(status, json={"n": n})
+
+    return SecureHTTPClient(
+        transport=httpx.MockTransport(handler), base_url="https://api.example.com"
+    )
+
+
+class TestRequestCoalescing:
+    """Тесты объединения одинаковых одновременных запросов (single-flight)"""
+
+    def test_identical_gets_share_one_call(self):
+        """Тест: одинаковые GET - один вызов upstream, разные ключи - свои"""
+        calls = []
+        client = _slow_upstream(calls)
+        before = COALESCED.samples().get(("GET",), 0)
+
+        async def run():
+            same = await asyncio.gather(
+                *(client.get("/ideas", params={"page": 1}) for _ in range(20))
+            )
+            others = await asyncio.gather(
+                client.get("/ideas", params={"page": 2}),
+                client.get("/ideas", params={"page": 1}, headers={"Accept": "x"}),
+                client.post("/ideas", json={}),
+                client.post("/ideas", json={}),
+            )
+            await client.close()
+            return same, others
+
+        same, others = asyncio.run(run())
+        assert {r.json()["n"] for r in same} == {1}
+        assert len(calls) == 5 and len({r.json()["n"] for r in others}) == 4
+        assert COALESCED.samples()[("GET",)] == before + 19
+
+    def test_error_is_shared(self):
+        """Тест: ошибка upstream достаётся всем ждущим, повтора нет"""
+        calls = []
+        client = _slow_upstream(calls, status=404)
+
+        async def run():
+            results = await asyncio.gather(
+                *(client.get("/ideas/1") for _ in range(5)), return_exceptions=True
+            )
+            await client.close()
+            return results
+
+        results = asyncio.run(run())
+        assert len(calls) == 1
+        assert all(isinstance(r, httpx.HTTPStatusError) for r in results)
+
+    def test_cancellation(self):
+        """Тест: отмена одного ждущего не рвёт запрос, отмена всех - рвёт"""
+        calls = []
+        client = _slow_upstream(calls)
+
+        async def run():
+            first = asyncio.ensure_future(client.get("/ideas"))
+            second = asyncio.ensure_future(client.get("/ideas"))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            shared = await second
+
+            lonely = asyncio.ensure_future(client.get("/ideas"))
+            await asyncio.sleep(0.01)
+            lonely.cancel()
+            await asyncio.sleep(0)
+            # запрос брошен, следующий вызов идёт к upstream заново
+            fresh = await client.get("/ideas")
+            await client.close()
+            return first, shared, fresh
+
+        first, shared, fresh = asyncio.run(run())
+        assert first.cancelled() and shared.json() == {"n": 1}
+        assert fresh.json() == {"n": 3} and len(calls) == 3
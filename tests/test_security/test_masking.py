@@ -0,0 +1,49 @@
+import logging
+
+import pytest
+
+from app.security.masking import Masker, RedactingFilter, mask_sensitive_data
+
+
+class TestMasker:
+    """Тесты маскирования чувствительных данных"""
+
+    def test_masks_all_default_rules_in_one_pass(self):
+        """Тест маскирования email, JWT и номеров карт"""
+        text = (
+            "user john.doe@example.com sent eyJhbGciOi.eyJzdWIiOi.c2lnbmF0dXJl"
+            " with card 4111111111111111; order 12345"
+        )
+        assert mask_sensitive_data(text) == (
+            "user [EMAIL_REDACTED] sent [JWT_REDACTED]"
+            " with card [CARD_REDACTED]; order 12345"
+        )
+
+    def test_clean_text_is_returned_as_is(self):
+        """Тест возврата исходной строки без совпадений"""
+        text = "body.items.0.title: Field required"
+        assert mask_sensitive_data(text) is text
+        assert mask_sensitive_data("") == ""
+
+    def test_custom_rule_set(self):
+        """Тест набора правил и ошибки для неизвестного правила"""
+        masker = Masker(["credentials"])
+        url = "GET /cards?q=x&token=abc123&page=2 user@example.com"
+        assert masker.mask(url) == (
+            "GET /cards?q=x&[CREDENTIALS_REDACTED]&page=2 user@example.com"
+        )
+        with pytest.raises(ValueError):
+            Masker(["email", "unknown"])
+
+    def test_redacting_filter_masks_message_and_args(self):
+        """Тест маскирования записей лога"""
+        record = logging.LogRecord(
+            "app", logging.INFO, __file__, 1, "login %s from %s", None, None
+        )
+        record.args = ("a@example.com", 42)
+        RedactingFilter().filter(record)
+        assert record.getMessage() == "login [EMAIL_REDACTED] from 42"
+
+        record.msg, record.args = "GET /cards?api_key=secret HTTP/1.1", ()
+        RedactingFilter().filter(record)
+        assert record.getMessage() == "GET /cards?[CREDENTIALS_REDACTED] HTTP/1.1"
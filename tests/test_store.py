@@ -0,0 +1,491 @@
+import pytest
+
+from app.store.memory import InMemoryCardStore
+from app.store.sqlite import SQLiteCardStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryCardStore()
+        return
+    store = SQLiteCardStore(f"sqlite:///{tmp_path / 'cards.db'}")
+    yield store
+    store.close()
+
+
+def _fill(store, column, n):
+    return [store.create(f"Card {i}", None, column) for i in range(n)]
+
+
+def test_store_get_by_id(store):
+    """Тест поиска карточки по хэш-индексу"""
+    cards = _fill(store, "backlog", 5)
+
+    assert store.get(cards[3]["id"]) == cards[3]
+    assert store.get(999) is None
+    assert len(store) == 5
+
+
+def test_store_column_order(store):
+    """Тест порядка карточек внутри колонки"""
+    _fill(store, "backlog", 3)
+    _fill(store, "todo", 2)
+
+    backlog = list(store.iter_cards("backlog"))
+    assert [c["order_idx"] for c in backlog] == [1, 2, 3]
+    assert store.count("todo") == 2
+
+
+def test_store_delete_shifts_tail(store):
+    """Тест сдвига order_idx после удаления"""
+    cards = _fill(store, "backlog", 4)
+
+    store.delete(cards[1]["id"])
+
+    backlog = list(store.iter_cards("backlog"))
+    assert [c["id"] for c in backlog] == [
+        cards[0]["id"],
+        cards[2]["id"],
+        cards[3]["id"],
+    ]
+    assert [c["order_idx"] for c in backlog] == [1, 2, 3]
+
+
+def test_store_move_to_other_column(store):
+    """Тест переноса карточки в конец другой колонки"""
+    cards = _fill(store, "backlog", 3)
+    _fill(store, "done", 1)
+
+    moved = store.update(cards[0]["id"], {"column": "done"})
+
+    assert moved["column"] == "done"
+    assert moved["order_idx"] == 2
+    assert [c["order_idx"] for c in store.iter_cards("backlog")] == [1, 2]
+
+
+def test_store_ids_not_reused_after_delete(store):
+    """Тест что ID не переиспользуются после удаления"""
+    cards = _fill(store, "todo", 2)
+    store.delete(cards[0]["id"])
+
+    new_card = store.create("New", None, "todo")
+    assert new_card["id"] == 3
+    assert store.get(cards[1]["id"])["title"] == "Card 1"
+
+
+def test_store_move_to_position(store):
+    """Тест перемещения карточки на позицию внутри колонки"""
+    cards = _fill(store, "backlog", 4)
+
+    moved = store.update(cards[3]["id"], {"order_idx": 1})
+
+    assert moved["order_idx"] == 1
+    backlog = list(store.iter_cards("backlog"))
+    assert [c["title"] for c in backlog] == ["Card 3", "Card 0", "Card 1", "Card 2"]
+    assert [c["order_idx"] for c in backlog] == [1, 2, 3, 4]
+
+
+def test_store_move_to_position_in_other_column(store):
+    """Тест переноса в другую колонку на заданную позицию с ограничением"""
+    cards = _fill(store, "backlog", 2)
+    _fill(store, "todo", 2)
+
+    assert (
+        store.update(cards[0]["id"], {"column": "todo", "order_idx": 2})["order_idx"]
+        == 2
+    )
+    assert (
+        store.update(cards[1]["id"], {"column": "todo", "order_idx": 99})["order_idx"]
+        == 4
+    )
+
+
+def test_store_rebalances_exhausted_gap(store):
+    """Тест перенумерации рангов, когда между соседями нет места"""
+    cards = _fill(store, "todo", 3)
+
+    # каждая вставка в начало делит промежуток пополам
+    for _ in range(100):
+        store.update(cards[2]["id"], {"order_idx": 1})
+        store.update(cards[1]["id"], {"order_idx": 1})
+
+    todo = list(store.iter_cards("todo"))
+    assert [c["id"] for c in todo] == [cards[1]["id"], cards[2]["id"], cards[0]["id"]]
+    assert [c["order_idx"] for c in todo] == [1, 2, 3]
+
+
+def test_store_order_matches_reference(store, monkeypatch):
+    """Тест порядкового индекса против эталонного списка при случайных операциях"""
+    import random
+
+    from app.store import memory
+
+    # маленькие блоки, чтобы проверить разбиение и удаление блоков
+    monkeypatch.setattr(memory._OrderIndex, "LOAD", 4)
+    reference = {"todo": [], "done": []}
+    rnd = random.Random(7)
+
+    for step in range(2000):
+        op = rnd.random()
+        if op < 0.4 or not store.count():
+            column = rnd.choice(["todo", "done"])
+            reference[column].append(store.create(f"Card {step}", None, column)["id"])
+        elif op < 0.8:
+            card_id = rnd.choice(reference["todo"] + reference["done"])
+            column = rnd.choice(["todo", "done"])
+            old = store.get(card_id)["column"]
+            reference[old].remove(card_id)
+            pos = rnd.randint(1, len(reference[column]) + 1)
+            reference[column].insert(pos - 1, card_id)
+            moved = store.update(card_id, {"column": column, "order_idx": pos})
+            assert moved["order_idx"] == pos
+        else:
+            card_id = rnd.choice(reference["todo"] + reference["done"])
+            reference[store.delete(card_id)["column"]].remove(card_id)
+
+    for column, ids in reference.items():
+        cards = list(store.iter_cards(column))
+        assert [c["id"] for c in cards] == ids
+        assert [store.get(i)["order_idx"] for i in ids] == list(range(1, len(ids) + 1))
+
+
+def test_store_sqlite_persists_between_instances(tmp_path):
+    """Тест сохранения карточек SQLite между перезапусками"""
+    url = f"sqlite:///{tmp_path / 'cards.db'}"
+    store = SQLiteCardStore(url, pool_size=2)
+    created = store.create("Persistent", "text", "done")
+    store.close()
+
+    reopened = SQLiteCardStore(url, pool_size=2)
+    assert reopened.get(created["id"]) == created
+    assert reopened.count("done") == 1
+    assert reopened.create("Next", None, "done")["order_idx"] == 2
+    reopened.close()
+
+
+def test_store_sqlite_rejects_unknown_url():
+    """Тест поддержки только sqlite:/// URL"""
+    with pytest.raises(ValueError):
+        SQLiteCardStore("postgresql://localhost/cards")
+
+
+def test_store_batch_missing_card_applies_nothing(store):
+    """Тест атомарности пакетных операций при отсутствующей карточке"""
+    from app.store.base import CardNotFoundError
+
+    cards = _fill(store, "todo", 2)
+
+    with pytest.raises(CardNotFoundError) as exc:
+        store.update_many(
+            [(cards[0]["id"], {"title": "Changed"}), (999, {"title": "X"})]
+        )
+    assert exc.value.card_id == 999
+    assert store.get(cards[0]["id"])["title"] == "Card 0"
+
+    with pytest.raises(CardNotFoundError):
+        store.delete_many([cards[1]["id"], 999])
+    assert store.count("todo") == 2
+
+
+def test_store_concurrent_moves_keep_order(store, monkeypatch):
+    """Стресс-тест: параллельные перемещения не ломают порядок колонок"""
+    import random
+    import sys
+    from concurrent.futures import ThreadPoolExecutor
+
+    from app.store import memory
+
+    # частое переключение потоков и мелкие блоки индекса повышают шанс гонки
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    monkeypatch.setattr(memory._OrderIndex, "LOAD", 4)
+    columns = ["backlog", "todo", "in_progress", "done"]
+    for column in columns:
+        _fill(store, column, 25)
+
+    def worker(seed):
+        rnd = random.Random(seed)
+        for _ in range(150):
+            op = rnd.random()
+            card_id = rnd.randint(1, 100)
+            if op < 0.6:
+                store.update(
+                    card_id,
+                    {"column": rnd.choice(columns), "order_idx": rnd.randint(1, 30)},
+                )
+            elif op < 0.8:
+                store.create("New", None, rnd.choice(columns))
+            else:
+                store.delete(card_id)
+
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(worker, range(8)))
+    finally:
+        sys.setswitchinterval(interval)
+
+    seen = []
+    for column in columns:
+        cards = list(store.iter_cards(column))
+        assert [c["order_idx"] for c in cards] == list(range(1, len(cards) + 1))
+        assert all(store.get(c["id"]) == c for c in cards)
+        assert store.count(column) == len(cards)
+        seen += [c["id"] for c in cards]
+    assert len(seen) == len(set(seen)) == store.count()
+
+
+def test_store_version_changes_on_writes(store):
+    """Тест версии доски: растёт после записи и не меняется от чтения"""
+    initial = store.version()
+    card = store.create("Card", None, "todo")
+    created = store.version()
+    assert created.number > initial.number
+    assert created.modified_at >= initial.modified_at
+
+    store.get(card["id"])
+    list(store.iter_cards())
+    store.update(999, {"title": "Missing"})
+    assert store.version() == created
+
+    store.update(card["id"], {"order_idx": 1})
+    moved = store.version()
+    store.delete(card["id"])
+    assert created.number < moved.number < store.version().number
+
+
+def test_store_version_fits_json_number(store):
+    """Тест: номер версии точно представим числом JSON (не больше 2**53 - 1)"""
+    store.create("Card", None, "todo")
+    version = store.version()
+    assert 0 < version.number <= 2**53 - 1
+    assert float(version.number) == version.number
+    assert version.epoch > 0
+
+
+def test_store_sqlite_renumbers_legacy_versions(tmp_path):
+    """Тест: доска с версиями от времени в наносекундах нумеруется заново"""
+    url = f"sqlite:///{tmp_path / 'cards.db'}"
+    store = SQLiteCardStore(url, pool_size=1)
+    card = store.create("Legacy card", None, "todo")
+    legacy = 1_790_000_000_000_000_000
+    with store._pool.connection() as conn:
+        conn.execute(
+            "UPDATE board_version SET number = ?, horizon = ?, epoch = 0",
+            (legacy + 1, legacy),
+        )
+        conn.execute("UPDATE cards SET version = ?", (legacy + 1,))
+    store.close()
+
+    reopened = SQLiteCardStore(url, pool_size=1)
+    version = reopened.version()
+    assert version.number <= 2**53 - 1 and version.epoch > 0
+    assert reopened.changes_since(legacy).snapshot
+    assert reopened.changes_since(version.number) == (version.number, [], [], False)
+    reopened.create("Next", None, "todo")
+    assert reopened.changes_since(version.number).cards[0]["id"] != card["id"]
+    reopened.close()
+
+
+def _apply_delta(board, delta):
+    # алгоритм клиента: убрать изменённые и удалённые, вставить по order_idx
+    if delta.snapshot:
+        board.clear()
+    gone = set(delta.deleted) | {card["id"] for card in delta.cards}
+    for ids in board.values():
+        ids[:] = [card_id for card_id in ids if card_id not in gone]
+    for card in sorted(delta.cards, key=lambda c: c["order_idx"]):
+        board.setdefault(card["column"], []).insert(card["order_idx"] - 1, card["id"])
+
+
+def test_store_changes_since_rebuilds_board(store):
+    """Тест дельты: клиент, применяющий изменения, видит ту же доску"""
+    import random
+
+    rnd = random.Random(3)
+    columns = ["todo", "done"]
+    board = {}
+    since = store.version().number
+    for step in range(300):
+        op = rnd.random()
+        ids = [card["id"] for card in store.iter_cards()]
+        if op < 0.4 or not ids:
+            store.create(f"Card {step}", None, rnd.choice(columns))
+        elif op < 0.8:
+            store.update(
+                rnd.choice(ids),
+                {"column": rnd.choice(columns), "order_idx": rnd.randint(1, 10)},
+            )
+        else:
+            store.delete(rnd.choice(ids))
+
+        if step % 7 == 0:
+            delta = store.changes_since(since)
+            assert not delta.snapshot
+            _apply_delta(board, delta)
+            since = delta.version
+            for column in columns:
+                expected = [card["id"] for card in store.iter_cards(column)]
+                assert board.get(column, []) == expected
+
+    assert store.changes_since(store.version().number).cards == []
+
+
+def test_store_changes_since_tombstones_and_compaction(tmp_path):
+    """Тест надгробий и снимка после сжатия журнала"""
+    stores = [
+        InMemoryCardStore(sync_log_size=3),
+        SQLiteCardStore(f"sqlite:///{tmp_path / 'cards.db'}", sync_log_size=3),
+    ]
+    for store in stores:
+        start = store.version().number
+        kept, gone = _fill(store, "todo", 2)
+        store.delete(gone["id"])
+
+        delta = store.changes_since(start, limit=2)
+        assert [card["id"] for card in delta.cards] == [kept["id"]]
+        assert delta.deleted == [gone["id"]]
+        # изменение и надгробие вместе больше limit - только снимок
+        assert store.changes_since(start, limit=1) == (delta.version, [], [], True)
+
+        for card in _fill(store, "done", 4):
+            store.delete(card["id"])
+        assert store.changes_since(start).snapshot
+        recent = store.changes_since(store.version().number - 1)
+        assert not recent.snapshot and len(recent.deleted) == 1
+
+        snapshot = store.changes_since(start - 1)
+        assert snapshot.snapshot and snapshot.cards == []
+        store.close()
+
+
+def test_store_changes_since_positions_of_scattered_cards(store):
+    """Тест order_idx карточек из разных мест колонок, в том числе с конца"""
+    import random
+
+    rnd = random.Random(11)
+    for column in ["todo", "done"]:
+        _fill(store, column, 40)
+    cards = list(store.iter_cards())
+    for picks in ([0, 1], [38, 39], [5, 20, 39], [0, 39], list(range(0, 80, 9))):
+        since = store.version().number
+        for i in picks:
+            store.update(cards[i]["id"], {"title": f"Edited {rnd.random()}"})
+        delta = store.changes_since(since)
+        # позиции по колонкам - другим путём, чем order_idx в дельте
+        expected = {
+            card["id"]: card["order_idx"]
+            for column in ["todo", "done"]
+            for card in store.iter_cards(column)
+        }
+        assert {card["id"]: card["order_idx"] for card in delta.cards} == {
+            cards[i]["id"]: expected[cards[i]["id"]] for i in picks
+        }
+
+
+def test_store_search_expands_every_prefix_term(store):
+    """Тест: префикс с сотнями терминов находит все карточки"""
+    store.create("abzzz", None, "todo")
+    store.create_many(
+        [
+            {"title": f"ab{i:04}", "description": None, "column": "todo"}
+            for i in range(300)
+        ]
+    )
+    found = store.search("ab", 1000)
+    assert len(found) == 301 and found[-1]["title"] == "abzzz"
+    assert [card["title"] for card in store.search("abz", 5)] == ["abzzz"]
+    assert store.search("ab0299 ab", 5)[0]["title"] == "ab0299"
+
+
+def test_store_search_ranks_title_matches_first(store):
+    """Тест ранжирования поиска: совпадения в заголовке, затем новые карточки"""
+    login = store.create("Fix login", "Users cannot sign in", "todo")
+    styles = store.create("Styles", "fix login page", "todo")
+    logout = store.create("Fix logout button", None, "done")
+    store.create("Unrelated", "nothing here", "todo")
+
+    assert [c["id"] for c in store.search("fix log")] == [
+        logout["id"],
+        login["id"],
+        styles["id"],
+    ]
+    assert store.search("FIX LOGIN", limit=1) == [store.get(login["id"])]
+    assert store.search("sign") == [store.get(login["id"])]
+    assert store.search("login fix") and not store.search("fix missing")
+    assert store.search("  ,. ") == []
+
+    store.update(styles["id"], {"description": None, "order_idx": 1})
+    store.delete(logout["id"])
+    assert [c["id"] for c in store.search("fix")] == [login["id"]]
+    store.update(styles["id"], {"title": "Fix Ёлка"})
+    assert store.search("ёлк") == [store.get(styles["id"])]
+
+
+def test_store_search_matches_reference(store):
+    """Тест поиска против полного перебора на случайных изменениях"""
+    import random
+    import re
+
+    rnd = random.Random(16)
+    words = ["alpha", "alps", "beta", "bet", "gamma", "game", "delta"]
+
+    def text(n):
+        return " ".join(rnd.choice(words) for _ in range(n)) or None
+
+    def expected(query, cards):
+        *exact, prefix = query.split()
+
+        def hit(field):
+            terms = set(re.findall(r"\w+", (field or "").lower()))
+            return all(w in terms for w in exact) and any(
+                t.startswith(prefix) for t in terms
+            )
+
+        title = [c["id"] for c in cards if hit(c["title"])]
+        rest = [
+            c["id"]
+            for c in cards
+            if hit(f"{c['title']} {c['description'] or ''}") and c["id"] not in title
+        ]
+        return sorted(title, reverse=True) + sorted(rest, reverse=True)
+
+    ids = []
+    for step in range(300):
+        action = rnd.random()
+        if action < 0.5 or not ids:
+            ids.append(
+                store.create(text(2) or "x", text(rnd.randrange(3)), "todo")["id"]
+            )
+        elif action < 0.8:
+            store.update(rnd.choice(ids), {"title": text(2) or "x"})
+        else:
+            store.delete(ids.pop(rnd.randrange(len(ids))))
+
+        if step % 25 == 0:
+            cards = list(store.iter_cards())
+            for query in ["al", "alpha", "bet gam", "game alp", "delta beta b"]:
+                found = [c["id"] for c in store.search(query, limit=1000)]
+                assert found == expected(query, cards), query
+                assert [c["id"] for c in store.search(query, limit=3)] == found[:3]
+
+
+def test_store_sqlite_indexes_existing_cards_for_search(tmp_path):
+    """Тест построения поискового индекса для базы без него"""
+    url = f"sqlite:///{tmp_path / 'cards.db'}"
+    store = SQLiteCardStore(url, pool_size=1)
+    card = store.create("Legacy card", None, "todo")
+    with store._pool.connection() as conn:
+        conn.executescript(
+            "DROP TRIGGER cards_fts_insert; DROP TRIGGER cards_fts_delete;"
+            " DROP TRIGGER cards_fts_update; DROP TABLE cards_fts;"
+            " DROP TABLE search_terms;"
+        )
+    store.close()
+
+    reopened = SQLiteCardStore(url, pool_size=1)
+    assert reopened.search("legacy") == [card]
+    # префикс длиннее проиндексированных раскрывается по словарю терминов
+    assert reopened.search("lega") == reopened.search("card legac") == [card]
+    assert reopened.search("legz") == []
+    reopened.close()